@@ -293,35 +293,13 @@ function tryInitialize() {
     return false;
 }
 
-// Try multiple initialization methods
-document.addEventListener('DOMContentLoaded', function() {
-    console.log('📄 DOM loaded, trying to initialize...');
-    if (!tryInitialize()) {
-        // Try again after a short delay
-        setTimeout(tryInitialize, 500);
-    }
-});
-
-// Also try when window loads
-window.addEventListener('load', function() {
-    console.log('🌐 Window loaded, trying to initialize...');
-    setTimeout(tryInitialize, 100);
-});
-
-// Immediate initialization if DOM is already ready
-if (document.readyState === 'complete' || document.readyState === 'interactive') {
-    console.log('⚡ DOM already ready, trying immediate initialization...');
-    setTimeout(tryInitialize, 100);
+// Initialize once the DOM is ready; extra_javascript loads at the end of <body> or deferred
+if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', tryInitialize);
+} else {
+    tryInitialize();
 }
 
-// Fallback initialization
-setTimeout(function() {
-    if (window.location.pathname.includes('/portfolio')) {
-        console.log('🔄 Fallback initialization attempt...');
-        tryInitialize();
-    }
-}, 1000);
-
 // Debug function to test card clicks manually
 window.testCardClicks = function() {
     console.log('🧪 Testing card clicks...');
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Benchmark Harness for the scripts/ Tooling
+Generates synthetic docs trees and times each checker, recording wall time and peak RSS
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SCRIPTS_DIR.parent
+
+CATEGORIES = ["AWS", "Kubernetes", "DevOps", "Cloud", "Platform Engineering", "GitOps", "Security"]
+WORDS = ("platform cluster pipeline latency observability terraform rollout budget "
+         "migration workload gateway ingress storage network policy").split()
+
+# (name, script, extra args, uses the validation cache)
+CHECKERS = [
+    ("validate-content", "validate-content.py", [], True),
+    ("test-navigation", "test-navigation.py", [], True),
+    ("test-production", "test-production.py", ["--skip-build", "--site-dir", "site"], False),
+    # Last: it rewrites Markdown sources in place
+    ("optimize-site", "optimize-site.py", [], False),
+]
+
+
+def _paragraph(rng, words=60):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _page_body(rng, title, link_targets):
+    """Markdown body with headings, internal links, anchors, images and an external link"""
+    lines = [f"# {title}", "", _paragraph(rng), ""]
+    for section in range(1, 4):
+        lines += [f"## Section {section}", "", _paragraph(rng), ""]
+        target = rng.choice(link_targets)
+        lines.append(f"See [related page]({target}) and [section two](#section-2).")
+        lines.append("")
+    lines.append("![Architecture diagram](/assets/images/diagram.svg)")
+    lines.append("")
+    lines.append('<img src="/assets/images/diagram.svg" alt="Diagram">')
+    lines.append("")
+    lines.append('<a href="https://example.com/docs" target="_blank">Reference</a>')
+    lines.append("")
+    lines.append("```python\nprint('[not a link](nowhere.md)')\n```")
+    return "\n".join(lines) + "\n"
+
+
+def generate_docs_tree(root, pages, seed=0):
+    """Create docs/, mkdocs.yml and a matching synthetic site/ with `pages` Markdown pages"""
+    rng = random.Random(seed)
+    docs = root / "docs"
+    (docs / "blog" / "posts").mkdir(parents=True)
+    (docs / "portfolio").mkdir()
+    (docs / "assets" / "images").mkdir(parents=True)
+    (docs / "assets" / "js").mkdir(parents=True)
+    (docs / "stylesheets").mkdir()
+
+    shutil.copy(REPO_ROOT / "mkdocs.yml", root / "mkdocs.yml")
+    shutil.copy(REPO_ROOT / "docs" / "stylesheets" / "custom.css", docs / "stylesheets" / "custom.css")
+    for js_file in (REPO_ROOT / "docs" / "assets" / "js").glob("*.js"):
+        shutil.copy(js_file, docs / "assets" / "js" / js_file.name)
+    shutil.copy(REPO_ROOT / "docs" / "blog" / ".authors.yml", docs / "blog" / ".authors.yml")
+    (docs / "assets" / "images" / "diagram.svg").write_text(
+        '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10"/>', encoding="utf-8")
+
+    fixed = ["index.md", "about.md", "resume.md", "portfolio.md", "blog/index.md", "portfolio/index.md"]
+    posts = max(1, int(pages * 0.7))
+    projects = max(1, pages - posts - len(fixed))
+    post_paths = [f"blog/posts/post-{i}.md" for i in range(posts)]
+    project_paths = [f"portfolio/project-{i}.md" for i in range(projects)]
+    link_targets = ["/about.md", "/resume.md", "/portfolio/index.md"] + [f"/{p}" for p in project_paths[:50]]
+
+    for rel_path in fixed:
+        title = Path(rel_path).stem.replace("-", " ").title()
+        frontmatter = f"---\ntitle: {title}\ndescription: {title} page\nkeywords: a, b\n---\n\n"
+        (docs / rel_path).write_text(frontmatter + _page_body(rng, title, link_targets), encoding="utf-8")
+
+    for i, rel_path in enumerate(post_paths):
+        date = f"20{20 + i % 6}-{1 + i % 12:02d}-{1 + i % 28:02d}"
+        categories = "\n".join(f"  - {c}" for c in rng.sample(CATEGORIES, 2))
+        frontmatter = (f"---\ntitle: \"Post {i}\"\ndate: {date}\ncategories:\n{categories}\n"
+                       f"authors:\n  - alan\ndescription: Post {i}\nslug: post-{i}\n---\n\n")
+        (docs / rel_path).write_text(frontmatter + _page_body(rng, f"Post {i}", link_targets), encoding="utf-8")
+
+    for i, rel_path in enumerate(project_paths):
+        frontmatter = f"---\ntitle: \"Project {i}\"\ndescription: Project {i}\n---\n\n"
+        (docs / rel_path).write_text(frontmatter + _page_body(rng, f"Project {i}", link_targets), encoding="utf-8")
+
+    _generate_site(root / "site", fixed + post_paths + project_paths)
+
+
+def _page_html(stem, up):
+    """One synthetic built page; `up` climbs from the page's directory to the site root"""
+    return (
+        "<!doctype html><html lang=\"en\"><head><meta charset=\"utf-8\">"
+        "<meta name=\"viewport\" content=\"width=device-width\">"
+        f"<title>{stem}</title><meta name=\"description\" content=\"{stem}\">"
+        f"<meta property=\"og:title\" content=\"{stem}\"></head><body>"
+        "<a href=\"#content\" class=\"md-skip\">Skip to content</a>"
+        f"<h1 id=\"content\">{stem}</h1><h2 id=\"section-2\">Section 2</h2>"
+        f"<a href=\"{up}about/\">About</a> <a href=\"#section-2\">Jump</a>"
+        "<a href=\"https://example.com\" rel=\"noopener\">Ext</a>"
+        "<img src=\"x.png\" alt=\"x\">" + "<p>" + " ".join(WORDS) * 20 + "</p></body></html>"
+    )
+
+
+def _generate_site(site, rel_paths):
+    """Synthetic built HTML so test-production can run without mkdocs"""
+    (site / "assets").mkdir(parents=True)
+    (site / "assets" / "main.css").write_text("body{margin:0}\n", encoding="utf-8")
+    (site / "assets" / "main.js").write_text("console.log(1);\n", encoding="utf-8")
+    urls = []
+    for rel_path in rel_paths:
+        stem = rel_path[:-3]
+        out = site / ("index.html" if stem == "index" else f"{stem.removesuffix('/index')}/index.html")
+        out.parent.mkdir(parents=True, exist_ok=True)
+        depth = len(out.relative_to(site).parts) - 1
+        out.write_text(_page_html(stem, "../" * depth), encoding="utf-8")
+        urls.append(f"<url><loc>https://example.com/{stem}/</loc></url>")
+    for name in ("about", "resume", "portfolio", "blog"):
+        if not (site / name / "index.html").exists():
+            (site / name).mkdir(exist_ok=True)
+            (site / name / "index.html").write_text(_page_html(name, "../"), encoding="utf-8")
+    # test_generated_files expects flat about.html/resume.html, which sit at the site root
+    for name in ("about", "resume"):
+        (site / f"{name}.html").write_text(_page_html(name, ""), encoding="utf-8")
+    (site / "sitemap.xml").write_text(
+        '<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        + "".join(urls) + "</urlset>", encoding="utf-8")
+    (site / "robots.txt").write_text("Sitemap: https://example.com/sitemap.xml\n", encoding="utf-8")
+
+
+def run_checker(script, args, cwd, timeout):
+    """Run one checker as a child process; returns (exit code, wall seconds, peak RSS in KB)"""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, str(SCRIPTS_DIR / script), *args],
+        cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = start + timeout
+    while True:
+        pid, status, usage = os.wait4(proc.pid, os.WNOHANG)
+        if pid:
+            break
+        if time.perf_counter() > deadline:
+            proc.kill()
+            pid, status, usage = os.wait4(proc.pid, 0)
+            break
+        time.sleep(0.005)
+    elapsed = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+
+    # ru_maxrss is kilobytes on Linux but bytes on macOS
+    peak_rss_kb = usage.ru_maxrss / 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    return proc.returncode, elapsed, int(peak_rss_kb)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(results, baseline_file):
+    """Print wall-time and RSS ratios against a previous JSON report"""
+    with open(baseline_file, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {(r["checker"], r["pages"], r["variant"]): r for r in baseline["results"]}
+
+    print(f"\n📈 Comparison with {baseline_file} ({baseline.get('commit') or 'unknown commit'})")
+    for result in results:
+        old = previous.get((result["checker"], result["pages"], result["variant"]))
+        if not old or not old["wall_seconds"]:
+            continue
+        time_ratio = result["wall_seconds"] / old["wall_seconds"]
+        rss_ratio = result["peak_rss_kb"] / old["peak_rss_kb"] if old["peak_rss_kb"] else 0
+        flag = "⚠️ " if time_ratio > 1.2 else "  "
+        print(f"{flag}{result['checker']:<18} {result['pages']:>6} {result['variant']:<5} "
+              f"time x{time_ratio:.2f}  rss x{rss_ratio:.2f}")
+
+
+def main():
+    """Generate trees of each size, run every checker and emit a JSON report"""
+    parser = argparse.ArgumentParser(description="Benchmark the scripts/ checkers on synthetic docs trees")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="Page counts to generate (e.g. 100 1000 10000 50000)")
+    parser.add_argument("--checkers", nargs="+", default=[name for name, *_ in CHECKERS],
+                        help="Subset of checkers to run")
+    parser.add_argument("--output", default="benchmark-results.json", help="Where to write the JSON report")
+    parser.add_argument("--compare", help="Previous JSON report to compare against")
+    parser.add_argument("--timeout", type=float, default=1800, help="Per-run timeout in seconds")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated trees")
+    args = parser.parse_args()
+
+    if not hasattr(os, "wait4"):
+        # Peak RSS of each child comes from os.wait4, which only POSIX systems have
+        print(f"❌ benchmark.py needs a POSIX system (Linux or macOS); {platform.system()} is not supported")
+        return 1
+
+    results = []
+    failed = []
+    for pages in args.sizes:
+        root = Path(tempfile.mkdtemp(prefix=f"docs-bench-{pages}-"))
+        print(f"🏗️  Generating {pages} pages in {root}...")
+        start = time.perf_counter()
+        generate_docs_tree(root, pages)
+        print(f"  generated in {time.perf_counter() - start:.1f}s")
+
+        try:
+            for name, script, extra_args, cached in CHECKERS:
+                if name not in args.checkers:
+                    continue
+                variants = ["cold", "warm"] if cached else ["cold"]
+                for variant in variants:
+                    if variant == "cold":
+                        shutil.rmtree(root / ".cache", ignore_errors=True)
+                    code, elapsed, rss = run_checker(script, extra_args, root, args.timeout)
+                    results.append({
+                        "checker": name,
+                        "pages": pages,
+                        "variant": variant,
+                        "wall_seconds": round(elapsed, 4),
+                        "peak_rss_kb": rss,
+                        "exit_code": code,
+                    })
+                    flag = ""
+                    if code != 0:
+                        # A failing run exits early or does extra reporting; its timing is not comparable
+                        failed.append(f"{name} ({pages} pages, {variant}): exit {code}")
+                        flag = "  ❌ failed"
+                    print(f"  {name:<18} {variant:<5} {elapsed:8.2f}s  {rss / 1024:7.1f} MB  exit {code}{flag}")
+        finally:
+            if not args.keep:
+                shutil.rmtree(root, ignore_errors=True)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📊 Wrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    if failed:
+        print(f"\n❌ {len(failed)} checker runs exited nonzero, so their timings measure a failing run:")
+        for failure in failed:
+            print(f"  • {failure}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -37,6 +37,15 @@ REM Build the site
 echo 🔨 Building site...
 mkdocs build --verbose --clean
 
+REM Optimize the generated site (images, CSS, JS, critical CSS, fingerprints, compression)
+echo ⚡ Optimizing site...
+python scripts\post-build.py --site-dir site
+if errorlevel 1 (
+    echo ❌ Post-build optimization failed!
+    pause
+    exit /b 1
+)
+
 REM Check if build was successful
 if exist "site\index.html" (
     echo ✅ Build completed successfully!
@@ -38,6 +38,10 @@ mkdocs config
 echo "🔨 Building site..."
 mkdocs build --verbose --clean
 
+# Optimize the generated site (images, CSS, JS, critical CSS, fingerprints, compression)
+echo "⚡ Optimizing site..."
+python3 scripts/post-build.py --site-dir site
+
 # Check if build was successful
 if [ -d "site" ] && [ -f "site/index.html" ]; then
     echo "✅ Build completed successfully!"
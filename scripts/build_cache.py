@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Build Artifact Manager
+Builds the site once per unique set of inputs and lets every test script reuse the result
+"""
+
+import ast
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from importlib import metadata
+from pathlib import Path
+
+from mkdocs_config import load_mkdocs_config
+
+BUILDS_DIR = Path(".cache/builds")
+KEEP_BUILDS = 3
+POST_BUILD_SCRIPT = Path(__file__).resolve().parent / "post-build.py"
+
+
+class BuildResult:
+    """Outcome of ensure_build()"""
+
+    def __init__(self, success, site_dir, key, reused=False, stderr="", post_processed=False):
+        self.success = success
+        self.site_dir = Path(site_dir)
+        self.key = key
+        self.reused = reused
+        self.stderr = stderr
+        self.post_processed = post_processed
+
+
+def _hash_file(digest, path):
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+
+def local_modules(path):
+    """The script at path plus every module it imports, directly or not, from its own directory"""
+    path = Path(path)
+    found = {}
+    pending = [path]
+    while pending:
+        current = pending.pop()
+        if current in found or not current.exists():
+            continue
+        found[current] = True
+        try:
+            tree = ast.parse(current.read_text(encoding="utf-8"))
+        except (OSError, SyntaxError, ValueError):
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and not node.level and node.module:
+                names = [node.module]
+            else:
+                continue
+            pending.extend(current.parent / f"{name.split('.')[0]}.py" for name in names)
+    return sorted(found)
+
+
+def requirement_versions(requirements_file="requirements.txt"):
+    """Installed versions of every package named in requirements.txt"""
+    versions = {}
+    if not os.path.exists(requirements_file):
+        return versions
+    with open(requirements_file, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            name = re.split(r"[<>=!~\[;\s]", line, 1)[0]
+            try:
+                versions[name] = metadata.version(name)
+            except metadata.PackageNotFoundError:
+                versions[name] = "not-installed"
+    return versions
+
+
+def compute_build_key(config_file="mkdocs.yml", docs_dir="docs", requirements_file="requirements.txt"):
+    """Content hash of mkdocs.yml, its hooks and the local modules they import, every file under docs/
+    and the installed package versions"""
+    digest = hashlib.sha256()
+    _hash_file(digest, config_file)
+
+    config_dir = Path(config_file).parent
+    for hook in load_mkdocs_config(config_file).get("hooks", []) or []:
+        for path in local_modules(config_dir / hook):
+            digest.update(os.path.relpath(path, config_dir).replace(os.sep, "/").encode("utf-8") + b"\0")
+            _hash_file(digest, path)
+
+    for dirpath, dirnames, filenames in os.walk(docs_dir):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            path = os.path.join(dirpath, filename)
+            digest.update(os.path.relpath(path, docs_dir).replace(os.sep, "/").encode("utf-8") + b"\0")
+            _hash_file(digest, path)
+
+    versions = requirement_versions(requirements_file)
+    digest.update(json.dumps(versions, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _read_meta(build_dir):
+    try:
+        with open(build_dir / "build.json", "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _prune(keep=KEEP_BUILDS):
+    """Remove all but the most recently used builds"""
+    if not BUILDS_DIR.exists():
+        return
+    builds = sorted(
+        (d for d in BUILDS_DIR.iterdir() if d.is_dir() and not d.name.startswith(".")),
+        key=lambda d: d.stat().st_mtime,
+        reverse=True
+    )
+    for stale in builds[keep:]:
+        shutil.rmtree(stale, ignore_errors=True)
+
+
+def _post_process(site_dir, timeout):
+    """Run every post-build stage on site_dir; (success, output)"""
+    try:
+        result = subprocess.run([sys.executable, str(POST_BUILD_SCRIPT), "--site-dir", str(site_dir)],
+                                capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return False, f"Post-build timed out after {timeout} seconds"
+    except Exception as e:
+        return False, str(e)
+    return result.returncode == 0, result.stdout + result.stderr
+
+
+def _post_build_key(key):
+    """Build key plus the post-build script and the stage modules it imports"""
+    digest = hashlib.sha256(key.encode("utf-8"))
+    for path in local_modules(POST_BUILD_SCRIPT):
+        digest.update(path.name.encode("utf-8") + b"\0")
+        _hash_file(digest, path)
+    return f"{key}-post-{digest.hexdigest()[:8]}"
+
+
+def ensure_build(strict=True, timeout=300, config_file="mkdocs.yml", docs_dir="docs", post_process=False):
+    """Return a BuildResult for the current inputs, building only if no usable build exists.
+
+    A strict build also satisfies non-strict requests, since it is the same output
+    with warnings treated as errors. With post_process the result is a copy of that build
+    with scripts/post-build.py applied, as deployed; it is cached separately.
+    """
+    if post_process:
+        return _ensure_post_processed(strict, timeout, config_file, docs_dir)
+
+    key = compute_build_key(config_file, docs_dir)
+    build_dir = BUILDS_DIR / key
+    site_dir = build_dir / "site"
+
+    meta = _read_meta(build_dir)
+    if meta and meta.get("success") and (meta.get("strict") or not strict) and site_dir.exists():
+        os.utime(build_dir)
+        return BuildResult(True, site_dir, key, reused=True, stderr=meta.get("stderr", ""))
+
+    tmp_dir = BUILDS_DIR / f".{key}.{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    command = ["mkdocs", "build", "--clean", "--config-file", config_file,
+               "--site-dir", str((tmp_dir / "site").resolve())]
+    if strict:
+        command.append("--strict")
+
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return BuildResult(False, site_dir, key, stderr=f"Build timed out after {timeout} seconds")
+    except Exception as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return BuildResult(False, site_dir, key, stderr=str(e))
+
+    if result.returncode != 0:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return BuildResult(False, site_dir, key, stderr=result.stderr)
+
+    with open(tmp_dir / "build.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "success": True,
+            "strict": strict,
+            "key": key,
+            "built_at": time.time(),
+            "stderr": result.stderr,
+        }, f, indent=2)
+
+    # Swap the finished build into place so readers never see a partial tree
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.replace(tmp_dir, build_dir)
+    _prune()
+
+    return BuildResult(True, site_dir, key, stderr=result.stderr)
+
+
+def _ensure_post_processed(strict, timeout, config_file, docs_dir):
+    """ensure_build(post_process=True): post-process a copy of the plain build"""
+    build = ensure_build(strict, timeout, config_file, docs_dir)
+    key = _post_build_key(build.key)
+    build_dir = BUILDS_DIR / key
+    site_dir = build_dir / "site"
+    if not build.success:
+        return BuildResult(False, site_dir, key, stderr=build.stderr)
+
+    meta = _read_meta(build_dir)
+    if meta and meta.get("success") and (meta.get("strict") or not strict) and site_dir.exists():
+        os.utime(build_dir)
+        return BuildResult(True, site_dir, key, reused=True, stderr=meta.get("stderr", ""), post_processed=True)
+
+    tmp_dir = BUILDS_DIR / f".{key}.{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    shutil.copytree(build.site_dir, tmp_dir / "site")
+    success, output = _post_process(tmp_dir / "site", timeout)
+    if not success:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        return BuildResult(False, site_dir, key, stderr=output)
+
+    with open(tmp_dir / "build.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "success": True,
+            "strict": (_read_meta(build.site_dir.parent) or {}).get("strict", strict),
+            "key": key,
+            "post_processed": True,
+            "built_at": time.time(),
+            "stderr": build.stderr,
+        }, f, indent=2)
+
+    shutil.rmtree(build_dir, ignore_errors=True)
+    os.replace(tmp_dir, build_dir)
+    _prune()
+
+    return BuildResult(True, site_dir, key, stderr=build.stderr, post_processed=True)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Dependency Graph Query Script
+Shows which pages and built files must be rebuilt or retested when the given files change
+"""
+
+import argparse
+import json
+import sys
+import time
+
+import dep_graph
+
+
+def main():
+    """Main function to query the page dependency graph"""
+    parser = argparse.ArgumentParser(description="What must be rebuilt or retested if these files changed")
+    parser.add_argument("paths", nargs="*", metavar="PATH", help="Changed files, relative to the repository root")
+    parser.add_argument("--docs-dir", default="docs", help="Documentation source directory")
+    parser.add_argument("-f", "--config-file", default="mkdocs.yml", help="MkDocs configuration file")
+    parser.add_argument("--json", action="store_true", help="Print the impact as JSON")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    graph = dep_graph.DependencyGraph(args.docs_dir, args.config_file).update()
+    graph.save()
+    elapsed = time.perf_counter() - start
+    if not args.paths:
+        print(f"🕸️  {len(graph.entries)} pages, {len(graph.dependents)} source files, "
+              f"{graph.edge_count()} edges ({graph.hits} unchanged, {graph.misses} rescanned in {elapsed:.2f}s)")
+        return
+
+    impact = graph.affected(args.paths)
+    if args.json:
+        json.dump({
+            "whole_site": impact.whole_site,
+            "pages": sorted(impact.pages),
+            "outputs": sorted(impact.outputs),
+            "site_checks": sorted(impact.site_checks),
+        }, sys.stdout, indent=2)
+        print()
+        return
+
+    print(f"🎯 {impact.summary()}")
+    if impact.whole_site:
+        return
+    for rel_path in sorted(impact.pages):
+        print(f"  • {rel_path}")
+    if impact.outputs:
+        print("\nBuilt files to retest:")
+        for output in sorted(impact.outputs):
+            print(f"  • {output}")
+
+
+if __name__ == "__main__":
+    main()
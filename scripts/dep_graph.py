@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Page Dependency Graph
+Maps every source file to the pages and built outputs that must be rebuilt or retested when it changes
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import posixpath
+import re
+import subprocess
+from collections import defaultdict
+from pathlib import Path
+
+from doc_corpus import get_corpus
+from heading_index import pymdownx_slugify
+from link_index import LinkIndex
+from mkdocs_config import PythonTag, load_mkdocs_config, markdown_extension_configs, plugin_configs
+from snippet_scanner import resolve_snippets
+
+GRAPH_PATH = Path(".cache/dep_graph.json")
+GRAPH_VERSION = 1
+IMG_SRC_RE = re.compile(r'\ssrc=["\']([^"\']+)["\']', re.IGNORECASE)
+# Checks that look at the site as a whole rather than at single pages
+SITE_CHECKS = ("nav", "sitemap", "assets")
+# Material blog plugin defaults for the settings that decide where posts and views are written
+BLOG_DEFAULTS = {
+    "blog_dir": "blog",
+    "post_dir": "{blog}/posts",
+    "post_url_format": "{date}/{slug}",
+    "post_url_date_format": "yyyy/MM/dd",
+    "archive": True,
+    "archive_url_format": "archive/{date}",
+    "archive_url_date_format": "yyyy",
+    "categories": True,
+    "categories_url_format": "category/{slug}",
+    "pagination_url_format": "page/{page}",
+    "authors_file": "{blog}/.authors.yml",
+}
+DATE_TOKENS = (("yyyy", "%Y"), ("MM", "%m"), ("dd", "%d"))
+# Changes to the checkers themselves or to the installed packages can change any result
+TOOLING_PATHS = ("requirements.txt", "scripts/")
+
+
+class Impact:
+    """What a set of changed files affects: source pages, built outputs and whole-site checks"""
+
+    def __init__(self, changed):
+        self.changed = sorted(changed)
+        self.pages = set()
+        self.outputs = set()
+        self.site_checks = set()
+        self.whole_site = False
+        self.reasons = []
+
+    def covers_page(self, rel_path):
+        """Whether a docs-relative Markdown source needs checking"""
+        return self.whole_site or rel_path in self.pages
+
+    def covers_output(self, site_rel):
+        """Whether a site-relative built file needs checking; outputs ending in / cover a whole directory"""
+        if self.whole_site or site_rel in self.outputs:
+            return True
+        return any(output.endswith("/") and site_rel.startswith(output) for output in self.outputs)
+
+    def needs(self, check):
+        """Whether a whole-site check (one of SITE_CHECKS) needs to run"""
+        return self.whole_site or check in self.site_checks
+
+    def summary(self):
+        if self.whole_site:
+            return f"{len(self.changed)} changed files affect the whole site ({'; '.join(self.reasons)})"
+        checks = f", site checks: {', '.join(sorted(self.site_checks))}" if self.site_checks else ""
+        return f"{len(self.changed)} changed files affect {len(self.pages)} pages{checks}"
+
+
+def _repo_path(path):
+    """Normalized path relative to the working directory, as git reports it"""
+    return Path(os.path.relpath(os.path.abspath(path))).as_posix()
+
+
+def _make_slugify(value):
+    """Slugify callable for a *_slugify plugin option; pymdownx.slugs.slugify(case="lower") when unset"""
+    if isinstance(value, PythonTag) and value.target.startswith("pymdownx.slugs."):
+        return pymdownx_slugify(**dict(value["kwds"]))
+    return pymdownx_slugify(case="lower")
+
+
+def _parse_date(value):
+    if isinstance(value, dict):
+        value = value.get("created")
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value
+    try:
+        return datetime.datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def _format_date(date, date_format):
+    """Format a date with the yyyy/MM/dd subset of the Babel patterns the blog plugin takes"""
+    for token, directive in DATE_TOKENS:
+        date_format = date_format.replace(token, directive)
+    return date.strftime(date_format)
+
+
+class DependencyGraph:
+    """Reverse dependencies of the docs tree, persisted in .cache and rescanned per changed file"""
+
+    def __init__(self, docs_dir="docs", config_file="mkdocs.yml", path=GRAPH_PATH):
+        self.docs_dir = Path(docs_dir)
+        self.docs_prefix = _repo_path(docs_dir)
+        self.config_file = _repo_path(config_file)
+        self.path = Path(path)
+        with open(config_file, "rb") as f:
+            self.config_sha = hashlib.sha256(f.read()).hexdigest()
+        self.config = load_mkdocs_config(config_file)
+        self.corpus = get_corpus(docs_dir)
+        self.entries = {}
+        self.previous = {}
+        self.dependents = defaultdict(set)
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._read_config()
+        self._load()
+
+    def _read_config(self):
+        config = self.config
+        theme = config.get("theme") or {}
+        custom_dir = theme.get("custom_dir") if isinstance(theme, dict) else None
+        self.custom_dir = _repo_path(custom_dir) if custom_dir else None
+        self.use_directory_urls = config.get("use_directory_urls", True)
+        self.snippet_options = markdown_extension_configs(config).get("pymdownx.snippets")
+        self.nav_pages = set(self._nav_paths(config.get("nav") or []))
+
+        plugins = plugin_configs(config)
+        options = plugins.get("blog", plugins.get("material/blog"))
+        self.blog = None
+        if options is not None:
+            blog = dict(BLOG_DEFAULTS, **options)
+            blog["post_dir"] = blog["post_dir"].format(blog=blog["blog_dir"]).strip("/") + "/"
+            blog["authors_file"] = f"{self.docs_prefix}/{blog['authors_file'].format(blog=blog['blog_dir'])}"
+            blog["post_slugify"] = _make_slugify(options.get("post_slugify"))
+            blog["categories_slugify"] = _make_slugify(options.get("categories_slugify"))
+            self.blog = blog
+
+    def _nav_paths(self, items):
+        for item in items:
+            if isinstance(item, dict):
+                yield from self._nav_paths(item.values())
+            elif isinstance(item, list):
+                yield from self._nav_paths(item)
+            elif isinstance(item, str) and "://" not in item:
+                yield posixpath.normpath(item)
+
+    def _load(self):
+        """Load the persisted graph; a different mkdocs.yml or graph version starts it over"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == GRAPH_VERSION and data.get("config") == self.config_sha:
+            self.previous = data.get("entries", {})
+
+    def _snippets_unchanged(self, entry):
+        for path, mtime in entry["snippets"]:
+            try:
+                current = os.stat(path).st_mtime_ns
+            except OSError:
+                current = None
+            if current != mtime:
+                return False
+        return True
+
+    def update(self):
+        """Rescan the documents whose content or snippet includes changed since the graph was saved"""
+        for doc in self.corpus:
+            entry = self.previous.get(doc.rel_path)
+            stat = os.stat(doc.path)
+            signature = [stat.st_size, stat.st_mtime_ns]
+
+            if entry and self._snippets_unchanged(entry):
+                if entry["stat"] == signature:
+                    self.entries[doc.rel_path] = entry
+                    self.hits += 1
+                    continue
+                if entry["sha"] == doc.sha:
+                    entry["stat"] = signature
+                    self.entries[doc.rel_path] = entry
+                    self._dirty = True
+                    self.hits += 1
+                    continue
+
+            self.entries[doc.rel_path] = self._scan(doc, signature)
+            self._dirty = True
+            self.misses += 1
+
+        if set(self.previous) - set(self.entries):
+            self._dirty = True
+        self._index()
+        return self
+
+    def _scan(self, doc, signature):
+        """Everything a document depends on that is known without building it"""
+        urls = [url for _, url in doc.markdown_links] + doc.html_links + [url for _, url in doc.images]
+        urls += [src for tag in doc.img_tags for src in IMG_SRC_RE.findall(tag)]
+        frontmatter = doc.frontmatter or {}
+        if isinstance(frontmatter.get("image"), str):
+            # Social card image, given relative to docs/
+            urls.append("/" + frontmatter["image"].lstrip("/"))
+
+        refs = set()
+        for url in urls:
+            if "://" in url or url.startswith(("mailto:", "javascript:", "#")):
+                continue
+            url_path, _ = LinkIndex.split_url(url)
+            target = LinkIndex.join(doc.rel_path, url_path) if url_path else None
+            if target:
+                refs.add(target)
+
+        snippets = []
+        if self.snippet_options is not None:
+            for _, path in resolve_snippets(doc.content, self.snippet_options):
+                if path is not None:
+                    snippets.append([_repo_path(path), os.stat(path).st_mtime_ns])
+
+        template = frontmatter.get("template")
+        is_post = self.blog is not None and doc.rel_path.startswith(self.blog["post_dir"])
+        return {
+            "sha": doc.sha,
+            "stat": signature,
+            "refs": sorted(refs),
+            "snippets": snippets,
+            "template": template if isinstance(template, str) else None,
+            "authors": bool(is_post and frontmatter.get("authors")),
+            "outputs": self._outputs(doc, frontmatter, is_post),
+            "views": self._views(frontmatter) if is_post else [],
+        }
+
+    def _url_outputs(self, url):
+        """Built files for a page URL path (no leading or trailing slash)"""
+        if self.use_directory_urls:
+            return [f"{url}/index.html" if url else "index.html"]
+        return [f"{url}.html"]
+
+    def _outputs(self, doc, frontmatter, is_post):
+        if is_post:
+            url = self._post_url(doc, frontmatter)
+            # Without a date the post URL is unknown; fall back to everything under the blog
+            return self._url_outputs(url) if url else [f"{self.blog['blog_dir']}/"]
+        stem, _ = posixpath.splitext(doc.rel_path)
+        directory, name = posixpath.split(stem)
+        if name in ("index", "README"):
+            return [posixpath.join(directory, "index.html")]
+        return self._url_outputs(stem)
+
+    def _post_url(self, doc, frontmatter):
+        """URL path of a blog post, as the blog plugin's _format_path_for_post builds it"""
+        blog = self.blog
+        date = _parse_date(frontmatter.get("date"))
+        if date is None:
+            return None
+        title = frontmatter.get("title") or next((text for level, text in doc.headings if level == 1), "")
+        categories = [blog["categories_slugify"](str(name), "-") for name in frontmatter.get("categories") or []]
+        path = blog["post_url_format"].format(
+            date=_format_date(date, blog["post_url_date_format"]),
+            slug=frontmatter.get("slug") or blog["post_slugify"](str(title), "-"),
+            categories="/".join(categories),
+            file=posixpath.splitext(posixpath.basename(doc.rel_path))[0],
+        )
+        return posixpath.normpath(f"{blog['blog_dir']}/{path.strip('/')}")
+
+    def _views(self, frontmatter):
+        """Outputs of the index, archive and category pages that list a post's excerpt"""
+        blog = self.blog
+        blog_dir = blog["blog_dir"]
+        pagination = blog["pagination_url_format"].split("{page}", 1)[0]
+        views = [f"{blog_dir}/index.html", f"{blog_dir}/{pagination}"]
+        prefixes = []
+        date = _parse_date(frontmatter.get("date"))
+        if blog["archive"] and date is not None:
+            prefixes.append(blog["archive_url_format"].format(date=_format_date(date, blog["archive_url_date_format"])))
+        if blog["categories"]:
+            for name in frontmatter.get("categories") or []:
+                slug = blog["categories_slugify"](str(name), "-")
+                prefixes.append(blog["categories_url_format"].format(slug=slug))
+        for prefix in prefixes:
+            prefix = f"{blog_dir}/{prefix.strip('/')}"
+            views += [f"{prefix}/"] if self.use_directory_urls else [f"{prefix}.html", f"{prefix}/"]
+        return views
+
+    def _index(self):
+        """Invert the per-page dependencies into source path -> dependent pages"""
+        self.dependents = defaultdict(set)
+        link_index = LinkIndex.from_corpus(self.corpus)
+        for rel_path, entry in self.entries.items():
+            self.dependents[f"{self.docs_prefix}/{rel_path}"].add(rel_path)
+            for ref in entry["refs"]:
+                # The link as written, so creating a missing target also counts
+                self.dependents[f"{self.docs_prefix}/{ref}"].add(rel_path)
+                resolved = link_index.resolve(ref)
+                if resolved and resolved != ref:
+                    self.dependents[f"{self.docs_prefix}/{resolved}"].add(rel_path)
+            for path, _ in entry["snippets"]:
+                self.dependents[path].add(rel_path)
+            if entry["template"] and self.custom_dir:
+                self.dependents[f"{self.custom_dir}/{entry['template']}"].add(rel_path)
+            if entry["authors"]:
+                self.dependents[self.blog["authors_file"]].add(rel_path)
+
+    def edge_count(self):
+        return sum(len(pages) for pages in self.dependents.values())
+
+    def affected(self, changed, added=()):
+        """Impact of changing the given paths; added (from git) and deleted pages change the page list"""
+        changed = {_repo_path(path) for path in changed}
+        added = {_repo_path(path) for path in added}
+        impact = Impact(changed)
+        for path in sorted(changed):
+            if path == self.config_file or path.startswith(TOOLING_PATHS):
+                # nav, plugins, theme or markdown_extensions may have changed
+                impact.whole_site = True
+                impact.reasons.append(path)
+                continue
+
+            pages = self.dependents.get(path, set())
+            if self.custom_dir and (path + "/").startswith(self.custom_dir + "/"):
+                if not pages:
+                    # main.html and partials are part of every page
+                    impact.whole_site = True
+                    impact.reasons.append(path)
+                impact.pages.update(pages)
+                continue
+
+            impact.pages.update(pages)
+            if not (path + "/").startswith(self.docs_prefix + "/"):
+                continue
+            rel_path = path[len(self.docs_prefix) + 1:]
+            if not rel_path.endswith(".md"):
+                # Site size, compression and image variants cover every static file
+                impact.site_checks.add("assets")
+                continue
+            # Not whether the saved graph knew the page: with no saved graph (as in CI) every page would count
+            if rel_path not in self.entries or path in added:
+                # Removed or added: the page list itself changed, and checkers looking for it should say so
+                impact.site_checks.update({"nav", "sitemap"})
+                impact.pages.add(rel_path)
+            if rel_path in self.nav_pages:
+                impact.site_checks.add("nav")
+
+        for rel_path in impact.pages:
+            entry = self.entries.get(rel_path) or self.previous.get(rel_path)
+            if entry:
+                impact.outputs.update(entry["outputs"])
+                impact.outputs.update(entry["views"])
+        return impact
+
+    def save(self):
+        """Write the graph back to disk if anything changed"""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": GRAPH_VERSION, "config": self.config_sha, "entries": self.entries}, f)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+
+def _git(*args):
+    result = subprocess.run(["git", *args], capture_output=True, text=True, check=True)
+    return result.stdout
+
+
+def changed_since(ref):
+    """(changed, added) paths between the merge base of ref and HEAD and the working tree, untracked files included"""
+    base = _git("merge-base", ref, "HEAD").strip()
+    top = _git("rev-parse", "--show-toplevel").strip()
+    # Without rename detection a move shows up as a deletion plus an addition, so both paths count
+    fields = _git("diff", "--name-status", "--no-renames", "-z", base).split("\0")
+    changed, added = set(), set()
+    for status, path in zip(fields[0::2], fields[1::2]):
+        path = os.path.join(top, path)
+        changed.add(path)
+        if status == "A":
+            added.add(path)
+    for path in _git("ls-files", "--others", "--exclude-standard", "-z", top).split("\0"):
+        if path:
+            changed.add(os.path.abspath(path))
+            added.add(os.path.abspath(path))
+    return changed, added
+
+
+def add_arguments(parser):
+    """Add --changed and --changed-since to a checker's argument parser"""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--changed", nargs="+", metavar="PATH",
+                       help="Only check what these files affect, according to the dependency graph")
+    group.add_argument("--changed-since", metavar="REF",
+                       help="Only check what changed since the merge base with a git ref, e.g. origin/main")
+
+
+def from_arguments(args, docs_dir="docs", config_file="mkdocs.yml"):
+    """Impact of --changed or --changed-since, or None to check everything"""
+    added = ()
+    if args.changed_since:
+        try:
+            changed, added = changed_since(args.changed_since)
+        except (OSError, subprocess.CalledProcessError) as e:
+            detail = getattr(e, "stderr", None) or e
+            print(f"⚠️  Could not diff against {args.changed_since} ({str(detail).strip()}); checking everything")
+            return None
+        print(f"🔀 {len(changed)} files changed since {args.changed_since}")
+    elif args.changed:
+        changed = args.changed
+    else:
+        return None
+    graph = DependencyGraph(docs_dir, config_file).update()
+    graph.save()
+    impact = graph.affected(changed, added)
+    print(f"🎯 {impact.summary()}")
+    return impact
@@ -46,4 +46,9 @@ echo 🌐 Starting development server at http://127.0.0.1:8000
 echo 📝 Press Ctrl+C to stop the server
 echo.
 
-mkdocs serve --dev-addr=127.0.0.1:8000
\ No newline at end of file
+REM --incremental re-renders only the pages a saved file affects
+if "%1"=="--incremental" (
+    python scripts\incremental-serve.py --dev-addr=127.0.0.1:8000
+) else (
+    mkdocs serve --dev-addr=127.0.0.1:8000
+)
\ No newline at end of file
@@ -45,4 +45,9 @@ echo "🌐 Starting development server at http://127.0.0.1:8000"
 echo "📝 Press Ctrl+C to stop the server"
 echo ""
 
-mkdocs serve --dev-addr=127.0.0.1:8000
\ No newline at end of file
+# --incremental re-renders only the pages a saved file affects
+if [ "$1" = "--incremental" ]; then
+    python scripts/incremental-serve.py --dev-addr=127.0.0.1:8000
+else
+    mkdocs serve --dev-addr=127.0.0.1:8000
+fi
\ No newline at end of file
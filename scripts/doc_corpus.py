@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Shared Document Corpus
+Loads every file under docs/ once and exposes parsed views to all checkers
+"""
+
+import hashlib
+import os
+import re
+from functools import cached_property
+from pathlib import Path
+
+import yaml
+
+# Patterns shared by every checker that scans Markdown sources
+FENCED_CODE_RE = re.compile(r'```.*?```', re.DOTALL)
+INLINE_CODE_RE = re.compile(r'`[^`]*`')
+TEMPLATE_RE = re.compile(r'\{\{[^}]*\}\}')
+MARKDOWN_LINK_RE = re.compile(r'\[([^\]]*)\]\(([^)]+)\)')
+MARKDOWN_IMAGE_RE = re.compile(r'!\[([^\]]*)\]\(([^)]+)\)')
+HTML_HREF_RE = re.compile(r'href=["\']([^"\']+)["\']')
+HTML_IMG_RE = re.compile(r'<img[^>]*>', re.IGNORECASE)
+HTML_A_RE = re.compile(r'<a[^>]*>', re.IGNORECASE)
+ARIA_LABEL_RE = re.compile(r'aria-label=["\']([^"\']+)["\']')
+HTML_ID_RE = re.compile(r'<[^>]+\s(?:id|name)=["\']([^"\']+)["\']', re.IGNORECASE)
+HEADING_RE = re.compile(r'^(#{1,6})[ \t]+(.+?)[ \t#]*$', re.MULTILINE)
+
+
+class Document:
+    """A single Markdown source file with lazily computed, cached views"""
+
+    # Derived views that are small enough to persist between runs
+    CACHEABLE_VIEWS = (
+        'has_frontmatter', 'frontmatter_text', '_parsed_frontmatter',
+        'markdown_links', 'html_links', 'images', 'img_tags', 'anchor_tags',
+        'aria_labels', 'headings', 'html_ids',
+    )
+
+    def __init__(self, path, docs_dir, content=None):
+        self.path = Path(path)
+        self.docs_dir = Path(docs_dir)
+        self.rel_path = self.path.relative_to(self.docs_dir).as_posix()
+        self.name = self.path.name
+        if content is not None:
+            self.__dict__['content'] = content
+
+    def __repr__(self):
+        return f"Document({self.rel_path!r})"
+
+    @cached_property
+    def content(self):
+        """Raw file content, read on first access"""
+        with open(self.path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    @cached_property
+    def sha(self):
+        """SHA-256 of the content, used as the cache key"""
+        return hashlib.sha256(self.content.encode('utf-8')).hexdigest()
+
+    @cached_property
+    def _split(self):
+        """Split content into (frontmatter_text, body); frontmatter_text is None if absent"""
+        content = self.content
+        if content.startswith('---'):
+            frontmatter_end = content.find('---', 3)
+            if frontmatter_end > 0:
+                return content[3:frontmatter_end], content[frontmatter_end + 3:]
+        return None, content
+
+    @cached_property
+    def has_frontmatter(self):
+        return self.content.startswith('---')
+
+    @cached_property
+    def frontmatter_text(self):
+        return self._split[0]
+
+    @property
+    def body(self):
+        return self._split[1]
+
+    @cached_property
+    def _parsed_frontmatter(self):
+        """Parse the YAML frontmatter once, returning (data, error)"""
+        if self.frontmatter_text is None:
+            return None, None
+        try:
+            return yaml.safe_load(self.frontmatter_text) or {}, None
+        except Exception as e:
+            return None, str(e)
+
+    @property
+    def frontmatter(self):
+        """Parsed frontmatter dict, or None if missing or invalid"""
+        return self._parsed_frontmatter[0]
+
+    @property
+    def frontmatter_error(self):
+        return self._parsed_frontmatter[1]
+
+    @cached_property
+    def code_stripped(self):
+        """Content with code blocks, inline code and template syntax removed"""
+        content = FENCED_CODE_RE.sub('', self.content)
+        content = INLINE_CODE_RE.sub('', content)
+        return TEMPLATE_RE.sub('', content)
+
+    @cached_property
+    def markdown_links(self):
+        """List of (text, url) for every [text](url) outside code"""
+        return MARKDOWN_LINK_RE.findall(self.code_stripped)
+
+    @cached_property
+    def html_links(self):
+        """List of href values outside code"""
+        return HTML_HREF_RE.findall(self.code_stripped)
+
+    @cached_property
+    def images(self):
+        """List of (alt, url) for every Markdown image outside code"""
+        return MARKDOWN_IMAGE_RE.findall(self.code_stripped)
+
+    @cached_property
+    def img_tags(self):
+        """Raw <img> tags in the content"""
+        return HTML_IMG_RE.findall(self.content)
+
+    @cached_property
+    def anchor_tags(self):
+        """Raw <a> tags in the content"""
+        return HTML_A_RE.findall(self.content)
+
+    @cached_property
+    def aria_labels(self):
+        return ARIA_LABEL_RE.findall(self.content)
+
+    @cached_property
+    def headings(self):
+        """List of (level, text) for every ATX heading outside fenced code"""
+        body = FENCED_CODE_RE.sub('', self.body)
+        return [(len(hashes), text) for hashes, text in HEADING_RE.findall(body)]
+
+    @cached_property
+    def html_ids(self):
+        """id/name attributes of raw HTML elements outside code, usable as link anchors"""
+        return HTML_ID_RE.findall(self.code_stripped)
+
+    def cached_views(self):
+        """Return the cacheable views as a JSON-serialisable dict"""
+        return {name: getattr(self, name) for name in self.CACHEABLE_VIEWS}
+
+    def prime(self, sha, views):
+        """Populate views from a cache entry so the file need not be read"""
+        self.__dict__['sha'] = sha
+        for name in self.CACHEABLE_VIEWS:
+            if name not in views:
+                continue
+            value = views[name]
+            if name == '_parsed_frontmatter':
+                value = tuple(value)
+            elif name in ('markdown_links', 'images', 'headings'):
+                value = [tuple(item) for item in value]
+            self.__dict__[name] = value
+
+    def update(self, content):
+        """Replace the content (e.g. after a rewrite) and drop derived views"""
+        for key in list(self.__dict__):
+            if key not in ('path', 'docs_dir', 'rel_path', 'name'):
+                del self.__dict__[key]
+        self.__dict__['content'] = content
+
+
+class DocumentCorpus:
+    """All files under docs/, walked once, with Markdown files as Documents"""
+
+    def __init__(self, docs_dir="docs"):
+        self.docs_dir = Path(docs_dir)
+        self.documents = {}
+        self.files = set()
+        self._load()
+
+    def _load(self):
+        """Walk docs/ a single time, recording every file and wrapping Markdown sources"""
+        if not self.docs_dir.exists():
+            return
+        root = str(self.docs_dir)
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames.sort()
+            rel_dir = os.path.relpath(dirpath, root)
+            for filename in sorted(filenames):
+                rel_path = filename if rel_dir == '.' else f"{rel_dir}/{filename}"
+                rel_path = rel_path.replace(os.sep, '/')
+                self.files.add(rel_path)
+                if filename.endswith('.md'):
+                    self.documents[rel_path] = Document(Path(dirpath) / filename, self.docs_dir)
+
+    @cached_property
+    def fingerprint(self):
+        """Hash of the set of existing files; changes when files are added or removed"""
+        digest = hashlib.sha256()
+        for rel_path in sorted(self.files):
+            digest.update(rel_path.encode('utf-8') + b'\0')
+        return digest.hexdigest()
+
+    def __iter__(self):
+        return iter(self.documents.values())
+
+    def __len__(self):
+        return len(self.documents)
+
+    def __contains__(self, rel_path):
+        return rel_path in self.documents
+
+    def get(self, rel_path):
+        """Return the Document for a docs-relative path, or None"""
+        return self.documents.get(Path(rel_path).as_posix())
+
+    def under(self, prefix, recursive=True):
+        """Documents whose docs-relative path lives under prefix"""
+        prefix = prefix.strip('/') + '/'
+        docs = []
+        for rel_path, doc in self.documents.items():
+            if not rel_path.startswith(prefix):
+                continue
+            if recursive or '/' not in rel_path[len(prefix):]:
+                docs.append(doc)
+        return docs
+
+    def files_under(self, prefix):
+        """Non-Markdown and Markdown file paths under prefix"""
+        prefix = prefix.strip('/') + '/'
+        return sorted(f for f in self.files if f.startswith(prefix))
+
+
+_corpora = {}
+
+
+def get_corpus(docs_dir="docs"):
+    """Return the shared corpus for docs_dir, loading it on first use"""
+    key = os.path.abspath(docs_dir)
+    if key not in _corpora:
+        _corpora[key] = DocumentCorpus(docs_dir)
+    return _corpora[key]
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Heading ID Index
+Computes the anchor IDs every page exposes, using the slugify rules configured in mkdocs.yml
+"""
+
+import html
+import re
+import unicodedata
+
+from mkdocs_config import PythonTag, markdown_extension_configs
+
+ATTR_LIST_RE = re.compile(r'\s*\{:?([^}]*)\}\s*$')
+ATTR_ID_RE = re.compile(r'(?:^|\s)#([\w\-:.]+)')
+INLINE_LINK_RE = re.compile(r'!?\[([^\]]*)\]\([^)]*\)')
+EMPHASIS_RE = re.compile(r'(\*{1,3}|_{1,3}|~~)(.+?)\1')
+TAG_RE = re.compile(r'</?[^>]*>')
+IDCOUNT_RE = re.compile(r'^(.*)_([0-9]+)$')
+
+
+def toc_slugify(value, separator='-', unicode=False):
+    """Python-Markdown's default toc slugify"""
+    if not unicode:
+        value = unicodedata.normalize('NFKD', value)
+        value = value.encode('ascii', 'ignore').decode('ascii')
+    value = re.sub(r'[^\w\s-]', '', value).strip().lower()
+    return re.sub(r'[{}\s]+'.format(separator), separator, value)
+
+
+def pymdownx_slugify(case='none', percent_encode=False, normalize='NFC'):
+    """Equivalent of pymdownx.slugs.slugify(**kwds), returning a slugify(text, sep) callable"""
+    from urllib.parse import quote
+
+    def slugify(text, sep='-'):
+        text = TAG_RE.sub('', html.unescape(text))
+        if case == 'lower':
+            text = text.lower()
+        elif case == 'lower-ascii':
+            text = re.sub(r'[A-Z]+', lambda m: m.group(0).lower(), text)
+        elif case == 'fold':
+            text = text.casefold()
+        slug = re.sub(r'[^\w\- ]', '', unicodedata.normalize(normalize, text).strip())
+        slug = slug.replace(' ', sep)
+        return quote(slug.encode('utf-8')) if percent_encode else slug
+
+    return slugify
+
+
+def slugify_from_config(config):
+    """Pick the heading slugify function the toc extension is configured with"""
+    toc = markdown_extension_configs(config).get('toc', {})
+    separator = toc.get('separator', '-')
+    slugify = toc.get('slugify')
+
+    if isinstance(slugify, PythonTag):
+        if slugify.target.startswith('pymdownx.slugs.'):
+            kwds = dict(slugify['kwds'])
+            if slugify.target.endswith('uslugify'):
+                kwds.setdefault('case', 'none')
+            func = pymdownx_slugify(**kwds)
+            return lambda text: func(text, separator)
+        if slugify.target.endswith('slugify_unicode'):
+            return lambda text: toc_slugify(text, separator, unicode=True)
+
+    return lambda text: toc_slugify(text, separator)
+
+
+def heading_text(raw):
+    """Reduce a Markdown heading to the plain text toc slugifies, plus any explicit {#id}"""
+    explicit_id = None
+    match = ATTR_LIST_RE.search(raw)
+    if match:
+        id_match = ATTR_ID_RE.search(match.group(1))
+        if id_match:
+            explicit_id = id_match.group(1)
+        raw = raw[:match.start()]
+    text = INLINE_LINK_RE.sub(r'\1', raw)
+    text = text.replace('`', '')
+    text = EMPHASIS_RE.sub(r'\2', text)
+    text = TAG_RE.sub('', text)
+    return html.unescape(text).strip(), explicit_id
+
+
+def unique(anchor_id, ids):
+    """Python-Markdown's toc de-duplication: foo, foo_1, foo_2, ..."""
+    while anchor_id in ids or not anchor_id:
+        match = IDCOUNT_RE.match(anchor_id)
+        if match:
+            anchor_id = '%s_%d' % (match.group(1), int(match.group(2)) + 1)
+        else:
+            anchor_id = '%s_%d' % (anchor_id, 1)
+    ids.add(anchor_id)
+    return anchor_id
+
+
+def page_anchor_ids(doc, slugify):
+    """All anchor IDs one document exposes: heading slugs plus explicit HTML ids"""
+    ids = set()
+    for _, raw in doc.headings:
+        text, explicit_id = heading_text(raw)
+        if explicit_id:
+            ids.add(explicit_id)
+        else:
+            unique(slugify(text), ids)
+    ids.update(doc.html_ids)
+    return ids
+
+
+class HeadingIndex:
+    """Per-page anchor sets built in one pass over the corpus"""
+
+    def __init__(self, corpus, config):
+        slugify = slugify_from_config(config)
+        self.anchors = {doc.rel_path: page_anchor_ids(doc, slugify) for doc in corpus}
+
+    def has_anchor(self, rel_path, fragment):
+        """True if rel_path is a known page exposing fragment (or not a Markdown page at all)"""
+        anchors = self.anchors.get(rel_path)
+        if anchors is None:
+            return True
+        return fragment in anchors
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Single-Pass HTML Rewriter
+Applies every tag rewrite rule in one left-to-right pass and writes files only when bytes change
+"""
+
+import io
+import os
+import re
+from collections import Counter, namedtuple
+from pathlib import Path
+
+# Regions copied through untouched, tried before the tag alternative
+MARKDOWN_SKIP = (
+    r'(?P<fence>^[ \t]*(?P<mark>`{3,}|~{3,})[^\n]*\n.*?^[ \t]*(?P=mark)[ \t]*$)',
+    r'(?P<code>(?P<ticks>`+)[^\n]+?(?P=ticks))',
+)
+HTML_SKIP = (
+    r'(?P<comment><!--.*?-->)',
+    r'(?P<raw>(?P<raw_open><(?P<raw_name>script|style|pre|textarea)\b[^>]*>).*?</(?P=raw_name)\s*>)',
+)
+ATTR_RE = re.compile(r'''([^\s"'<>/=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+)))?''')
+EXTERNAL_URL_RE = re.compile(r'https?://', re.IGNORECASE)
+
+RewriteRule = namedtuple('RewriteRule', 'name tags apply')
+
+
+class Tag:
+    """One start tag whose attributes rules can read and set"""
+
+    def __init__(self, name, raw):
+        self.name = name
+        self.raw = raw
+        self.before = ''
+        self.after = ''
+        self.changed = False
+        self.removed = False
+        self._parse()
+
+    def _parse(self):
+        # Attribute spans are relative to raw; skip the '<name' prefix
+        self.attrs = {}
+        body_end = len(self.raw) - (2 if self.raw.endswith('/>') else 1)
+        for match in ATTR_RE.finditer(self.raw, 1 + len(self.name), body_end):
+            value = next((v for v in match.groups()[1:] if v is not None), None)
+            self.attrs.setdefault(match.group(1).lower(), (value, match.start(), match.end()))
+        self._insert_at = body_end
+
+    def get(self, name, default=None):
+        attr = self.attrs.get(name)
+        if attr is None:
+            return default
+        return attr[0] if attr[0] is not None else ''
+
+    def has(self, name):
+        return name in self.attrs
+
+    def set(self, name, value):
+        """Set an attribute, replacing it in place or appending it before the closing '>'"""
+        rendered = f'{name}="{value}"'
+        attr = self.attrs.get(name)
+        if attr is not None:
+            start, end = attr[1], attr[2]
+            self.raw = self.raw[:start] + rendered + self.raw[end:]
+        else:
+            body = self.raw[:self._insert_at]
+            head = body.rstrip()
+            self.raw = f'{head} {rendered}{body[len(head):]}{self.raw[self._insert_at:]}'
+        self.changed = True
+        self._parse()
+
+    def wrap(self, before, after):
+        """Emit markup around the tag, e.g. an opening <picture> and its <source> elements"""
+        self.before = before + self.before
+        self.after = self.after + after
+        self.changed = True
+
+    def remove(self):
+        """Drop the tag; for raw-text elements such as <script> this drops the whole element"""
+        self.removed = True
+        self.changed = True
+
+
+def external_link_rel(tag, state):
+    """rel="noopener noreferrer" on links to other origins"""
+    if not EXTERNAL_URL_RE.match(tag.get('href', '')):
+        return False
+    rel = tag.get('rel', '').split()
+    if 'noopener' in (token.lower() for token in rel):
+        return False
+    missing = [token for token in ('noopener', 'noreferrer') if token not in rel]
+    tag.set('rel', ' '.join(rel + missing))
+    return True
+
+
+def lazy_loading(tag, state):
+    """loading="lazy" on every image except the first one in the file, which is likely above the fold"""
+    state['images'] = state.get('images', 0) + 1
+    if state['images'] == 1 or tag.has('loading') or tag.get('fetchpriority', '').lower() == 'high':
+        return False
+    tag.set('loading', 'lazy')
+    return True
+
+
+def async_decoding(tag, state):
+    """decoding="async" so image decode does not block the main thread"""
+    if tag.has('decoding'):
+        return False
+    tag.set('decoding', 'async')
+    return True
+
+
+DEFAULT_RULES = (
+    RewriteRule('rel', ('a',), external_link_rel),
+    RewriteRule('loading', ('img',), lazy_loading),
+    RewriteRule('decoding', ('img',), async_decoding),
+)
+
+
+class HTMLRewriter:
+    """Rewrites the start tags the rules care about through one combined compiled pattern"""
+
+    def __init__(self, rules=DEFAULT_RULES, markdown=True):
+        self.rules = rules
+        self.rules_by_tag = {}
+        for rule in rules:
+            for tag_name in rule.tags:
+                self.rules_by_tag.setdefault(tag_name, []).append(rule)
+
+        tag_names = '|'.join(re.escape(name) for name in sorted(self.rules_by_tag))
+        alternatives = (MARKDOWN_SKIP if markdown else ()) + HTML_SKIP
+        alternatives += (rf'(?P<tag><(?P<name>{tag_names})\b[^>]*>)',)
+        self.pattern = re.compile('|'.join(alternatives), re.IGNORECASE | re.MULTILINE | re.DOTALL)
+
+    def rewrite(self, text, state=None):
+        """Return (new_text, Counter of rule name -> tags changed); state is shared by the rules for one file"""
+        counts = Counter()
+        state = {} if state is None else state
+        out = io.StringIO()
+        pos = 0
+        for match in self.pattern.finditer(text):
+            if match.group('tag') is not None:
+                group = 'tag'
+                tag = Tag(match.group('name').lower(), match.group('tag'))
+            elif match.group('raw_open') is not None and match.group('raw_name').lower() in self.rules_by_tag:
+                # Rules may rewrite the start tag of a raw-text element, never its contents
+                group = 'raw_open'
+                tag = Tag(match.group('raw_name').lower(), match.group('raw_open'))
+            else:
+                continue
+            for rule in self.rules_by_tag[tag.name]:
+                if rule.apply(tag, state):
+                    counts[rule.name] += 1
+            if tag.changed:
+                span = 'raw' if tag.removed and group == 'raw_open' else group
+                out.write(text[pos:match.start(span)])
+                out.write(tag.before)
+                if not tag.removed:
+                    out.write(tag.raw)
+                out.write(tag.after)
+                pos = match.end(span)
+        if not counts:
+            return text, counts
+        out.write(text[pos:])
+        return out.getvalue(), counts
+
+    def rewrite_file(self, path, text=None, state=None):
+        """Rewrite one file in place; returns (new_text, counts) and writes only if it changed"""
+        path = Path(path)
+        if text is None:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        new_text, counts = self.rewrite(text, state)
+        if new_text != text:
+            write_atomic(path, new_text)
+        return new_text, counts
+
+
+def write_atomic(path, text, encoding="utf-8"):
+    """Write via a temporary file and os.replace so readers never see a partial file"""
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "w", encoding=encoding, newline="") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
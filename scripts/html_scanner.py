@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Streaming HTML Scanner
+Collects the facts every production check needs in a single html.parser pass
+"""
+
+import re
+from html.parser import HTMLParser
+
+CHUNK_SIZE = 64 * 1024
+SKIP_LINK_RE = re.compile(r'skip.*content|skip.*main', re.IGNORECASE)
+HEADING_TAGS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+# hrefs the link check never resolves, so they are not kept
+EXTERNAL_HREF_PREFIXES = ('http', 'mailto:', 'javascript:')
+
+
+class PageFacts:
+    """Everything the production checks query about one generated page"""
+
+    def __init__(self, path):
+        self.path = path
+        self.has_doctype = False
+        self.has_html = False
+        self.has_head = False
+        self.has_body = False
+        self.has_viewport = False
+        self.title = ""
+        self.has_meta_description = False
+        self.og_tags = 0
+        self.has_structured_data = False
+        self.heading_levels = []
+        self.images = 0
+        self.images_without_alt = 0
+        self.aria_labels = 0
+        self.has_skip_link = False
+        self.has_csp = False
+        self.has_x_frame_options = False
+        self.scripts = []
+        # Distinct internal hrefs: a link-heavy page repeats the same nav and footer targets many times
+        self.hrefs = set()
+        self.ids = set()
+        self.external_links = 0
+        self.unsafe_external_links = 0
+        self.error = None
+
+
+class _FactCollector(HTMLParser):
+    """Event handlers that fill a PageFacts without keeping the document in memory"""
+
+    def __init__(self, facts):
+        super().__init__(convert_charrefs=True)
+        self.facts = facts
+        self._in_title = False
+        self._title_parts = []
+
+    def handle_decl(self, decl):
+        if decl.lower().startswith('doctype html'):
+            self.facts.has_doctype = True
+
+    def handle_starttag(self, tag, attrs):
+        facts = self.facts
+        attrs = {name: (value or '') for name, value in attrs}
+
+        if tag == 'html':
+            facts.has_html = True
+        elif tag == 'head':
+            facts.has_head = True
+        elif tag == 'body':
+            facts.has_body = True
+        elif tag == 'title':
+            self._in_title = True
+        elif tag == 'meta':
+            name = attrs.get('name', '').lower()
+            http_equiv = attrs.get('http-equiv', '').lower()
+            if name == 'viewport':
+                facts.has_viewport = True
+            elif name == 'description':
+                facts.has_meta_description = True
+            if attrs.get('property', '').lower().startswith('og:'):
+                facts.og_tags += 1
+            if http_equiv == 'content-security-policy':
+                facts.has_csp = True
+            elif http_equiv == 'x-frame-options':
+                facts.has_x_frame_options = True
+        elif tag == 'script':
+            if attrs.get('type', '').lower() == 'application/ld+json':
+                facts.has_structured_data = True
+            if attrs.get('src'):
+                facts.scripts.append((attrs['src'], 'defer' in attrs or 'async' in attrs))
+        elif tag in HEADING_TAGS:
+            facts.heading_levels.append(HEADING_TAGS[tag])
+        elif tag == 'img':
+            facts.images += 1
+            if 'alt' not in attrs:
+                facts.images_without_alt += 1
+
+        if attrs.get('id'):
+            facts.ids.add(attrs['id'])
+        if tag == 'a' and attrs.get('name'):
+            facts.ids.add(attrs['name'])
+
+        if 'aria-label' in attrs and attrs['aria-label']:
+            facts.aria_labels += 1
+        if 'skip' in attrs.get('class', '').lower():
+            facts.has_skip_link = True
+
+        href = attrs.get('href')
+        if href:
+            if not href.startswith(EXTERNAL_HREF_PREFIXES):
+                facts.hrefs.add(href)
+            if tag == 'a' and href.lower().startswith(('http://', 'https://')):
+                facts.external_links += 1
+                if 'noopener' not in attrs.get('rel', '').lower():
+                    facts.unsafe_external_links += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag == 'title' and self._in_title:
+            self._in_title = False
+            self.facts.title = ''.join(self._title_parts).strip()
+
+    def handle_data(self, data):
+        if self._in_title:
+            self._title_parts.append(data)
+        if not self.facts.has_skip_link and SKIP_LINK_RE.search(data):
+            self.facts.has_skip_link = True
+
+
+def scan_html(path, chunk_size=CHUNK_SIZE):
+    """Scan one HTML file in fixed-size chunks and return its PageFacts"""
+    facts = PageFacts(path)
+    collector = _FactCollector(facts)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for chunk in iter(lambda: f.read(chunk_size), ""):
+                collector.feed(chunk)
+        collector.close()
+    except Exception as e:
+        facts.error = str(e)
+    return facts
+
+
+def scan_many(paths, chunk_size=CHUNK_SIZE):
+    """Scan a batch of pages; used as the unit of work for worker pools"""
+    return [scan_html(path, chunk_size) for path in paths]
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Responsive Image Pipeline
+Encodes resized WebP/AVIF/JPEG variants and SVG raster fallbacks, caching every output by source hash
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+try:
+    # Pillow < 11.2 only encodes AVIF through this plugin
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+try:
+    import cairosvg
+except (ImportError, OSError):
+    # cairosvg raises OSError when the cairo system library is missing
+    cairosvg = None
+
+CACHE_DIR = Path(".cache/images")
+PIPELINE_VERSION = 1
+WIDTHS = (320, 640, 960, 1280)
+FORMATS = ("avif", "webp", "jpeg")
+QUALITY = {"avif": 50, "webp": 80, "jpeg": 82, "png": None}
+EXTENSIONS = {"avif": ".avif", "webp": ".webp", "jpeg": ".jpg", "png": ".png"}
+RASTER_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+EXIF_ORIENTATION = 0x0112
+SVG_TAG_RE = re.compile(r'<svg\b[^>]*>', re.IGNORECASE)
+SVG_WIDTH_RE = re.compile(r'\swidth=["\']([\d.]+)(?:px)?["\']')
+SVG_HEIGHT_RE = re.compile(r'\sheight=["\']([\d.]+)(?:px)?["\']')
+SVG_VIEWBOX_RE = re.compile(r'\sviewBox=["\'][\d.\-]+[ ,]+[\d.\-]+[ ,]+([\d.]+)[ ,]+([\d.]+)', re.IGNORECASE)
+
+
+def missing_dependencies():
+    """Names of the optional packages that are not importable"""
+    missing = []
+    if Image is None:
+        missing.append("pillow")
+    if cairosvg is None:
+        missing.append("cairosvg")
+    return missing
+
+
+def available_formats(formats=FORMATS):
+    """The requested output formats this Pillow build can encode"""
+    if Image is None:
+        return ()
+    extensions = Image.registered_extensions()
+    return tuple(fmt for fmt in formats if EXTENSIONS[fmt] in extensions)
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _svg_size(path):
+    """Intrinsic (width, height) of an SVG from its width/height attributes or viewBox, if declared"""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        tag = SVG_TAG_RE.search(f.read(4096))
+    if not tag:
+        return None
+    width, height = SVG_WIDTH_RE.search(tag.group(0)), SVG_HEIGHT_RE.search(tag.group(0))
+    if width and height:
+        return round(float(width.group(1))), round(float(height.group(1)))
+    viewbox = SVG_VIEWBOX_RE.search(tag.group(0))
+    if viewbox:
+        return round(float(viewbox.group(1))), round(float(viewbox.group(2)))
+    return None
+
+
+def source_size(path):
+    """Displayed (width, height) of an image file, or None if it cannot be determined"""
+    path = Path(path)
+    if path.suffix.lower() != ".svg" and Image is None:
+        return None
+    try:
+        if path.suffix.lower() == ".svg":
+            return _svg_size(path)
+        with Image.open(path) as image:
+            # EXIF orientations 5-8 are rotated 90 degrees, so width and height swap
+            if image.getexif().get(EXIF_ORIENTATION, 1) in (5, 6, 7, 8):
+                return image.height, image.width
+            return image.size
+    except OSError:
+        return None
+
+
+def _target_widths(source_width, widths, max_scale=1):
+    """Requested widths that do not upscale past source_width * max_scale, plus the capped full size"""
+    limit = source_width * max_scale
+    targets = {width for width in widths if width < limit}
+    targets.add(int(min(limit, max(widths))))
+    return sorted(targets)
+
+
+class ImageTask:
+    """One output variant: a source file encoded at one width in one format"""
+
+    def __init__(self, source, sha, width, fmt, quality):
+        self.source = Path(source)
+        self.sha = sha
+        self.width = width
+        self.format = fmt
+        self.quality = quality
+
+    @property
+    def key(self):
+        """Cache key from the source hash and every encoding parameter"""
+        params = json.dumps([PIPELINE_VERSION, self.sha, self.width, self.format, self.quality])
+        return hashlib.sha256(params.encode("utf-8")).hexdigest()[:24]
+
+    def output_name(self, image_dir):
+        """Variant path relative to the output directory, mirroring the source's subdirectory"""
+        rel_parent = self.source.parent.relative_to(image_dir).as_posix()
+        name = f"{self.source.stem}-{self.width}w{EXTENSIONS[self.format]}"
+        return name if rel_parent == "." else f"{rel_parent}/{name}"
+
+
+def _encode(task, cache_dir):
+    """Worker: encode one variant into the cache; returns (key, width, height, bytes)"""
+    cache_path = Path(cache_dir) / f"{task.key}{EXTENSIONS[task.format]}"
+
+    if task.source.suffix.lower() == ".svg":
+        png = cairosvg.svg2png(url=str(task.source), output_width=task.width)
+        image = Image.open(io.BytesIO(png)) if Image else None
+    else:
+        image = ImageOps.exif_transpose(Image.open(task.source))
+
+    if image is not None:
+        if image.width != task.width:
+            height = max(1, round(image.height * task.width / image.width))
+            image = image.resize((task.width, height), Image.Resampling.LANCZOS)
+        if task.format == "jpeg" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        # Only the ICC profile is carried over; EXIF, XMP and comments are dropped
+        options = {"icc_profile": image.info.get("icc_profile")}
+        if task.quality is not None:
+            options["quality"] = task.quality
+        if task.format == "jpeg":
+            options.update(optimize=True, progressive=True)
+        elif task.format == "png":
+            options["optimize"] = True
+        buffer = io.BytesIO()
+        image.save(buffer, format=task.format.upper(), **options)
+        data = buffer.getvalue()
+        size = image.size
+    else:
+        data = png
+        size = (task.width, None)
+
+    tmp_path = cache_path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, cache_path)
+    return task.key, size[0], size[1], len(data)
+
+
+class ImagePipeline:
+    """Builds responsive variants for every image under a directory"""
+
+    def __init__(self, image_dir, output_dir=None, widths=WIDTHS, formats=FORMATS,
+                 cache_dir=CACHE_DIR, jobs=None):
+        self.image_dir = Path(image_dir)
+        self.cache_dir = Path(cache_dir)
+        # Build products never go next to the sources by default: a docs/ tree would change the build key
+        self.output_dir = Path(output_dir) if output_dir else self.cache_dir / "variants"
+        self.widths = tuple(widths)
+        self.formats = available_formats(formats)
+        self.jobs = jobs
+        self.index_path = self.cache_dir / "index.json"
+        self.encoded = 0
+        self.cached = 0
+
+    def sources(self):
+        """Source images, excluding previously generated variants"""
+        for path in sorted(self.image_dir.rglob("*")):
+            if not path.is_file() or self.output_dir in path.parents:
+                continue
+            suffix = path.suffix.lower()
+            if suffix in RASTER_SUFFIXES and Image is not None:
+                yield path
+            elif suffix == ".svg" and cairosvg is not None:
+                yield path
+
+    def plan(self, source):
+        """Every ImageTask one source produces"""
+        sha = _sha256(source)
+        size = source_size(source)
+        if source.suffix.lower() == ".svg":
+            # Raster fallbacks for clients without SVG support, up to 2x the intrinsic size
+            widths = _target_widths(size[0], self.widths, max_scale=2) if size else self.widths
+            return [ImageTask(source, sha, width, "png", QUALITY["png"]) for width in widths]
+
+        # PNG sources may carry transparency, so their fallback stays PNG instead of JPEG
+        formats = [
+            "png" if fmt == "jpeg" and source.suffix.lower() == ".png" else fmt
+            for fmt in self.formats
+        ]
+        return [
+            ImageTask(source, sha, width, fmt, QUALITY[fmt])
+            for width in _target_widths(size[0], self.widths)
+            for fmt in formats
+        ]
+
+    @staticmethod
+    def _load_json(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def run(self):
+        """Encode missing variants in a process pool and sync the output directory; returns the manifest"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        index = self._load_json(self.index_path)
+        tasks = [task for source in self.sources() for task in self.plan(source)]
+
+        pending = [
+            task for task in tasks
+            if task.key not in index
+            or not (self.cache_dir / f"{task.key}{EXTENSIONS[task.format]}").exists()
+        ]
+        self.cached = len(tasks) - len(pending)
+        self.encoded = len(pending)
+
+        if pending:
+            with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+                results = pool.map(_encode, pending, [str(self.cache_dir)] * len(pending))
+                for key, width, height, size in results:
+                    index[key] = {"width": width, "height": height, "bytes": size}
+            tmp_path = self.index_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f)
+            os.replace(tmp_path, self.index_path)
+
+        return self._sync_outputs(tasks, index)
+
+    def _sync_outputs(self, tasks, index):
+        """Copy cached variants into output_dir, remove stale ones and write manifest.json"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = self.output_dir / "manifest.json"
+        previous_keys = {
+            variant["path"]: variant.get("key")
+            for entry in self._load_json(manifest_path).values()
+            for variant in entry["variants"]
+        }
+        manifest = {}
+        wanted = {"manifest.json"}
+
+        for task in tasks:
+            name = task.output_name(self.image_dir)
+            wanted.add(name)
+            cached = self.cache_dir / f"{task.key}{EXTENSIONS[task.format]}"
+            target = self.output_dir / name
+            meta = index[task.key]
+            if previous_keys.get(name) != task.key or not target.exists():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copyfile(cached, target)
+
+            source = task.source.relative_to(self.image_dir).as_posix()
+            if source not in manifest:
+                width, height = source_size(task.source) or (None, None)
+                manifest[source] = {
+                    "bytes": task.source.stat().st_size,
+                    "width": width,
+                    "height": height,
+                    "variants": [],
+                }
+            manifest[source]["variants"].append({
+                "path": name,
+                "key": task.key,
+                "format": task.format,
+                "width": meta["width"],
+                "height": meta["height"],
+                "bytes": meta["bytes"],
+            })
+
+        for path in list(self.output_dir.rglob("*")):
+            if path.is_file() and path.relative_to(self.output_dir).as_posix() not in wanted:
+                path.unlink()
+
+        manifest_text = json.dumps(manifest, indent=2, sort_keys=True) + "\n"
+        if not manifest_path.exists() or manifest_path.read_text(encoding="utf-8") != manifest_text:
+            tmp_path = manifest_path.with_name(".manifest.json.tmp")
+            tmp_path.write_text(manifest_text, encoding="utf-8")
+            os.replace(tmp_path, manifest_path)
+        return manifest
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Incremental Dev Server Script
+Runs mkdocs serve with per-page rebuilds instead of a full rebuild on every save
+"""
+
+import argparse
+import logging
+
+from mkdocs.__main__ import ColorFormatter
+
+import incremental_serve
+
+
+def main():
+    """Main function to start the incremental development server"""
+    parser = argparse.ArgumentParser(description="mkdocs serve that only re-renders the pages a change affects")
+    parser.add_argument("-f", "--config-file", default="mkdocs.yml", help="MkDocs configuration file")
+    parser.add_argument("-a", "--dev-addr", help="IP address and port to serve on (default: dev_addr from the config)")
+    parser.add_argument("-o", "--open", action="store_true", help="Open the site in a browser")
+    args = parser.parse_args()
+
+    logger = logging.getLogger("mkdocs")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    stream = logging.StreamHandler()
+    stream.setFormatter(ColorFormatter())
+    logger.addHandler(stream)
+
+    options = {"dev_addr": args.dev_addr} if args.dev_addr else {}
+    incremental_serve.serve(args.config_file, open_in_browser=args.open, **options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Incremental Dev Server
+Serves the site like mkdocs serve, but re-renders only the pages a saved file affects
+"""
+
+import logging
+import os
+import posixpath
+import shutil
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import watchdog.events
+from mkdocs import utils
+from mkdocs.commands import build as mkdocs_build
+from mkdocs.config import load_config
+from mkdocs.livereload import LiveReloadServer, _serve_url
+from mkdocs.structure.files import InclusionLevel, get_files, set_exclusions
+from mkdocs.structure.nav import get_navigation
+from mkdocs.structure.pages import Page
+
+import render_cache
+
+try:
+    from material.plugins.blog.structure import Post, View
+except ImportError:
+    Post = View = ()
+
+# Files editors write next to the one being saved
+EDITOR_TEMP_SUFFIXES = ("~", ".swp", ".swx", ".tmp", ".bak")
+
+log = logging.getLogger("mkdocs.incremental_serve")
+
+
+class IncrementalSite:
+    """A resident mkdocs build that knows which output pages each source file feeds"""
+
+    def __init__(self, config_file, site_dir, serve_url, **options):
+        self.config_file = config_file
+        self.site_dir = site_dir
+        self.serve_url = serve_url
+        self.options = options
+        self.lock = threading.RLock()
+        self.changes_lock = threading.Lock()
+        self.changed = set()
+        self.dirty = set()
+        self.dependents = defaultdict(set)
+        self.watched = set()
+        # Set by serve() so includes from new directories get watched too
+        self.watch = None
+
+    def note_changes(self, paths):
+        with self.changes_lock:
+            self.changed.update(os.path.abspath(path) for path in paths if path)
+
+    def load_config(self):
+        config = load_config(self.config_file, site_dir=self.site_dir, **self.options)
+        config.site_url = self.serve_url
+        return config
+
+    def build(self):
+        """Full build (mirrors mkdocs.commands.build.build), keeping files, nav and env for later rebuilds"""
+        with self.lock:
+            start = time.perf_counter()
+            config = self.config = self.load_config()
+            config = self.config = config.plugins.on_config(config)
+            config.plugins.on_pre_build(config=config)
+            utils.clean_directory(config.site_dir)
+
+            files = get_files(config)
+            env = config.theme.get_env()
+            files.add_files_from_theme(env, config)
+            files = self.files = config.plugins.on_files(files, config=config)
+            set_exclusions(files, config)
+            nav = self.nav = get_navigation(files, config)
+            nav = self.nav = config.plugins.on_nav(nav, config=config, files=files)
+
+            inclusion = InclusionLevel.is_in_serve
+            for file in files.documentation_pages(inclusion=inclusion):
+                if file.page is None and file.inclusion.is_not_in_nav():
+                    Page(None, file, config)
+                mkdocs_build._populate_page(file.page, config, files)
+            self.env = config.plugins.on_env(env, config=config, files=files)
+
+            files.copy_static_files(inclusion=inclusion)
+            self._build_templates()
+            self.doc_files = files.documentation_pages(inclusion=inclusion)
+            self.pages = {file.src_uri: file.page for file in self.doc_files}
+            self.dest_pages = {file.dest_uri: file.src_uri for file in self.doc_files}
+            for file in self.doc_files:
+                self._build_page(file.page)
+            config.plugins.on_post_build(config=config)
+
+            self.dirty.clear()
+            self._map_dependencies()
+            log.info(f"Full build of {len(self.pages)} pages in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def _build_templates(self):
+        for template in self.config.theme.static_templates:
+            mkdocs_build._build_theme_template(template, self.env, self.files, self.config, self.nav)
+        for template in self.config.extra_templates:
+            mkdocs_build._build_extra_template(template, self.files, self.config, self.nav)
+
+    def _build_page(self, page):
+        mkdocs_build._build_page(page, self.config, self.doc_files, self.nav, self.env,
+                                 excluded=page.file.inclusion.is_excluded())
+
+    def _map_dependencies(self, src_uris=None):
+        """Source path -> pages whose HTML it feeds: the page's own Markdown and its snippet includes"""
+        pages = self.pages if src_uris is None else {src_uri: self.pages[src_uri] for src_uri in src_uris}
+        for dependents in self.dependents.values():
+            dependents.difference_update(pages)
+        for src_uri, page in pages.items():
+            self.dependents[os.path.abspath(page.file.abs_src_path)].add(src_uri)
+            for _, path in render_cache.snippet_includes(page.markdown or "", self.config):
+                if path is not None:
+                    path = os.path.abspath(path)
+                    self.dependents[path].add(src_uri)
+                    self._watch_directory(os.path.dirname(path))
+
+    def _watch_directory(self, directory):
+        docs_dir = os.path.abspath(self.config.docs_dir)
+        if self.watch is None or directory in self.watched or _is_within(directory, docs_dir):
+            return
+        self.watched.add(directory)
+        self.watch(directory, recursive=False)
+
+    def _views(self):
+        return {src_uri for src_uri, page in self.pages.items() if isinstance(page, View)}
+
+    def plan(self, changed):
+        """(pages to re-read, pages to re-render, static files to copy), or None when a full rebuild is needed"""
+        docs_dir = os.path.abspath(self.config.docs_dir)
+        template_dirs = [os.path.abspath(path) for path in [self.config.theme.custom_dir] if path]
+        reread, rerender, static = set(), set(), []
+        for path in changed:
+            if path.endswith(EDITOR_TEMP_SUFFIXES):
+                continue
+            if path == os.path.abspath(self.config.config_file_path):
+                # nav, plugins or markdown_extensions may have changed
+                return None
+            if any(_is_within(path, directory) for directory in template_dirs):
+                # Every page is stale; a custom_dir inside docs_dir is also copied as static files below
+                rerender.update(self.pages)
+            elif path in self.dependents:
+                if not os.path.exists(path):
+                    return None
+                for src_uri in self.dependents[path]:
+                    reread.add(src_uri)
+                    if isinstance(self.pages[src_uri], Post):
+                        # Index, archive and category pages show the post's excerpt
+                        rerender.update(self._views())
+                continue
+            if not _is_within(path, docs_dir):
+                continue
+            file = self.files.get_file_from_path(os.path.relpath(path, docs_dir).replace(os.sep, "/"))
+            if file is None or file.is_documentation_page() or not os.path.exists(path):
+                # New or deleted pages and files, .authors.yml and anything else unknown
+                return None
+            static.append(file)
+        return reread, rerender - reread, static
+
+    def _populate(self, page):
+        if isinstance(page, Post):
+            # The blog plugin appends the post's authors again in on_page_markdown
+            page.authors.clear()
+        mkdocs_build._populate_page(page, self.config, self.files)
+
+    def _reread(self, page):
+        """Populate page again from its sources; False if its metadata or title changed"""
+        before = (dict(page.meta), page.title)
+        if isinstance(page, Post):
+            # Posts read their source when the blog plugin creates them in on_files, not in read_source
+            fresh = Post(page.file, self.config)
+            page.file.page = page
+            if fresh.meta != page.meta:
+                return False
+            # A fresh config drops the readtime computed from the old text
+            page.markdown, page.config = fresh.markdown, fresh.config
+        self._populate(page)
+        return (dict(page.meta), page.title) == before
+
+    def render(self, src_uri):
+        """Re-run the page's Markdown (a render cache hit unless it changed) and template"""
+        with self.lock:
+            page = self.pages[src_uri]
+            # Plugins add to page.toc and page.content in on_page_context, so start from a fresh render
+            self._populate(page)
+            self._build_page(page)
+            self.dirty.discard(src_uri)
+
+    def render_if_dirty(self, rel_path):
+        """Called before a file is served: render it first if a change left it stale"""
+        src_uri = self.dest_pages.get(rel_path)
+        if src_uri is not None and src_uri in self.dirty:
+            start = time.perf_counter()
+            self.render(src_uri)
+            log.info(f"Rendered {rel_path} on request in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def rebuild(self):
+        """LiveReloadServer builder: apply the changes noted since the last call (the search index waits for a full build)"""
+        with self.changes_lock:
+            changed, self.changed = self.changed, set()
+        with self.lock:
+            start = time.perf_counter()
+            plan = self.plan(changed) if changed else None
+            if plan is None:
+                return self.build()
+            reread, rerender, static = plan
+            for src_uri in sorted(reread):
+                if not self._reread(self.pages[src_uri]):
+                    # The title shows up in every page's navigation; post metadata drives the blog views
+                    log.info(f"Metadata or title of {src_uri} changed")
+                    return self.build()
+            for file in static:
+                file.copy_file()
+            if reread:
+                self._map_dependencies(reread)
+            for src_uri in sorted(reread):
+                # The edited pages are written now; everything else renders when it is requested
+                self._build_page(self.pages[src_uri])
+                self.dirty.discard(src_uri)
+            if len(rerender) == len(self.pages):
+                self._build_templates()
+            self.dirty.update(rerender)
+            log.info(f"Incremental rebuild in {(time.perf_counter() - start) * 1000:.0f} ms: "
+                     f"{len(reread)} pages rendered, {len(static)} files copied, "
+                     f"{len(self.dirty)} pages render on request")
+
+
+class IncrementalServer(LiveReloadServer):
+    """LiveReloadServer that passes the changed paths on and renders stale pages as they are requested"""
+
+    def __init__(self, site, **kwargs):
+        super().__init__(builder=site.rebuild, **kwargs)
+        self.site = site
+
+    def watch(self, path, func=None, *, recursive=True):
+        path = os.path.abspath(path)
+        if path in self._watched_paths:
+            self._watched_paths[path] += 1
+            return
+        self._watched_paths[path] = 1
+
+        def callback(event):
+            if event.is_directory:
+                return
+            self.site.note_changes([event.src_path, getattr(event, "dest_path", "")])
+            with self._rebuild_cond:
+                self._want_rebuild = True
+                self._rebuild_cond.notify_all()
+
+        handler = watchdog.events.FileSystemEventHandler()
+        handler.on_any_event = callback
+        self._watch_refs[path] = self.observer.schedule(handler, path, recursive=recursive)
+
+    def _serve_request(self, environ, start_response):
+        path = environ["PATH_INFO"].encode("latin-1").decode("utf-8", "ignore")
+        if not path.startswith("/livereload/") and (path + "/").startswith(self.mount_path):
+            rel_path = path[len(self.mount_path):]
+            if rel_path.endswith("/") or not rel_path:
+                rel_path += "index.html"
+            self.site.render_if_dirty(posixpath.normpath("/" + rel_path).lstrip("/"))
+        return super()._serve_request(environ, start_response)
+
+
+def _is_within(path, directory):
+    return path == directory or path.startswith(directory.rstrip(os.sep) + os.sep)
+
+
+def serve(config_file="mkdocs.yml", open_in_browser=False, **options):
+    """mkdocs serve with incremental rebuilds"""
+    site_dir = tempfile.mkdtemp(prefix="mkdocs_")
+    config = load_config(config_file, site_dir=site_dir, **options)
+    config.plugins.on_startup(command="serve", dirty=False)
+    host, port = config.dev_addr
+    mount_path = urlsplit(config.site_url or "/").path
+    site = IncrementalSite(config_file, site_dir, _serve_url(host, port, mount_path), **options)
+    server = IncrementalServer(site, host=host, port=port, root=site_dir, mount_path=mount_path)
+
+    def error_handler(code):
+        error_page = os.path.join(site_dir, f"{code}.html")
+        if code in (404, 500) and os.path.isfile(error_page):
+            with open(error_page, "rb") as f:
+                return f.read()
+        return None
+
+    server.error_handler = error_handler
+    try:
+        site.watch = server.watch
+        site.build()
+        server.watch(site.config.docs_dir)
+        server.watch(site.config.config_file_path)
+        server = site.config.plugins.on_serve(server, config=site.config, builder=site.rebuild)
+        for item in site.config.watch:
+            server.watch(item)
+        try:
+            server.serve(open_in_browser=open_in_browser)
+        except KeyboardInterrupt:
+            log.info("Shutting down...")
+        finally:
+            server.shutdown()
+    finally:
+        config.plugins.on_shutdown()
+        shutil.rmtree(site_dir, ignore_errors=True)
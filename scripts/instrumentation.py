@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Check Instrumentation
+Wraps tester check methods to record wall time, file I/O and regex work, with optional cProfile dumps
+"""
+
+import builtins
+import cProfile
+import functools
+import io
+import json
+import pstats
+import re
+import sys
+import time
+from pathlib import Path
+
+DEFAULT_PREFIXES = ("test_", "check_")
+MAX_STACK_DEPTH = 64
+MAX_STACK_LINES = 200000
+
+
+class _CountingFile:
+    """File proxy that adds every byte or character read to the active check's stats"""
+
+    def __init__(self, file, stats):
+        self._file = file
+        self._stats = stats
+
+    def read(self, *args):
+        data = self._file.read(*args)
+        self._stats["bytes_read"] += len(data)
+        return data
+
+    def readline(self, *args):
+        data = self._file.readline(*args)
+        self._stats["bytes_read"] += len(data)
+        return data
+
+    def readlines(self, *args):
+        lines = self._file.readlines(*args)
+        self._stats["bytes_read"] += sum(len(line) for line in lines)
+        return lines
+
+    def __iter__(self):
+        for line in self._file:
+            self._stats["bytes_read"] += len(line)
+            yield line
+
+    def __enter__(self):
+        self._file.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._file.__exit__(*exc)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+def _is_regex_call(func):
+    return isinstance(getattr(func, "__self__", None), re.Pattern)
+
+
+class CheckInstrumentation:
+    """Collects per-check metrics for one tester instance"""
+
+    def __init__(self, profile_dir=None):
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self.checks = []
+        self.owner = None
+        self._profiles = {}
+        self._depth = 0
+
+    def instrument(self, tester, prefixes=DEFAULT_PREFIXES):
+        """Replace every matching bound method on the tester with an instrumented wrapper"""
+        self.owner = type(tester).__name__
+        for name in dir(type(tester)):
+            if name.startswith(prefixes) and callable(getattr(tester, name)):
+                setattr(tester, name, self._wrap(name, getattr(tester, name)))
+        return tester
+
+    def _wrap(self, name, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            # Helpers called from inside another check are attributed to that check
+            if self._depth:
+                return method(*args, **kwargs)
+            self._depth += 1
+            stats = {"check": name, "files_touched": 0, "bytes_read": 0, "regex_evaluations": 0}
+            real_open = builtins.open
+            touched = set()
+
+            def counting_open(file, mode="r", *open_args, **open_kwargs):
+                handle = real_open(file, mode, *open_args, **open_kwargs)
+                touched.add(str(file))
+                if "r" in mode and "+" not in mode:
+                    return _CountingFile(handle, stats)
+                return handle
+
+            def count_regex(frame, event, arg):
+                if event == "c_call" and _is_regex_call(arg):
+                    stats["regex_evaluations"] += 1
+
+            profiler = cProfile.Profile() if self.profile_dir else None
+            builtins.open = io.open = counting_open
+            previous_profile = sys.getprofile()
+            start = time.perf_counter()
+            try:
+                if profiler:
+                    profiler.enable()
+                else:
+                    sys.setprofile(count_regex)
+                return method(*args, **kwargs)
+            finally:
+                if profiler:
+                    profiler.disable()
+                else:
+                    sys.setprofile(previous_profile)
+                stats["wall_seconds"] = round(time.perf_counter() - start, 6)
+                builtins.open = io.open = real_open
+                stats["files_touched"] = len(touched)
+                if profiler:
+                    self._record_profile(name, profiler, stats)
+                self.checks.append(stats)
+                self._depth -= 1
+
+        return wrapper
+
+    def _record_profile(self, name, profiler, stats):
+        """Dump the cProfile data and take exact regex call counts from it"""
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        dump_path = self.profile_dir / f"{self.owner}.{name}.prof"
+        profiler.dump_stats(dump_path)
+        stats["profile"] = str(dump_path)
+
+        profile_stats = pstats.Stats(profiler).stats
+        stats["regex_evaluations"] = sum(
+            call_count for (filename, _, func_name), (_, call_count, *_) in profile_stats.items()
+            if filename == "~" and "re.Pattern" in func_name
+        )
+        self._profiles[name] = profile_stats
+
+    def report(self):
+        return {
+            "tester": self.owner,
+            "total_seconds": round(sum(c["wall_seconds"] for c in self.checks), 6),
+            "checks": sorted(self.checks, key=lambda c: c["wall_seconds"], reverse=True),
+        }
+
+    def collapsed_stacks(self):
+        """Lines of 'frame;frame;... microseconds' for flamegraph.pl / speedscope"""
+        lines = []
+        for check in self.checks:
+            root = f"{self.owner};{check['check']}"
+            profile_stats = self._profiles.get(check["check"])
+            if not profile_stats:
+                lines.append(f"{root} {int(check['wall_seconds'] * 1e6)}")
+                continue
+            lines.extend(_stacks_from_profile(root, profile_stats))
+        return lines
+
+    def write(self, output_dir):
+        """Write <Tester>-timings.json and <Tester>.collapsed into output_dir"""
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        json_path = output_dir / f"{self.owner}-timings.json"
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        with open(output_dir / f"{self.owner}.collapsed", "w", encoding="utf-8") as f:
+            f.write("\n".join(self.collapsed_stacks()) + "\n")
+        return json_path
+
+    def print_summary(self):
+        print(f"\n⏱️  Check timings for {self.owner}:")
+        for check in self.report()["checks"]:
+            print(f"  • {check['check']}: {check['wall_seconds'] * 1000:.1f} ms, "
+                  f"{check['files_touched']} files, {check['bytes_read']} bytes read, "
+                  f"{check['regex_evaluations']} regex evaluations")
+
+
+def _label(func):
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return f"{Path(filename).name}:{name}"
+
+
+def _stacks_from_profile(root, profile_stats):
+    """Expand a cProfile call graph into collapsed stacks, splitting time along caller edges"""
+    callees = {}
+    for func, (_, _, _, _, callers) in profile_stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge))
+
+    # Entry points: functions called from outside the profiled region
+    called = {func for children in callees.values() for func, _ in children}
+    roots = [func for func in profile_stats if not profile_stats[func][4] or func not in called]
+
+    lines = []
+
+    def walk(func, path, self_time, visiting):
+        label = f"{path};{_label(func)}"
+        if self_time > 0:
+            lines.append(f"{label} {int(self_time * 1e6)}")
+        if len(visiting) >= MAX_STACK_DEPTH or len(lines) >= MAX_STACK_LINES:
+            return
+        for child, (_, _, edge_tt, _) in callees.get(func, []):
+            if child in visiting:
+                continue
+            walk(child, label, edge_tt, visiting | {child})
+
+    for func in roots:
+        walk(func, root, profile_stats[func][2], {func})
+    return lines
+
+
+def add_arguments(parser):
+    """Add the shared --timings/--profile options to a tester's argument parser"""
+    parser.add_argument("--timings", metavar="DIR",
+                        help="Write per-check timing JSON and collapsed stacks to DIR")
+    parser.add_argument("--profile", action="store_true",
+                        help="With --timings, also dump a cProfile file per check")
+
+
+def from_arguments(tester, args, prefixes=DEFAULT_PREFIXES):
+    """Instrument the tester if --timings was given; returns the instrumentation or None"""
+    if not getattr(args, "timings", None):
+        return None
+    profile_dir = Path(args.timings) / "profiles" if args.profile else None
+    instrumentation = CheckInstrumentation(profile_dir)
+    instrumentation.instrument(tester, prefixes)
+    return instrumentation
+
+
+def finish(instrumentation, args):
+    """Print and write the collected timings, if instrumentation was enabled"""
+    if instrumentation is None:
+        return
+    instrumentation.print_summary()
+    json_path = instrumentation.write(args.timings)
+    print(f"  Timing report written to {json_path}")
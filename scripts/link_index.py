@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Link Resolution Index
+Answers "does this link target exist?" from one directory walk instead of per-link stat calls
+"""
+
+import os
+import posixpath
+from urllib.parse import unquote
+
+INDEX_FILES = ("index.md", "index.html")
+
+
+class LinkIndex:
+    """Hashed set of root-relative paths with directory-index and .md/.html aliases"""
+
+    def __init__(self, root, files=None, allow_directories=False):
+        self.root = str(root)
+        self.allow_directories = allow_directories
+        if files is None:
+            files = self._walk(self.root)
+        self.files = set(files)
+        self.dirs = {""}
+        for rel_path in self.files:
+            parent = posixpath.dirname(rel_path)
+            while parent not in self.dirs:
+                self.dirs.add(parent)
+                parent = posixpath.dirname(parent)
+
+    @classmethod
+    def from_corpus(cls, corpus, allow_directories=True):
+        """Reuse the file set the document corpus already walked"""
+        return cls(corpus.docs_dir, corpus.files, allow_directories)
+
+    @staticmethod
+    def _walk(root):
+        files = []
+        for dirpath, _, filenames in os.walk(root):
+            rel_dir = os.path.relpath(dirpath, root).replace(os.sep, "/")
+            for filename in filenames:
+                files.append(filename if rel_dir == "." else f"{rel_dir}/{filename}")
+        return files
+
+    @staticmethod
+    def split_url(url):
+        """Split a link into (path, fragment), dropping any query string"""
+        url, _, fragment = url.partition("#")
+        url = url.split("?", 1)[0]
+        return unquote(url), fragment
+
+    @staticmethod
+    def join(source_rel, url_path):
+        """Resolve a link path against the root-relative path of the page containing it.
+
+        Returns None if the link climbs above the root.
+        """
+        if url_path.startswith("/"):
+            joined = url_path.lstrip("/")
+        else:
+            joined = posixpath.join(posixpath.dirname(source_rel), url_path)
+        normalized = posixpath.normpath(joined) if joined else "."
+        if normalized == ".":
+            return ""
+        if normalized == ".." or normalized.startswith("../"):
+            return None
+        return normalized
+
+    def resolve(self, rel_path):
+        """Return the existing root-relative file a normalized path refers to, or None"""
+        if rel_path is None:
+            return None
+        if rel_path in self.files:
+            return rel_path
+
+        if rel_path in self.dirs:
+            for index in INDEX_FILES:
+                candidate = f"{rel_path}/{index}" if rel_path else index
+                if candidate in self.files:
+                    return candidate
+            if self.allow_directories:
+                return rel_path
+
+        stem, ext = posixpath.splitext(rel_path)
+        if not ext:
+            for candidate in (f"{rel_path}.md", f"{rel_path}.html"):
+                if candidate in self.files:
+                    return candidate
+        elif ext == ".html" and f"{stem}.md" in self.files:
+            return f"{stem}.md"
+        elif ext == ".md" and f"{stem}.html" in self.files:
+            return f"{stem}.html"
+
+        return None
+
+    def resolve_link(self, source_rel, url):
+        """Resolve a link found in source_rel; returns (target or None, normalized path, fragment)"""
+        url_path, fragment = self.split_url(url)
+        if not url_path:
+            return source_rel, source_rel, fragment
+        normalized = self.join(source_rel, url_path)
+        return self.resolve(normalized), normalized, fragment
+
+    def exists(self, rel_path):
+        return self.resolve(posixpath.normpath(rel_path)) is not None
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+MkDocs Configuration Loader
+Reads mkdocs.yml with PyYAML without needing mkdocs or its plugins installed
+"""
+
+import yaml
+
+
+class PythonTag(dict):
+    """Placeholder for a !!python/... tag, keeping the target name and its arguments"""
+
+    def __init__(self, target, args=None, kwds=None):
+        super().__init__(args=args or [], kwds=kwds or {})
+        self.target = target
+
+    def __repr__(self):
+        return f"PythonTag({self.target!r}, {dict(self)!r})"
+
+
+class MkDocsConfigLoader(yaml.SafeLoader):
+    """SafeLoader that tolerates the !ENV and !!python tags MkDocs configs use"""
+
+
+def _construct_env(loader, node):
+    # !ENV values are only known at build time
+    return "ENV_PLACEHOLDER"
+
+
+def _construct_python(loader, suffix, node):
+    target = suffix.split(":", 1)[-1]
+    if isinstance(node, yaml.MappingNode):
+        value = loader.construct_mapping(node, deep=True)
+        return PythonTag(target, value.get("args"), value.get("kwds"))
+    if isinstance(node, yaml.SequenceNode):
+        return PythonTag(target, loader.construct_sequence(node, deep=True))
+    return PythonTag(target)
+
+
+MkDocsConfigLoader.add_constructor("!ENV", _construct_env)
+MkDocsConfigLoader.add_multi_constructor("tag:yaml.org,2002:python/", _construct_python)
+
+
+def load_mkdocs_config(config_file="mkdocs.yml"):
+    """Parse mkdocs.yml into plain Python data"""
+    with open(config_file, "r", encoding="utf-8") as f:
+        return yaml.load(f, Loader=MkDocsConfigLoader) or {}
+
+
+def markdown_extension_configs(config):
+    """Normalize markdown_extensions into {name: options}"""
+    extensions = {}
+    for item in config.get("markdown_extensions", []) or []:
+        if isinstance(item, str):
+            extensions[item] = {}
+        elif isinstance(item, dict):
+            for name, options in item.items():
+                extensions[name] = options or {}
+    return extensions
+
+
+def plugin_configs(config):
+    """Normalize plugins into {name: options}"""
+    plugins = {}
+    for item in config.get("plugins", []) or []:
+        if isinstance(item, str):
+            plugins[item] = {}
+        elif isinstance(item, dict):
+            for name, options in item.items():
+                plugins[name] = options or {}
+    return plugins
@@ -4,86 +4,117 @@ Site Optimization Script
 Applies final optimizations for production deployment
 """
 
-import os
-import re
+import argparse
 import sys
 from pathlib import Path
 
+import dep_graph
+import image_pipeline
+import instrumentation
+import site_css
+from doc_corpus import get_corpus
+from html_rewriter import HTMLRewriter
+
+# Methods run by run_all_optimizations, for per-step timing
+OPTIMIZATION_PREFIXES = ("rewrite_", "optimize_", "check_", "validate_")
+
 class SiteOptimizer:
-    def __init__(self, docs_dir="docs"):
+    def __init__(self, docs_dir="docs", scope=None):
         self.docs_dir = Path(docs_dir)
+        self.corpus = get_corpus(docs_dir)
+        self.scope = scope
+        self.rewriter = HTMLRewriter()
         self.optimizations_applied = []
         
-    def add_noopener_to_external_links(self):
-        """Add rel='noopener noreferrer' to external links"""
-        print("Adding noopener to external links...")
+    def documents(self):
+        """Markdown sources to process, limited to the affected ones with --changed/--changed-since"""
+        if self.scope is None:
+            return list(self.corpus)
+        return [doc for doc in self.corpus if self.scope.covers_page(doc.rel_path)]
+    
+    def skipped(self, check):
+        """True (after saying so) when the changed files leave a whole-site step unaffected"""
+        if self.scope is None or self.scope.needs(check):
+            return False
+        print(f"⏭️  Skipped: no changed file affects {check}")
+        return True
         
-        md_files = list(self.docs_dir.glob("**/*.md"))
+    def rewrite_sources(self):
+        """Rewrite raw HTML tags in the Markdown sources IN PLACE, one pass per file: rel="noopener noreferrer"
+        on external links (rel), loading="lazy" (loading) and decoding="async" (decoding) on images"""
+        print("Rewriting HTML tags in Markdown sources (files are modified in place)...")
         
-        for md_file in md_files:
+        totals = {}
+        files = 0
+        for doc in self.documents():
+            md_file = doc.path
+            if not doc.anchor_tags and not doc.img_tags:
+                continue
             try:
-                with open(md_file, "r", encoding="utf-8") as f:
-                    content = f.read()
-                
-                original_content = content
-                
-                # Find external links without noopener
-                external_links = re.findall(
-                    r'<a[^>]*href=["\']https?://[^"\']*["\'][^>]*>',
-                    content,
-                    re.IGNORECASE
-                )
+                content, counts = self.rewriter.rewrite_file(md_file, doc.content)
                 
-                for link in external_links:
-                    if 'rel=' not in link.lower():
-                        # Add rel="noopener noreferrer"
-                        new_link = link.replace('>', ' rel="noopener noreferrer">')
-                        content = content.replace(link, new_link)
-                    elif 'noopener' not in link.lower():
-                        # Add noopener to existing rel attribute
-                        rel_match = re.search(r'rel=["\']([^"\']*)["\']', link, re.IGNORECASE)
-                        if rel_match:
-                            old_rel = rel_match.group(1)
-                            new_rel = f"{old_rel} noopener noreferrer".strip()
-                            new_link = link.replace(rel_match.group(0), f'rel="{new_rel}"')
-                            content = content.replace(link, new_link)
-                
-                if content != original_content:
-                    with open(md_file, "w", encoding="utf-8") as f:
-                        f.write(content)
-                    self.optimizations_applied.append(f"Added noopener to external links in {md_file.name}")
+                if counts:
+                    doc.update(content)
+                    files += 1
+                    changes = ", ".join(f"{rule}: {count}" for rule, count in sorted(counts.items()))
+                    self.optimizations_applied.append(f"Rewrote tags in {md_file} ({changes})")
+                    for rule, count in counts.items():
+                        totals[rule] = totals.get(rule, 0) + count
                     
             except Exception as e:
                 print(f"Error processing {md_file}: {e}")
+        
+        for rule in dict.fromkeys(rule.name for rule in self.rewriter.rules):
+            print(f"  • {rule}: {totals.get(rule, 0)} tags rewritten")
+        print(f"  ✓ {files} source files modified")
     
     def optimize_images(self):
-        """Check and suggest image optimizations"""
-        print("Checking image optimization...")
+        """Generate responsive WebP/AVIF/JPEG variants and SVG raster fallbacks"""
+        print("Optimizing images...")
+        if self.skipped("assets"):
+            return
         
         image_dir = self.docs_dir / "assets" / "images"
         if not image_dir.exists():
             print("No images directory found")
             return
         
-        image_files = list(image_dir.glob("*"))
+        missing = image_pipeline.missing_dependencies()
+        if missing:
+            print(f"  ⚠️  {', '.join(missing)} not installed; run pip install -r requirements.txt")
+        
+        pipeline = image_pipeline.ImagePipeline(image_dir)
+        try:
+            manifest = pipeline.run()
+        except Exception as e:
+            print(f"Error optimizing images: {e}")
+            return
+        
         large_images = []
+        for source, entry in manifest.items():
+            smallest = min(entry["variants"], key=lambda v: v["bytes"])
+            print(f"  • {source}: {len(entry['variants'])} variants, "
+                  f"{entry['bytes'] / 1024:.1f} KB → {smallest['bytes'] / 1024:.1f} KB ({smallest['path']})")
+            if entry["bytes"] > 500 * 1024:  # 500KB
+                large_images.append((source, entry["bytes"]))
         
-        for img_file in image_files:
-            if img_file.is_file():
-                size = img_file.stat().st_size
-                if size > 500 * 1024:  # 500KB
-                    large_images.append((img_file.name, size))
+        if pipeline.encoded:
+            self.optimizations_applied.append(
+                f"Encoded {pipeline.encoded} image variants into {pipeline.output_dir} "
+                f"({pipeline.cached} reused from cache)")
+        elif manifest:
+            print(f"✓ All {pipeline.cached} image variants are up to date")
         
         if large_images:
-            print("Large images found (consider optimization):")
+            print("Large source images (variants are served instead where templates use them):")
             for name, size in large_images:
                 print(f"  • {name}: {size / 1024:.1f} KB")
-        else:
-            print("✓ All images are reasonably sized")
     
     def check_css_optimization(self):
         """Check CSS optimization opportunities"""
         print("Checking CSS optimization...")
+        if self.skipped("assets"):
+            return
         
         css_file = self.docs_dir / "stylesheets" / "custom.css"
         if not css_file.exists():
@@ -102,17 +133,20 @@ class SiteOptimizer:
             total_lines = len(lines)
             content_lines = total_lines - comment_lines - empty_lines
             
-            print(f"CSS file stats:")
+            print("CSS file stats:")
             print(f"  • Total lines: {total_lines}")
             print(f"  • Content lines: {content_lines}")
             print(f"  • Comment/empty lines: {comment_lines + empty_lines}")
             
             # Check file size
             size = css_file.stat().st_size
+            minified_size = len(site_css.minify(css_content).encode("utf-8"))
             print(f"  • File size: {size / 1024:.1f} KB")
+            print(f"  • Minified size: {minified_size / 1024:.1f} KB "
+                  "(post-build.py css stage also drops rules unused by the built site)")
             
-            if size > 100 * 1024:  # 100KB
-                print("  ⚠️  Consider minifying CSS for production")
+            if minified_size > 100 * 1024:  # 100KB
+                print("  ⚠️  CSS is large even after minification")
             else:
                 print("  ✓ CSS file size is reasonable")
                 
@@ -123,19 +157,13 @@ class SiteOptimizer:
         """Validate and suggest meta tag improvements"""
         print("Validating meta tags...")
         
-        md_files = list(self.docs_dir.glob("**/*.md"))
-        
-        for md_file in md_files:
+        for doc in self.documents():
+            md_file = doc.path
             try:
-                with open(md_file, "r", encoding="utf-8") as f:
-                    content = f.read()
-                
                 # Check for frontmatter
-                if content.startswith('---'):
-                    frontmatter_end = content.find('---', 3)
-                    if frontmatter_end > 0:
-                        frontmatter = content[3:frontmatter_end]
-                        
+                if doc.has_frontmatter:
+                    frontmatter = doc.frontmatter_text
+                    if frontmatter is not None:
                         # Check for essential meta tags
                         has_title = 'title:' in frontmatter
                         has_description = 'description:' in frontmatter
@@ -162,17 +190,12 @@ class SiteOptimizer:
         print("Checking performance best practices...")
         
         # Check for lazy loading images
-        md_files = list(self.docs_dir.glob("**/*.md"))
         images_without_lazy = 0
         
-        for md_file in md_files:
+        for doc in self.documents():
             try:
-                with open(md_file, "r", encoding="utf-8") as f:
-                    content = f.read()
-                
-                # Find HTML img tags
-                img_tags = re.findall(r'<img[^>]*>', content, re.IGNORECASE)
-                for img in img_tags:
+                # Find HTML img tags; the first is the likely LCP image and should load eagerly
+                for img in doc.img_tags[1:]:
                     if 'loading=' not in img.lower():
                         images_without_lazy += 1
                         
@@ -218,7 +241,7 @@ class SiteOptimizer:
         
         print("\n🚀 Additional Recommendations:")
         print("  • Consider implementing a CDN for static assets")
-        print("  • Enable gzip compression on the web server")
+        print("  • Serve the .gz/.br files from scripts/post-build.py (nginx gzip_static/brotli_static)")
         print("  • Consider implementing service worker for offline functionality")
         print("  • Monitor Core Web Vitals with Google PageSpeed Insights")
         print("  • Set up performance monitoring with tools like Lighthouse CI")
@@ -240,7 +263,7 @@ class SiteOptimizer:
         print("🚀 Starting Site Optimization\n")
         print("=" * 60)
         
-        self.add_noopener_to_external_links()
+        self.rewrite_sources()
         self.optimize_images()
         self.check_css_optimization()
         self.validate_meta_tags()
@@ -250,8 +273,15 @@ class SiteOptimizer:
 
 def main():
     """Main function to run site optimizations"""
-    optimizer = SiteOptimizer()
+    parser = argparse.ArgumentParser(description="Apply final optimizations for production deployment")
+    dep_graph.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    
+    optimizer = SiteOptimizer(scope=dep_graph.from_arguments(args))
+    timings = instrumentation.from_arguments(optimizer, args, prefixes=OPTIMIZATION_PREFIXES)
     success = optimizer.run_all_optimizations()
+    instrumentation.finish(timings, args)
     
     sys.exit(0 if success else 1)
 
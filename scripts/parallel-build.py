@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Parallel Build Script
+Builds the site with Markdown conversion and template rendering spread over a process pool
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import parallel_build
+
+
+def run_benchmark(config_file, core_counts):
+    """Cold-cache build time per core count, against a stock sequential mkdocs build"""
+    print("⏱️  Parallel build benchmark\n")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory(prefix="parallel-build-bench-") as tmp:
+        baseline = parallel_build.reference_build(config_file, Path(tmp) / "reference")
+        print(f"mkdocs build (sequential, render cache off): {baseline:.2f}s")
+        print(f"\n{'cores':>5}  {'seconds':>8}  {'speedup':>8}  {'per core':>8}")
+        for cores in core_counts:
+            # A fresh cache per run, so every run converts all Markdown
+            env = dict(os.environ, RENDER_CACHE_DIR=str(Path(tmp) / f"cache-{cores}"))
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, __file__, "-f", config_file, "--jobs", str(cores),
+                 "--site-dir", str(Path(tmp) / f"site-{cores}"), "--quiet"],
+                env=env, check=True,
+            )
+            seconds = time.perf_counter() - start
+            speedup = baseline / seconds
+            print(f"{cores:>5}  {seconds:>8.2f}  {speedup:>7.2f}x  {speedup / cores:>7.2f}x")
+    print(f"\n{os.cpu_count()} CPUs available")
+
+
+def main():
+    """Main function to build the site in parallel"""
+    parser = argparse.ArgumentParser(description="mkdocs build with page rendering spread over a process pool")
+    parser.add_argument("-f", "--config-file", default="mkdocs.yml", help="MkDocs configuration file")
+    parser.add_argument("-d", "--site-dir", help="Output directory (default: site_dir from the config)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("-s", "--strict", action="store_true", help="Abort on warnings, as mkdocs build --strict")
+    parser.add_argument("--verify", action="store_true",
+                        help="Also run a stock sequential build and fail unless the output is byte-identical")
+    parser.add_argument("--benchmark", metavar="CORES",
+                        help="Comma-separated core counts to time cold builds with, e.g. 1,2,4,8")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only print errors")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        run_benchmark(args.config_file, [int(cores) for cores in args.benchmark.split(",")])
+        return
+
+    if not args.quiet:
+        parallel_build.enable_logging()
+    timings = parallel_build.build_site(args.config_file, args.jobs, args.site_dir, args.strict)
+    if not args.quiet:
+        phases = ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in timings.items())
+        print(f"✓ Built with {args.jobs} processes: {phases}")
+
+    if args.verify:
+        site_dir = args.site_dir or parallel_build.load_config(args.config_file)["site_dir"]
+        with tempfile.TemporaryDirectory(prefix="parallel-build-verify-") as tmp:
+            parallel_build.reference_build(args.config_file, tmp)
+            differing = parallel_build.compare_trees(site_dir, tmp)
+        if differing:
+            print(f"❌ {len(differing)} files differ from a sequential build:")
+            for rel in differing[:20]:
+                print(f"  • {rel}")
+            sys.exit(1)
+        print("✅ Output is byte-identical to a sequential mkdocs build")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Parallel Site Build
+Fans Markdown conversion and template rendering of mkdocs build out over a process pool
+"""
+
+import filecmp
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from mkdocs.__main__ import ColorFormatter
+from mkdocs.commands import build as mkdocs_build
+from mkdocs.config import load_config
+from mkdocs.structure.files import Files, InclusionLevel, get_files, set_exclusions
+from mkdocs.structure.nav import get_navigation
+from mkdocs.structure.pages import Page
+
+# Public function of scripts/render_cache.py that workers use to split the renders
+HOOK_FUNCTION = "set_render_filters"
+# Plugins whose on_page_context only feeds a file of their own (the search index), which workers discard
+WORKER_SKIPPED_PLUGINS = {"search"}
+
+
+class Sharding:
+    """Round-robin page ownership over the sorted source paths, identical in every process"""
+
+    def __init__(self, doc_files, shards):
+        self.shards = shards
+        self.index = {uri: i for i, uri in enumerate(sorted(file.src_uri for file in doc_files))}
+
+    def owner(self, page):
+        return self.index.get(page.file.src_uri, 0) % self.shards
+
+
+def render_hook(config):
+    """The loaded render_cache hook module; the workers hand their renders to the main build through its cache"""
+    for module in config["hooks"].values():
+        if hasattr(module, HOOK_FUNCTION):
+            return module
+    raise RuntimeError("scripts/render_cache.py must be listed under hooks: in mkdocs.yml for parallel builds")
+
+
+def _load(config_file, **options):
+    config = load_config(config_file, **options)
+    config.plugins.on_startup(command="build", dirty=False)
+    return config
+
+
+def _quiet_worker():
+    """Keep worker log records (the render cache stores them for replay) off the console"""
+    logger = logging.getLogger("mkdocs")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+
+
+def _page_context(page, config, doc_files, nav, skipped=()):
+    """_build_page without the template: runs on_page_context, which the blog and search plugins rely on"""
+    skipped_plugins = [plugin for name, plugin in config.plugins.items() if name.split("/")[-1] in skipped]
+    config._current_page = page
+    try:
+        page.active = True
+        context = mkdocs_build.get_context(nav, doc_files, config, page)
+        if not skipped_plugins:
+            config.plugins.on_page_context(context, page=page, config=config, nav=nav)
+            return
+        for method in config.plugins.events["page_context"]:
+            if getattr(method, "__self__", None) not in skipped_plugins:
+                result = method(context, page=page, config=config, nav=nav)
+                context = context if result is None else result
+    finally:
+        page.active = False
+        config._current_page = None
+
+
+def render_pages(config_file, shard, shards):
+    """Worker, phase 1: convert this shard's pages to HTML into the render cache"""
+    _quiet_worker()
+    config = _load(config_file)
+    render_hook(config)
+    config = config.plugins.on_config(config)
+    config.plugins.on_pre_build(config=config)
+    files = get_files(config)
+    env = config.theme.get_env()
+    files.add_files_from_theme(env, config)
+    files = config.plugins.on_files(files, config=config)
+    set_exclusions(files, config)
+    nav = get_navigation(files, config)
+    config.plugins.on_nav(nav, config=config, files=files)
+
+    doc_files = files.documentation_pages(inclusion=InclusionLevel.is_included)
+    sharding = Sharding(doc_files, shards)
+    rendered = 0
+    for file in doc_files:
+        if file.page is None and file.inclusion.is_not_in_nav():
+            Page(None, file, config)
+        if sharding.owner(file.page) == shard:
+            mkdocs_build._populate_page(file.page, config, files)
+            rendered += 1
+    config.plugins.on_shutdown()
+    return rendered
+
+
+def render_templates(config_file, shard, shards, out_dir):
+    """Worker, phase 2: render this shard's blog excerpts and page templates into out_dir"""
+    _quiet_worker()
+    config = _load(config_file, site_dir=str(out_dir))
+    hook = render_hook(config)
+    state = {"rendered": 0}
+
+    def owned(page):
+        return state["sharding"].owner(page) == shard
+
+    def build_page(page, config, doc_files, nav, env, dirty=False, excluded=False):
+        if "sharding" not in state:
+            state["sharding"] = Sharding(doc_files, shards)
+        if owned(page):
+            state["rendered"] += 1
+            return original_build_page(page, config, doc_files, nav, env, dirty, excluded)
+        # Other shards' pages still go through on_page_context, e.g. blog pagination rewires the nav there
+        _page_context(page, config, doc_files, nav, WORKER_SKIPPED_PLUGINS)
+
+    # Static files, 404.html and sitemap.xml are the main build's job
+    skip = lambda *args, **kwargs: None  # noqa: E731
+    patches = [
+        (mkdocs_build, "_build_page", build_page),
+        (mkdocs_build, "_build_theme_template", skip),
+        (mkdocs_build, "_build_extra_template", skip),
+        (Files, "copy_static_files", skip),
+    ]
+    originals = [(owner, name, getattr(owner, name)) for owner, name, _ in patches]
+    original_build_page = mkdocs_build._build_page
+    for owner, name, value in patches:
+        setattr(owner, name, value)
+    hook.set_render_filters(excerpts=owned)
+    try:
+        mkdocs_build.build(config)
+    finally:
+        # Pool processes run several tasks
+        for owner, name, value in originals:
+            setattr(owner, name, value)
+        hook.set_render_filters()
+        config.plugins.on_shutdown()
+    return state["rendered"]
+
+
+def assemble(config, shard_dirs):
+    """Main build: every plugin event in order, with page templates taken from the shard outputs"""
+    state = {}
+
+    def build_page(page, config, doc_files, nav, env, dirty=False, excluded=False):
+        if "sharding" not in state:
+            state["sharding"] = Sharding(doc_files, len(shard_dirs))
+        _page_context(page, config, doc_files, nav)
+        rendered = shard_dirs[state["sharding"].owner(page)] / page.file.dest_uri
+        if rendered.exists():
+            os.makedirs(os.path.dirname(page.file.abs_dest_path), exist_ok=True)
+            shutil.copyfile(rendered, page.file.abs_dest_path)
+        else:
+            mkdocs_build.log.info(f"Page skipped: '{page.file.src_uri}'. Generated empty output.")
+
+    original_build_page = mkdocs_build._build_page
+    mkdocs_build._build_page = build_page
+    try:
+        mkdocs_build.build(config)
+    finally:
+        mkdocs_build._build_page = original_build_page
+
+
+def enable_logging():
+    """Console output as from the mkdocs command line"""
+    logger = logging.getLogger("mkdocs")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    stream = logging.StreamHandler()
+    stream.setFormatter(ColorFormatter())
+    logger.addHandler(stream)
+
+
+def build_site(config_file="mkdocs.yml", jobs=None, site_dir=None, strict=False):
+    """Build the site with jobs processes; returns {phase: seconds}"""
+    jobs = jobs or os.cpu_count() or 1
+    options = {"strict": strict}
+    if site_dir:
+        options["site_dir"] = str(site_dir)
+    timings = {}
+    if jobs == 1:
+        start = time.perf_counter()
+        config = _load(config_file, **options)
+        try:
+            mkdocs_build.build(config)
+        finally:
+            config.plugins.on_shutdown()
+        timings["build"] = time.perf_counter() - start
+        return timings
+
+    with tempfile.TemporaryDirectory(prefix="parallel-build-") as tmp:
+        shard_dirs = [Path(tmp) / f"shard-{shard}" for shard in range(jobs)]
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            start = time.perf_counter()
+            list(pool.map(render_pages, [config_file] * jobs, range(jobs), [jobs] * jobs))
+            timings["markdown"] = time.perf_counter() - start
+            start = time.perf_counter()
+            list(pool.map(render_templates, [config_file] * jobs, range(jobs), [jobs] * jobs, shard_dirs))
+            timings["templates"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        config = _load(config_file, **options)
+        render_hook(config)
+        try:
+            assemble(config, shard_dirs)
+        finally:
+            config.plugins.on_shutdown()
+        timings["assemble"] = time.perf_counter() - start
+    return timings
+
+
+def reference_build(config_file, site_dir):
+    """Stock sequential mkdocs build with the render cache off; returns seconds"""
+    env = dict(os.environ, RENDER_CACHE="0")
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "mkdocs", "build", "-q", "-f", config_file, "-d", str(site_dir)],
+                   env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def compare_trees(left, right):
+    """Site-relative paths that differ between two builds, or exist in only one"""
+    left, right = Path(left), Path(right)
+    left_files = {path.relative_to(left).as_posix() for path in left.rglob("*") if path.is_file()}
+    right_files = {path.relative_to(right).as_posix() for path in right.rglob("*") if path.is_file()}
+    differing = sorted(left_files ^ right_files)
+    differing += sorted(
+        rel for rel in left_files & right_files if not filecmp.cmp(left / rel, right / rel, shallow=False)
+    )
+    return differing
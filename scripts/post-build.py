@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Post-Build Optimization Script
+Runs the registered optimization stages over the generated site/ after mkdocs build
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import site_compress
+import site_critical
+import site_css
+import site_fingerprint
+import site_icons
+import site_images
+import site_js
+import site_search
+
+# Stages in execution order: (name, run(site_dir, jobs) -> summary, description)
+STAGES = [
+    ("images", site_images.run, "Responsive <picture>/srcset variants, intrinsic sizes and load priority"),
+    ("css", site_css.run, "Unused-rule removal, media query merging and minification of extra_css"),
+    ("js", site_js.run, "Minified, content-hashed, deferred bundle of extra_javascript"),
+    ("icons", site_icons.run, "Self-hosted Font Awesome subset in place of the CDN stylesheet"),
+    ("critical", site_critical.run, "Per-template critical CSS inlined in <head>, extra_css loaded asynchronously"),
+    ("search", site_search.run, "Search index pruning with a size and query-latency report"),
+    ("fingerprint", site_fingerprint.run, "Content-hashed asset names, asset manifest and immutable _headers"),
+    ("compress", site_compress.run, "Precompressed .gz/.br siblings for text assets, skipping unchanged content"),
+]
+
+
+def run_stages(site_dir, names, jobs=None):
+    """Run the selected stages in registry order; returns True if every stage succeeded"""
+    success = True
+    for name, run, description in STAGES:
+        if name not in names:
+            continue
+        print(f"🔄 {name}: {description}...")
+        start = time.perf_counter()
+        try:
+            summary = run(site_dir, jobs=jobs)
+        except Exception as e:
+            print(f"❌ {name} failed: {e}")
+            success = False
+            continue
+        print(f"✅ {name}: {summary} ({time.perf_counter() - start:.2f}s)")
+    return success
+
+
+def main():
+    """Main function to run the post-build stages"""
+    stage_names = [name for name, *_ in STAGES]
+    parser = argparse.ArgumentParser(description="Optimize the generated site after mkdocs build")
+    parser.add_argument("--site-dir", default="site", help="Generated site directory to optimize in place")
+    parser.add_argument("--stages", nargs="+", choices=stage_names, default=stage_names,
+                        help="Subset of stages to run (default: all, in registry order)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes for parallel stages (1 runs serially)")
+    args = parser.parse_args()
+
+    site_dir = Path(args.site_dir)
+    if not site_dir.exists():
+        print(f"❌ Site directory {site_dir} does not exist - run mkdocs build first")
+        sys.exit(1)
+
+    print("🚀 Starting post-build optimization\n")
+    print("=" * 60)
+    success = run_stages(site_dir, set(args.stages), jobs=max(1, args.jobs))
+    sys.exit(0 if success else 1)
+
+
+if __name__ == "__main__":
+    main()
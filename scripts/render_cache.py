@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Markdown Render Cache Hook
+MkDocs hook that stores each page's rendered HTML on disk and skips Markdown conversion for unchanged pages
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+from importlib import metadata
+from pathlib import Path
+
+from mkdocs.structure.pages import Page
+from mkdocs.structure.toc import get_toc
+
+try:
+    from material.plugins.blog.structure import Excerpt
+except ImportError:
+    Excerpt = None
+
+from snippet_scanner import resolve_snippets
+
+CACHE_DIR = Path(os.environ.get("RENDER_CACHE_DIR", ".cache/render"))
+CACHE_VERSION = 1
+MAX_CACHE_BYTES = int(os.environ.get("RENDER_CACHE_MAX_MB", "256")) * 1024 * 1024
+# Packages whose upgrades can change the rendered HTML
+RENDER_PACKAGES = ("mkdocs", "markdown", "pymdown-extensions", "mkdocs-material")
+# Attributes set by Page.render and by the blog plugin's Excerpt.render
+PAGE_ATTRIBUTES = ("content", "toc", "_title_from_render", "present_anchor_ids", "links_to_anchors")
+EXCERPT_ATTRIBUTES = ("markdown", "content", "more", "toc")
+
+log = logging.getLogger("mkdocs.hooks.render_cache")
+
+_original_render = None
+_original_excerpt_render = None
+_state = {"hits": 0, "misses": 0, "files_hash": {}, "environment": None, "config": None, "files": None,
+          "page_filter": None, "excerpt_filter": None}
+
+
+class _RecordCapture(logging.Handler):
+    """Collects the warnings a render logs so a cache hit can replay them (and still fail --strict)"""
+
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.records = []
+
+    def emit(self, record):
+        if record.name != log.name:
+            self.records.append((record.name, record.levelno, record.getMessage()))
+
+
+def _stable(value):
+    """JSON-serializable stand-in for config values such as slugify functions"""
+    if callable(value):
+        return f"{getattr(value, '__module__', '')}.{getattr(value, '__qualname__', repr(value))}"
+    return repr(value)
+
+
+def _environment_hash(config):
+    """Hash of markdown_extensions, their options, link-related settings and renderer package versions"""
+    versions = {}
+    for name in RENDER_PACKAGES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    data = {
+        "version": CACHE_VERSION,
+        "packages": versions,
+        "extensions": [_stable(ext) if not isinstance(ext, str) else ext for ext in config["markdown_extensions"]],
+        "mdx_configs": config["mdx_configs"],
+        "use_directory_urls": config["use_directory_urls"],
+        "validation": config.get("validation"),
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=_stable).encode("utf-8")).hexdigest()
+
+
+def _files_hash(files):
+    """Hash of the src -> URL map the relative-link processor resolves against"""
+    key = id(files)
+    if key not in _state["files_hash"]:
+        digest = hashlib.sha256()
+        for file in sorted(files, key=lambda f: f.src_uri):
+            digest.update(f"{file.src_uri}\0{file.url}\0{file.dest_uri}\n".encode("utf-8"))
+        _state["files_hash"] = {key: digest.hexdigest()}
+    return _state["files_hash"][key]
+
+
+def snippet_includes(markdown, config):
+    """(name, resolved path or None) for every pymdownx.snippets include of markdown, recursively"""
+    if "pymdownx.snippets" not in config["markdown_extensions"]:
+        return []
+    return resolve_snippets(markdown, config["mdx_configs"].get("pymdownx.snippets", {}))
+
+
+def _snippet_hash(markdown, config):
+    digest = hashlib.sha256()
+    for name, path in snippet_includes(markdown, config):
+        digest.update(f"snippet:{name}\0".encode("utf-8"))
+        if path is not None:
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def page_key(page, config, files, *extra):
+    """Cache key: page source, snippet includes, extension config, link map and page identity"""
+    parts = [
+        _state["environment"], _files_hash(files), f"{type(page).__module__}.{type(page).__qualname__}",
+        page.file.src_uri, page.url, *extra, _snippet_hash(page.markdown, config), page.markdown,
+    ]
+    return hashlib.sha256("\0".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+def _load(key, page, files):
+    """Apply a cached entry to page and replay its log records; False on a miss"""
+    path = CACHE_DIR / f"{key}.pickle"
+    try:
+        with open(path, "rb") as f:
+            entry = pickle.load(f)
+        os.utime(path)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return False
+    for name, value in entry["attributes"].items():
+        if name == "links_to_anchors" and value is not None:
+            # Stored by source path, since File objects belong to one build
+            value = {files.get_file_from_path(src): anchors for src, anchors in value.items()}
+            value.pop(None, None)
+        setattr(page, name, value)
+    for name, level, message in entry["records"]:
+        logging.getLogger(name).log(level, "%s", message)
+    _state["hits"] += 1
+    return True
+
+
+def _render_and_store(key, page, attributes, render):
+    capture = _RecordCapture()
+    mkdocs_log = logging.getLogger("mkdocs")
+    mkdocs_log.addHandler(capture)
+    try:
+        render()
+    finally:
+        mkdocs_log.removeHandler(capture)
+    _state["misses"] += 1
+
+    values = {name: getattr(page, name, None) for name in attributes}
+    if values.get("links_to_anchors") is not None:
+        values["links_to_anchors"] = {f.src_uri: anchors for f, anchors in values["links_to_anchors"].items()}
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = CACHE_DIR / f"{key}.pickle"
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump({"attributes": values, "records": capture.records}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def _stub(page, **attributes):
+    """Empty render result for pages another parallel-build worker owns; never stored"""
+    for name, value in attributes.items():
+        setattr(page, name, value)
+
+
+def set_render_filters(pages=None, excerpts=None):
+    """Restrict cache misses to pages (or blog views, for excerpts) a predicate accepts; used by parallel-build.py"""
+    _state.update(page_filter=pages, excerpt_filter=excerpts)
+
+
+def cached_render(self, config, files):
+    """Page.render replacement that serves unchanged pages from CACHE_DIR"""
+    if self.markdown is None:
+        return _original_render(self, config, files)
+    key = page_key(self, config, files)
+    if _load(key, self, files):
+        return
+    if _state["page_filter"] and not _state["page_filter"](self):
+        _stub(self, content="", toc=get_toc([]), _title_from_render=None, present_anchor_ids=set(),
+              links_to_anchors={})
+    else:
+        _render_and_store(key, self, PAGE_ATTRIBUTES, lambda: _original_render(self, config, files))
+
+
+def cached_excerpt_render(self, page, separator):
+    """Excerpt.render replacement; blog views convert every post's excerpt once per index, archive and category page"""
+    post = self.post
+    key = page_key(post, _state["config"], _state["files"], page.url, post.url, post.title,
+                   bool(post._title_from_render), separator)
+    if _load(key, self, _state["files"]):
+        return
+    if _state["excerpt_filter"] and not _state["excerpt_filter"](page):
+        _stub(self, markdown=post.markdown, content="", more=None, toc=get_toc([]))
+    else:
+        _render_and_store(key, self, EXCERPT_ATTRIBUTES, lambda: _original_excerpt_render(self, page, separator))
+
+
+def evict(max_bytes=MAX_CACHE_BYTES):
+    """Delete least recently used entries until the cache fits in max_bytes; returns (entries, bytes) kept"""
+    if not CACHE_DIR.exists():
+        return 0, 0
+    entries = sorted(
+        ((entry.stat().st_mtime, entry.stat().st_size, entry) for entry in CACHE_DIR.glob("*.pickle")),
+        key=lambda item: item[0],
+    )
+    total = sum(size for _, size, _ in entries)
+    kept = len(entries)
+    for _, size, entry in entries:
+        if total <= max_bytes:
+            break
+        entry.unlink()
+        total -= size
+        kept -= 1
+    return kept, total
+
+
+def on_config(config, **kwargs):
+    """Install the caching Page.render, unless RENDER_CACHE=0"""
+    global _original_render, _original_excerpt_render
+    if os.environ.get("RENDER_CACHE", "1") == "0":
+        return config
+    if _original_render is None:
+        _original_render = Page.render
+        Page.render = cached_render
+        if Excerpt is not None:
+            _original_excerpt_render = Excerpt.render
+            Excerpt.render = cached_excerpt_render
+    _state.update(hits=0, misses=0, files_hash={}, environment=_environment_hash(config), config=config)
+    return config
+
+
+def on_files(files, config, **kwargs):
+    """Excerpt.render is not passed the file collection its links resolve against"""
+    _state["files"] = files
+    return files
+
+
+def on_post_build(config, **kwargs):
+    """Report hit rate and apply LRU eviction"""
+    if _original_render is None or _state["page_filter"] or _state["excerpt_filter"]:
+        # Parallel-build workers leave eviction to the main process
+        return
+    count, size = evict()
+    log.info(f"Render cache: {_state['hits']} hits, {_state['misses']} misses; "
+             f"{count} entries, {size / (1024 * 1024):.1f} MB in {CACHE_DIR}")
@@ -4,10 +4,14 @@ Comprehensive testing script for the portfolio website.
 Runs all validation and testing procedures.
 """
 
+import argparse
+import io
 import subprocess
 import sys
 import os
-from pathlib import Path
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 def run_command(command: str, description: str, continue_on_error: bool = True) -> bool:
     """Run a shell command and return success status."""
@@ -131,23 +135,29 @@ def run_build_test():
     print("🏗️  BUILD TESTING")
     print("="*50)
     
-    # Test strict build
-    success = run_command(
-        "mkdocs build --clean --strict",
-        "Testing strict build",
-        continue_on_error=False
-    )
+    # Test strict build, reusing the cached artifact if the inputs are unchanged
+    from build_cache import ensure_build
+    print("🔄 Testing strict build...")
+    build = ensure_build(strict=True, timeout=300)
     
-    if success:
-        # Verify build output
-        if os.path.exists("site/index.html"):
-            print("✅ Build output verified")
-            return True
-        else:
-            print("❌ Build output verification failed")
-            return False
+    if not build.success:
+        print("❌ Testing strict build failed")
+        if build.stderr.strip():
+            print(f"🚨 Error: {build.stderr.strip()}")
+        sys.exit(1)
     
-    return False
+    if build.reused:
+        print(f"✅ Reusing strict build {build.key} (inputs unchanged)")
+    else:
+        print("✅ Testing strict build completed successfully")
+    
+    # Verify build output
+    if (build.site_dir / "index.html").exists():
+        print("✅ Build output verified")
+        return True
+    else:
+        print("❌ Build output verification failed")
+        return False
 
 def run_lighthouse_audit():
     """Run Lighthouse performance audit."""
@@ -173,14 +183,108 @@ def cleanup():
         if os.path.exists(path):
             run_command(f"rm -rf {path}", f"Removing {path}")
 
+class BufferedStdout(io.TextIOBase):
+    """Stdout proxy that routes writes to a per-thread buffer while a suite runs"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+    
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        return (buffer if buffer is not None else self.stream).write(text)
+    
+    def flush(self):
+        self.stream.flush()
+    
+    def capture(self):
+        self.local.buffer = io.StringIO()
+    
+    def release(self):
+        buffer, self.local.buffer = self.local.buffer, None
+        return buffer.getvalue()
+
+def run_suite(stdout, suite_func):
+    """Run one suite with its output buffered; returns (passed, output, seconds)"""
+    stdout.capture()
+    start = time.perf_counter()
+    try:
+        passed = bool(suite_func())
+    except SystemExit:
+        # A suite that would have aborted the run counts as a fatal failure
+        passed = None
+    except Exception as e:
+        print(f"💥 Suite failed with exception: {e}")
+        passed = False
+    return passed, stdout.release(), time.perf_counter() - start
+
+def run_suites(test_suites, jobs):
+    """Run suites concurrently, starting each once its dependencies have finished.
+    
+    Output is printed in declaration order as soon as each suite and all
+    earlier ones are done. A fatal failure stops suites that have not started.
+    """
+    stdout = BufferedStdout(sys.stdout)
+    original_stdout, sys.stdout = sys.stdout, stdout
+    
+    results, timings, outputs = {}, {}, {}
+    order = [name for name, _, _ in test_suites]
+    pending = {name: (func, deps) for name, func, deps in test_suites}
+    running = {}
+    aborted = False
+    next_to_print = 0
+    
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            while pending or running:
+                if not aborted:
+                    for name, (func, deps) in list(pending.items()):
+                        if all(dep in results for dep in deps):
+                            del pending[name]
+                            if all(results[dep] for dep in deps):
+                                running[pool.submit(run_suite, stdout, func)] = name
+                            else:
+                                results[name] = False
+                                timings[name] = 0.0
+                                outputs[name] = f"⏭️  {name} skipped: dependency failed\n"
+                elif pending:
+                    for name in pending:
+                        results[name] = False
+                        timings[name] = 0.0
+                        outputs[name] = f"⏭️  {name} skipped: run aborted\n"
+                    pending.clear()
+                
+                if running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        name = running.pop(future)
+                        passed, output, seconds = future.result()
+                        if passed is None:
+                            aborted = True
+                            passed = False
+                        results[name] = passed
+                        timings[name] = seconds
+                        outputs[name] = output
+                
+                while next_to_print < len(order) and order[next_to_print] in outputs:
+                    original_stdout.write(outputs[order[next_to_print]])
+                    original_stdout.flush()
+                    next_to_print += 1
+    finally:
+        sys.stdout = original_stdout
+    
+    return {name: results[name] for name in order}, timings, aborted
+
 def main():
     """Run all tests."""
+    parser = argparse.ArgumentParser(description="Run all website test suites")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Maximum number of suites to run concurrently (1 runs serially)")
+    args = parser.parse_args()
+    
     print("🚀 Starting comprehensive website testing...")
     print("="*60)
     
-    # Track test results
-    results = {}
-    
     # Check dependencies first
     if not check_dependencies():
         print("❌ Dependency check failed. Please install missing dependencies.")
@@ -189,26 +293,21 @@ def main():
     # Install test dependencies
     install_test_dependencies()
     
-    # Run all test suites
+    # Run all test suites: (name, function, suites it must wait for)
     test_suites = [
-        ("Content Validation", run_content_validation),
-        ("Markdown Linting", run_markdown_linting),
-        ("Link Validation", run_link_validation),
-        ("Build Testing", run_build_test),
-        ("Lighthouse Audit", run_lighthouse_audit)
+        ("Content Validation", run_content_validation, []),
+        ("Markdown Linting", run_markdown_linting, []),
+        ("Link Validation", run_link_validation, []),
+        ("Build Testing", run_build_test, []),
+        ("Lighthouse Audit", run_lighthouse_audit, ["Build Testing"])
     ]
     
-    passed = 0
-    total = len(test_suites)
+    start = time.perf_counter()
+    results, timings, aborted = run_suites(test_suites, max(1, args.jobs))
+    elapsed = time.perf_counter() - start
     
-    for suite_name, test_func in test_suites:
-        try:
-            results[suite_name] = test_func()
-            if results[suite_name]:
-                passed += 1
-        except Exception as e:
-            print(f"💥 {suite_name} failed with exception: {e}")
-            results[suite_name] = False
+    passed = sum(1 for result in results.values() if result)
+    total = len(test_suites)
     
     # Print summary
     print("\n" + "="*60)
@@ -217,9 +316,14 @@ def main():
     
     for suite_name, result in results.items():
         status = "✅ PASSED" if result else "❌ FAILED"
-        print(f"{suite_name}: {status}")
+        print(f"{suite_name}: {status} ({timings[suite_name]:.1f}s)")
+    
+    print(f"\nOverall: {passed}/{total} test suites passed in {elapsed:.1f}s "
+          f"(suites total {sum(timings.values()):.1f}s)")
     
-    print(f"\nOverall: {passed}/{total} test suites passed")
+    if aborted:
+        print("❌ A critical suite failed; remaining suites were not started.")
+        return 1
     
     # Cleanup
     cleanup()
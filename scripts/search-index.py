@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Search Index Optimization Script
+Prunes and optionally shards the built search index, reporting its size and query latency
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import site_search
+
+
+def main():
+    """Main function to optimize the search index"""
+    parser = argparse.ArgumentParser(description="Prune, shard and benchmark site/search/search_index.json")
+    parser.add_argument("--site-dir", default="site", help="Built site containing search/search_index.json")
+    parser.add_argument("--max-section-chars", type=int, default=site_search.MAX_SECTION_CHARS,
+                        help="Cap on the indexed text of each section")
+    parser.add_argument("--shard", choices=["year", "category"],
+                        help="Also write per-year or per-category shards with search/search_manifest.json")
+    parser.add_argument("--repeat", type=int, default=5, help="Times each benchmark query is run")
+    parser.add_argument("--benchmark-only", action="store_true",
+                        help="Measure the current index without rewriting it")
+    args = parser.parse_args()
+
+    if not (Path(args.site_dir) / site_search.INDEX_PATH).exists():
+        print(f"❌ {Path(args.site_dir) / site_search.INDEX_PATH} does not exist - run mkdocs build first")
+        sys.exit(1)
+
+    print("🔍 Search index optimization\n")
+    print("=" * 60)
+    if args.benchmark_only:
+        index = site_search.load_index(args.site_dir)
+        result = site_search.benchmark(index, site_search.sample_queries(index), args.repeat)
+        print(f"✓ {site_search.benchmark_text(result)}")
+        return
+
+    stats, before, after = site_search.optimize(args.site_dir, args.max_section_chars, args.shard, args.repeat)
+    for name, count in sorted(stats.items()):
+        print(f"  • {name.replace('_', ' ')}: {count}")
+    print(f"✓ Before: {site_search.benchmark_text(before)}")
+    print(f"✓ After:  {site_search.benchmark_text(after)}")
+    if args.shard:
+        print(f"✓ Shards by {args.shard} written to {site_search.SHARD_DIR} "
+              f"(manifest: {site_search.SHARD_MANIFEST}); the theme's search worker still loads "
+              f"{site_search.INDEX_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Site Asset Helpers
+Content hashing, parallel page processing and asset reference rewriting shared by the post-build stages
+"""
+
+import hashlib
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from html_rewriter import HTMLRewriter, RewriteRule
+from link_index import LinkIndex
+
+PARALLEL_THRESHOLD = 50
+BATCH_SIZE = 32
+HASH_LENGTH = 8
+
+# Set in each worker by process_pages' initializer
+_rename_worker = {}
+
+
+def content_hash(data):
+    """Short content hash used in fingerprinted file names"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(rel_path, data):
+    """stylesheets/custom.css -> stylesheets/custom.<hash>.css"""
+    stem, ext = posixpath.splitext(rel_path)
+    return f"{stem}.{content_hash(data)}{ext}"
+
+
+def site_pages(site_dir):
+    """(path, site-relative path) for every generated HTML page, sorted"""
+    site_dir = Path(site_dir)
+    return [(path, path.relative_to(site_dir).as_posix()) for path in sorted(site_dir.rglob("*.html"))]
+
+
+def process_pages(pages, worker, initializer, initargs=(), jobs=None):
+    """Run worker(batch) over page batches, in a process pool once there are enough pages"""
+    if jobs == 1 or len(pages) < PARALLEL_THRESHOLD:
+        initializer(*initargs)
+        return [worker(pages)]
+    batches = [pages[i:i + BATCH_SIZE] for i in range(0, len(pages), BATCH_SIZE)]
+    with ProcessPoolExecutor(max_workers=jobs, initializer=initializer, initargs=initargs) as pool:
+        return list(pool.map(worker, batches))
+
+
+# Attributes that may reference a site asset, per tag
+REFERENCE_ATTRIBUTES = {
+    "link": ("href",),
+    "script": ("src",),
+    "img": ("src", "srcset"),
+    "source": ("src", "srcset"),
+    "video": ("src", "poster"),
+    "a": ("href",),
+    "meta": ("content",),
+}
+
+
+def _renamed_url(url, page_rel, renames, site_url=None):
+    """The URL with its file name swapped if it points at a renamed asset, else None"""
+    if url and site_url and url.startswith(site_url):
+        # Absolute URLs into this site, e.g. og:image
+        path, _ = LinkIndex.split_url(url[len(site_url):])
+        target = LinkIndex.join("", path)
+    elif url and ("://" in url or url.startswith("//")):
+        # A remote asset replaced by a self-hosted copy
+        new_target = renames.get(url)
+        return posixpath.relpath(new_target, posixpath.dirname(page_rel) or ".") if new_target else None
+    elif not url or url.startswith(("data:", "#")):
+        return None
+    else:
+        path, _ = LinkIndex.split_url(url)
+        target = LinkIndex.join(page_rel, path)
+    new_target = renames.get(target)
+    if new_target is None:
+        return None
+    old_name, new_name = posixpath.basename(target), posixpath.basename(new_target)
+    index = url.rfind(old_name)
+    if index == -1:
+        return None
+    return url[:index] + new_name + url[index + len(old_name):]
+
+
+def _renamed_srcset(srcset, page_rel, renames, site_url=None):
+    """The srcset with each renamed candidate URL swapped, or None if none changed"""
+    candidates = []
+    changed = False
+    for candidate in srcset.split(","):
+        if not candidate.strip():
+            continue
+        url, *descriptor = candidate.split()
+        new_url = _renamed_url(url, page_rel, renames, site_url)
+        changed = changed or new_url is not None
+        candidates.append(" ".join([new_url or url] + descriptor))
+    return ", ".join(candidates) if changed else None
+
+
+def asset_reference(tag, state):
+    """Point asset-referencing attributes (href, src, srcset, og:image content, ...) at the renamed asset"""
+    changed = False
+    for attr in REFERENCE_ATTRIBUTES[tag.name]:
+        value = tag.get(attr)
+        if not value:
+            continue
+        rename = _renamed_srcset if attr == "srcset" else _renamed_url
+        new_value = rename(value, state["page"], _rename_worker["renames"], _rename_worker["site_url"])
+        if new_value is not None:
+            tag.set(attr, new_value)
+            changed = True
+    return changed
+
+
+RENAME_RULES = (RewriteRule("references", tuple(REFERENCE_ATTRIBUTES), asset_reference),)
+
+
+def _init_rename_worker(renames, site_url=None):
+    _rename_worker.update(renames=renames, site_url=site_url, rewriter=HTMLRewriter(RENAME_RULES, markdown=False))
+
+
+def _rename_batch(pages):
+    changed = 0
+    for path, page_rel in pages:
+        _, counts = _rename_worker["rewriter"].rewrite_file(path, state={"page": page_rel})
+        changed += bool(counts)
+    return changed
+
+
+def rewrite_asset_references(site_dir, renames, jobs=None, site_url=None):
+    """Rewrite every page's asset references per {old site path or remote URL: new site path}; returns pages changed"""
+    if not renames:
+        return 0
+    results = process_pages(site_pages(site_dir), _rename_batch, _init_rename_worker, (renames, site_url), jobs)
+    return sum(results)
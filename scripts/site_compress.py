@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Precompression Stage
+Writes .gz and .br siblings for compressible files so static servers can skip on-the-fly compression
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from html_rewriter import write_atomic
+from site_assets import process_pages
+
+CACHE_DIR = Path(".cache/compress")
+MANIFEST_FILE = CACHE_DIR / "manifest.json"
+COMPRESSIBLE_EXTENSIONS = {".html", ".css", ".js", ".json", ".svg", ".xml", ".txt", ".map", ".webmanifest"}
+ENCODINGS = ("gz", "br")
+
+# Set in each worker by _init_worker
+_worker = {}
+
+
+def compressible_files(site_dir):
+    """(path, site-relative path) for every file worth precompressing, sorted"""
+    site_dir = Path(site_dir)
+    return [
+        (path, path.relative_to(site_dir).as_posix()) for path in sorted(site_dir.rglob("*"))
+        if path.is_file() and path.suffix.lower() in COMPRESSIBLE_EXTENSIONS
+    ]
+
+
+def compress(data, encoding):
+    """Compressed bytes at the highest level, deterministic so unchanged inputs give unchanged outputs"""
+    if encoding == "gz":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    return brotli.compress(data, mode=brotli.MODE_TEXT, quality=11)
+
+
+def _init_worker(encodings, manifest):
+    _worker.update(encodings=encodings, manifest=manifest)
+
+
+def _compress_batch(files):
+    """Worker: {rel: entry} for the batch, reusing cached outputs for unchanged content"""
+    results = {}
+    for path, rel in files:
+        data = Path(path).read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        previous = _worker["manifest"].get(rel, {})
+        entry = {"sha": digest, "bytes": len(data), "reused": 0, "compressed": 0}
+        for encoding in _worker["encodings"]:
+            sidecar = Path(f"{path}.{encoding}")
+            cached = CACHE_DIR / f"{digest}.{encoding}"
+            if previous.get("sha") == digest and encoding in previous:
+                size = previous[encoding]
+                if size is None or (sidecar.exists() and sidecar.stat().st_size == size):
+                    entry[encoding] = size
+                    entry["reused"] += 1
+                    continue
+            if cached.exists():
+                entry["reused"] += 1
+            else:
+                output = compress(data, encoding)
+                if len(output) >= len(data):
+                    # Not worth serving; remember so the next build skips it outright
+                    entry[encoding] = None
+                    entry["compressed"] += 1
+                    continue
+                tmp = cached.with_name(f".{cached.name}.{os.getpid()}.tmp")
+                tmp.write_bytes(output)
+                os.replace(tmp, cached)
+                entry["compressed"] += 1
+            shutil.copyfile(cached, sidecar)
+            entry[encoding] = cached.stat().st_size
+        for encoding in _worker["encodings"]:
+            if entry.get(encoding) is None and Path(f"{path}.{encoding}").exists():
+                os.remove(f"{path}.{encoding}")
+        results[rel] = entry
+    return results
+
+
+def load_manifest():
+    if MANIFEST_FILE.exists():
+        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def _prune_cache(manifest):
+    """Drop cached outputs that no file in the current site refers to"""
+    live = {f"{entry['sha']}.{encoding}" for entry in manifest.values() for encoding in ENCODINGS}
+    for cached in CACHE_DIR.iterdir():
+        if cached.name != MANIFEST_FILE.name and cached.name not in live:
+            cached.unlink()
+
+
+def _remove_orphans(site_dir):
+    """Sidecars left behind by files an earlier stage renamed or deleted"""
+    removed = 0
+    for encoding in ENCODINGS:
+        for sidecar in Path(site_dir).rglob(f"*.{encoding}"):
+            original = sidecar.with_suffix("")
+            if original.suffix.lower() in COMPRESSIBLE_EXTENSIONS and not original.exists():
+                sidecar.unlink()
+                removed += 1
+    return removed
+
+
+def ratio_text(original, compressed):
+    """'123.4 KB (27%)' for a compressed total and its share of the original"""
+    return f"{compressed / 1024:.1f} KB ({compressed * 100 / original:.0f}%)" if original else "0.0 KB"
+
+
+def run(site_dir, jobs=None):
+    """Post-build stage: precompress every compressible file in parallel, skipping unchanged content"""
+    site_dir = Path(site_dir)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    encodings = ("gz", "br") if brotli else ("gz",)
+    files = compressible_files(site_dir)
+    if not files:
+        return "no compressible files"
+
+    manifest = {}
+    for partial in process_pages(files, _compress_batch, _init_worker, (encodings, load_manifest()), jobs):
+        manifest.update(partial)
+    write_atomic(MANIFEST_FILE, json.dumps(manifest, indent=2, sort_keys=True))
+    _prune_cache(manifest)
+    orphans = _remove_orphans(site_dir)
+
+    entries = manifest.values()
+    original = sum(entry["bytes"] for entry in entries)
+    totals = []
+    for encoding in encodings:
+        # Files that do not shrink are served uncompressed
+        served = sum(entry[encoding] if entry.get(encoding) is not None else entry["bytes"] for entry in entries)
+        totals.append(f"{encoding} {ratio_text(original, served)}")
+    compressed = sum(entry["compressed"] for entry in entries)
+    reused = sum(entry["reused"] for entry in entries)
+    missing = "" if brotli else "; brotli not installed, .br skipped"
+    return (f"{len(files)} files, {original / 1024:.1f} KB -> {', '.join(totals)}; "
+            f"{compressed} outputs compressed, {reused} reused, {orphans} orphaned sidecars removed{missing}")
@@ -0,0 +1,568 @@
+#!/usr/bin/env python3
+"""
+Critical CSS Stage
+Inlines the rules that match each page's above-the-fold DOM and loads the full stylesheets asynchronously
+"""
+
+import hashlib
+import os
+import posixpath
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+
+import site_css
+import site_icons
+from html_rewriter import HTMLRewriter, RewriteRule
+from link_index import LinkIndex
+from mkdocs_config import load_mkdocs_config
+from site_assets import process_pages, site_pages
+
+CACHE_DIR = Path(".cache/critical")
+CACHE_VERSION = 2
+ABOVE_FOLD_ELEMENTS = 400
+# Material's article wrapper: everything inside it is page content, everything outside the shared layout
+CONTENT_CLASSES = frozenset({"md-content__inner"})
+VOID_ELEMENTS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+    "param", "source", "track", "wbr",
+}
+INTERACTIVE_PSEUDOS = {"hover", "focus", "focus-visible", "focus-within", "active", "visited"}
+ASYNC_ONLOAD = "this.onload=null;this.rel='stylesheet'"
+
+COMBINATOR_RE = re.compile(r'\s*([>+~])\s*|\s+')
+COMPOUND_PART_RE = re.compile(r'''
+    (?P<type>^(?:[\w-]+|\*))
+  | \.(?P<cls>(?:[\w-]|\\.)+)
+  | \#(?P<id>(?:[\w-]|\\.)+)
+  | \[\s*(?P<attr>[\w:-]+)\s*(?:(?P<op>[~|^$*]?=)\s*(?P<value>"[^"]*"|'[^']*'|[^\s\]]+))?\s*(?:[iIsS]\s*)?\]
+  | (?P<pseudo>::?[\w-]+)
+''', re.VERBOSE)
+
+# Set in each worker by _init_worker
+_worker = {}
+
+
+# --- DOM ------------------------------------------------------------------
+
+class Element:
+    """One element of the parsed page with just what selector matching needs"""
+
+    __slots__ = ("tag", "id", "classes", "attrs", "parent", "previous")
+
+    def __init__(self, tag, attrs, parent, previous):
+        self.tag = tag
+        self.attrs = {name: value or "" for name, value in attrs}
+        self.id = self.attrs.get("id")
+        self.classes = frozenset(self.attrs.get("class", "").split())
+        self.parent = parent
+        self.previous = previous
+
+    def key(self, references):
+        """What the stylesheet's selectors can see of this element"""
+        attrs = tuple(
+            (name, tuple(_attr_matches(self.attrs[name], op, value) for op, value in tests))
+            for name, tests in references.attrs if name in self.attrs
+        )
+        return (
+            self.tag if self.tag in references.types else None,
+            self.id if self.id in references.ids else None,
+            tuple(sorted(self.classes & references.classes)),
+            attrs,
+        )
+
+
+class _DomBuilder(HTMLParser):
+    """Builds the element tree and records the first ABOVE_FOLD_ELEMENTS elements of <body>"""
+
+    def __init__(self, fold_elements=ABOVE_FOLD_ELEMENTS):
+        super().__init__(convert_charrefs=True)
+        self.fold_elements = fold_elements
+        self.stack = []
+        self.last_child = {}
+        self.above_fold = []
+        self.in_body = False
+
+    def handle_starttag(self, tag, attrs):
+        parent = self.stack[-1] if self.stack else None
+        element = Element(tag, attrs, parent, self.last_child.get(id(parent)))
+        self.last_child[id(parent)] = element
+        if tag in ("html", "body"):
+            self.above_fold.append(element)
+            self.in_body = self.in_body or tag == "body"
+        elif self.in_body and len(self.above_fold) < self.fold_elements:
+            self.above_fold.append(element)
+        if tag not in VOID_ELEMENTS:
+            self.stack.append(element)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS and self.stack and self.stack[-1].tag == tag:
+            self.stack.pop()
+
+    def handle_endtag(self, tag):
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index].tag == tag:
+                del self.stack[index:]
+                break
+
+
+def above_fold_elements(html):
+    builder = _DomBuilder()
+    builder.feed(html)
+    builder.close()
+    return builder.above_fold
+
+
+def _context_key(element, references):
+    """Element key plus what + (the previous sibling) and ~ (any earlier sibling) selectors can see"""
+    key = element.key(references)
+    if "+" in references.siblings:
+        key += (element.previous.key(references) if element.previous else None,)
+    if "~" in references.siblings:
+        earlier = set()
+        node = element.previous
+        while node is not None:
+            earlier.add(node.key(references))
+            node = node.previous
+        key += (tuple(sorted(earlier, key=repr)),)
+    return key
+
+
+def _split_layout(elements):
+    """(layout, content): the shared layout up to the article body, and the body plus whatever follows
+    it on the fold (how much of the footer shows depends on how long the article is)"""
+    for index, element in enumerate(elements):
+        node = element.parent
+        while node is not None and not node.classes & CONTENT_CLASSES:
+            node = node.parent
+        if node is not None:
+            return elements[:index], elements[index:]
+    return elements, []
+
+
+def _chains(elements, references):
+    """Distinct element chains, each element as far as the stylesheet's selectors tell elements apart"""
+    chains = set()
+    for element in elements:
+        chain = []
+        node = element
+        while node is not None:
+            chain.append(_context_key(node, references))
+            node = node.parent
+        chains.add(repr(tuple(chain)))
+    return chains
+
+
+def _digest(chains):
+    digest = hashlib.sha256()
+    for chain in sorted(chains):
+        digest.update(chain.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def template_signature(elements, references):
+    """Hash of the above-the-fold layout: the element chains ahead of the article body.
+
+    Heading slugs, code line anchors and other per-page ids, names and classes are left out unless a
+    selector mentions them, so pages sharing a layout share a signature.
+    """
+    return _digest(_chains(_split_layout(elements)[0], references))
+
+
+def content_signature(elements, references):
+    """Hash of the above-the-fold article body, so a template's cached CSS is redone when its pages change"""
+    return _digest(_chains(_split_layout(elements)[1], references))
+
+
+# --- Selector matching ----------------------------------------------------------
+
+class SelectorReferences:
+    """Tag names, ids, classes, attribute tests and combinators the stylesheet's selectors use"""
+
+    def __init__(self, css):
+        self.types, self.ids, self.classes = set(), set(), set()
+        tests = {}
+        self.siblings = set()
+        for selector in self._selectors(site_css.parse(css)):
+            try:
+                parts = parse_selector(selector)
+            except ValueError:
+                continue
+            for combinator, compound in parts or ():
+                if combinator in ("+", "~"):
+                    self.siblings.add(combinator)
+                if compound["type"] not in (None, "*"):
+                    self.types.add(compound["type"])
+                if compound["id"] is not None:
+                    self.ids.add(compound["id"])
+                self.classes.update(compound["classes"])
+                for name, op, value in compound["attrs"]:
+                    tests.setdefault(name, set()).add((op or "", value or ""))
+        self.classes = frozenset(self.classes)
+        # Only the outcome of each attribute test matters, not the (often per-page) value itself
+        self.attrs = tuple((name, tuple((op or None, value) for op, value in sorted(tests[name])))
+                           for name in sorted(tests))
+
+    def _selectors(self, nodes):
+        for node in nodes:
+            if isinstance(node, site_css.Rule):
+                yield from site_css.split_selector_list(node.selector)
+            elif isinstance(node, site_css.AtRule) and node.rules is not None \
+                    and node.name in site_css.CONDITIONAL_AT_RULES:
+                yield from self._selectors(node.rules)
+
+
+def _parse_compound(text):
+    """dict describing one compound selector, or None if it only matches in interactive states"""
+    compound = {"type": None, "classes": [], "id": None, "attrs": []}
+    text = site_css._strip_functional_pseudos(text)
+    position = 0
+    while position < len(text):
+        match = COMPOUND_PART_RE.match(text, position)
+        if not match or match.end() == position:
+            raise ValueError(text)
+        position = match.end()
+        if match.group("type"):
+            compound["type"] = match.group("type").lower()
+        elif match.group("cls"):
+            compound["classes"].append(site_css._unescape(match.group("cls")))
+        elif match.group("id"):
+            compound["id"] = site_css._unescape(match.group("id"))
+        elif match.group("attr"):
+            value = match.group("value")
+            if value and value[0] in "\"'":
+                value = value[1:-1]
+            compound["attrs"].append((match.group("attr").lower(), match.group("op"), value))
+        elif match.group("pseudo").lstrip(":").lower() in INTERACTIVE_PSEUDOS:
+            return None
+    return compound
+
+
+def _split_compounds(selector):
+    """Compound selectors and combinators of a selector, splitting outside brackets and parentheses"""
+    tokens, current, depth, index = [], [], 0, 0
+    while index < len(selector):
+        char = selector[index]
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif depth == 0:
+            match = COMBINATOR_RE.match(selector, index)
+            if match and match.end() > index:
+                tokens.append("".join(current))
+                tokens.append(match.group(1) or " ")
+                current = []
+                index = match.end()
+                continue
+        current.append(char)
+        index += 1
+    tokens.append("".join(current))
+    return [token for token in tokens if token]
+
+
+def parse_selector(selector):
+    """[(combinator, compound), ...] left to right; None if the selector cannot match on first paint"""
+    parts = []
+    combinator = None
+    for token in _split_compounds(selector.strip()):
+        if token in (" ", ">", "+", "~"):
+            combinator = token
+            continue
+        compound = _parse_compound(token)
+        if compound is None:
+            return None
+        parts.append((combinator, compound))
+        combinator = None
+    return parts
+
+
+def _attr_matches(actual, op, expected):
+    if op is None:
+        return True
+    if op == "=":
+        return actual == expected
+    if op == "~=":
+        return expected in actual.split()
+    if op == "|=":
+        return actual == expected or actual.startswith(expected + "-")
+    if op == "^=":
+        return bool(expected) and actual.startswith(expected)
+    if op == "$=":
+        return bool(expected) and actual.endswith(expected)
+    return bool(expected) and expected in actual
+
+
+def _compound_matches(element, compound):
+    if compound["type"] not in (None, "*") and element.tag != compound["type"]:
+        return False
+    if compound["id"] is not None and element.id != compound["id"]:
+        return False
+    if any(name not in element.classes for name in compound["classes"]):
+        return False
+    for name, op, value in compound["attrs"]:
+        if name not in element.attrs or not _attr_matches(element.attrs[name], op, value):
+            return False
+    return True
+
+
+def _matches(element, parts, index):
+    combinator, compound = parts[index]
+    if not _compound_matches(element, compound):
+        return False
+    if index == 0:
+        return True
+    if combinator == ">":
+        return element.parent is not None and _matches(element.parent, parts, index - 1)
+    if combinator == "+":
+        return element.previous is not None and _matches(element.previous, parts, index - 1)
+    relatives = []
+    node = element.previous if combinator == "~" else element.parent
+    while node is not None:
+        relatives.append(node)
+        node = node.previous if combinator == "~" else node.parent
+    return any(_matches(node, parts, index - 1) for node in relatives)
+
+
+class FoldIndex:
+    """Above-the-fold elements indexed by id, class and tag for fast candidate lookup"""
+
+    def __init__(self, elements):
+        self.elements = elements
+        self.by_id, self.by_class, self.by_tag = {}, {}, {}
+        for element in elements:
+            if element.id:
+                self.by_id.setdefault(element.id, []).append(element)
+            for name in element.classes:
+                self.by_class.setdefault(name, []).append(element)
+            self.by_tag.setdefault(element.tag, []).append(element)
+
+    def candidates(self, compound):
+        if compound["id"] is not None:
+            return self.by_id.get(compound["id"], [])
+        if compound["classes"]:
+            return self.by_class.get(compound["classes"][0], [])
+        if compound["type"] not in (None, "*"):
+            return self.by_tag.get(compound["type"], [])
+        return self.elements
+
+    def matches(self, selector):
+        try:
+            parts = parse_selector(selector)
+        except ValueError:
+            return False
+        if not parts:
+            return False
+        return any(_matches(element, parts, len(parts) - 1) for element in self.candidates(parts[-1][1]))
+
+
+def _critical_nodes(nodes, index):
+    kept = []
+    for node in nodes:
+        if isinstance(node, site_css.Rule):
+            if "{" in node.body:
+                continue
+            selectors = [s for s in site_css.split_selector_list(node.selector) if index.matches(s)]
+            if selectors:
+                kept.append(site_css.Rule(",".join(selectors), node.body))
+        elif isinstance(node, site_css.AtRule):
+            if node.rules is not None and node.name in site_css.CONDITIONAL_AT_RULES:
+                children = _critical_nodes(node.rules, index)
+                if children:
+                    kept.append(site_css.AtRule(node.name, node.prelude, rules=children))
+            elif node.name == "font-face":
+                kept.append(node)
+    return kept
+
+
+def critical_css(css, elements):
+    """Minified subset of css whose selectors match the given elements, plus the keyframes they use"""
+    nodes = site_css.parse(css)
+    kept = _critical_nodes(nodes, FoldIndex(elements))
+    used = site_css.animation_names(kept)
+    kept += [
+        node for node in nodes
+        if isinstance(node, site_css.AtRule) and node.name in site_css.KEYFRAMES_AT_RULES
+        and node.prelude in used
+    ]
+    return site_css.serialize(kept)
+
+
+# --- Stylesheet discovery ----------------------------------------------------------
+
+def _asset_pattern(rel_path):
+    """Matches rel_path and its content-hashed name, e.g. stylesheets/custom.1a2b3c4d.css"""
+    stem, ext = posixpath.splitext(rel_path)
+    return re.compile(re.escape(stem) + r'(?:\.[0-9a-f]{8})?' + re.escape(ext) + '$')
+
+
+def extra_stylesheets(config_file="mkdocs.yml"):
+    """(local path patterns, remote URLs) of the extra_css entries"""
+    config = load_mkdocs_config(config_file)
+    local, remote = [], set()
+    for href in config.get("extra_css", []) or []:
+        if "://" in href or href.startswith("//"):
+            remote.add(href)
+            if site_icons.FONT_AWESOME_CDN_RE.search(href):
+                # The icons stage may have swapped it for a self-hosted subset
+                local.append(_asset_pattern(site_icons.SUBSET_CSS))
+        else:
+            local.append(_asset_pattern(href.lstrip("/")))
+    return local, remote
+
+
+def _classify_link(rel, href, page_rel):
+    """('local', site path) / ('remote', url) for extra_css stylesheet links, else None"""
+    if "stylesheet" not in (rel or "").lower().split() or not href:
+        return None
+    if href in _worker["remote"]:
+        return "remote", href
+    if "://" in href or href.startswith("//"):
+        return None
+    path, _ = LinkIndex.split_url(href)
+    target = LinkIndex.join(page_rel, path)
+    if target and any(pattern.match(target) for pattern in _worker["local"]):
+        return "local", target
+    return None
+
+
+class _LinkCollector(HTMLParser):
+    def __init__(self, page_rel):
+        super().__init__(convert_charrefs=True)
+        self.page_rel = page_rel
+        self.stylesheets = []
+        self.has_critical = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "link":
+            attrs = dict(attrs)
+            link = _classify_link(attrs.get("rel"), attrs.get("href"), self.page_rel)
+            if link:
+                self.stylesheets.append(link)
+        elif tag == "style" and ("data-critical", None) in attrs:
+            self.has_critical = True
+
+
+# --- Stage workers ---------------------------------------------------------------
+
+def _init_worker(site_dir, local, remote, critical=None):
+    _worker.update(site_dir=Path(site_dir), local=local, remote=remote, critical=critical or {},
+                   rewriter=HTMLRewriter(RULES, markdown=False), css={}, references={})
+
+
+def _stylesheet_text(rel_path):
+    if rel_path not in _worker["css"]:
+        path = _worker["site_dir"] / rel_path
+        _worker["css"][rel_path] = path.read_text(encoding="utf-8") if path.exists() else ""
+    return _worker["css"][rel_path]
+
+
+def _page_key(html, page_rel):
+    """(template key, content signature, local stylesheets) for a page, or None if it has nothing to inline"""
+    collector = _LinkCollector(page_rel)
+    collector.feed(html)
+    if collector.has_critical or not collector.stylesheets:
+        return None
+    local = [path for kind, path in collector.stylesheets if kind == "local"]
+    css = "".join(_stylesheet_text(path) for path in local)
+    css_hash = hashlib.sha256(css.encode("utf-8")).hexdigest()
+    if css_hash not in _worker["references"]:
+        _worker["references"][css_hash] = SelectorReferences(css)
+    references = _worker["references"][css_hash]
+    elements = above_fold_elements(html)
+    signature = template_signature(elements, references)
+    key = hashlib.sha256(f"{CACHE_VERSION}:{signature}:{css_hash}".encode("utf-8")).hexdigest()[:24]
+    return key, content_signature(elements, references), local
+
+
+def key_pages(pages):
+    """Worker: template-plus-CSS key and content signature for each page in the batch"""
+    keys = []
+    for path, page_rel in pages:
+        with open(path, "r", encoding="utf-8") as f:
+            result = _page_key(f.read(), page_rel)
+        if result:
+            keys.append((str(path), page_rel, *result))
+    return keys
+
+
+def compute_critical(jobs):
+    """Worker: critical CSS for (key, pages, local stylesheets) jobs, over every page's above-the-fold
+    elements so each page of the template gets the rules its own content needs; written to the cache"""
+    for key, paths, stylesheets in jobs:
+        elements = []
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                elements += above_fold_elements(f.read())
+        css = "".join(critical_css(_stylesheet_text(rel), elements) for rel in stylesheets)
+        cache_path = CACHE_DIR / f"{key}.css"
+        tmp_path = cache_path.with_name(f".{key}.{os.getpid()}.tmp")
+        tmp_path.write_text(css, encoding="utf-8")
+        os.replace(tmp_path, cache_path)
+    return len(jobs)
+
+
+def async_stylesheet(tag, state):
+    """Inline the critical CSS before the first extra_css link and turn every extra_css link into an async preload"""
+    href = tag.get("href")
+    if not _classify_link(tag.get("rel"), href, state["page"]):
+        return False
+    if not state.get("inlined"):
+        state["inlined"] = True
+        tag.wrap(f'<style data-critical>{state["critical"]}</style>', "")
+    tag.set("rel", "preload")
+    tag.set("as", "style")
+    tag.set("onload", ASYNC_ONLOAD)
+    tag.wrap("", f'<noscript><link rel="stylesheet" href="{href}"></noscript>')
+    return True
+
+
+RULES = (RewriteRule("async", ("link",), async_stylesheet),)
+
+
+def inline_pages(pages):
+    """Worker: rewrite each (path, page, key) with its cached critical CSS"""
+    changed = 0
+    for path, page_rel, key in pages:
+        critical = _worker["critical"][key]
+        _, counts = _worker["rewriter"].rewrite_file(path, state={"page": page_rel, "critical": critical})
+        changed += bool(counts)
+    return changed
+
+
+def run(site_dir, jobs=None):
+    """Post-build stage: inline per-template critical CSS and load extra_css asynchronously"""
+    site_dir = Path(site_dir)
+    local, remote = extra_stylesheets()
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+    results = process_pages(site_pages(site_dir), key_pages, _init_worker, (site_dir, local, remote), jobs)
+    keyed = [entry for batch in results for entry in batch]
+    if not keyed:
+        return "no pages with render-blocking extra_css"
+
+    # One critical CSS computation per template-plus-CSS key, redone only when a page's content changes
+    templates = {}
+    for path, _, key, content, stylesheets in keyed:
+        template = templates.setdefault(key, {"paths": [], "contents": set(), "stylesheets": stylesheets})
+        template["paths"].append(path)
+        template["contents"].add(content)
+    cache_keys = {
+        key: hashlib.sha256(f"{key}:{':'.join(sorted(template['contents']))}".encode("utf-8")).hexdigest()[:24]
+        for key, template in templates.items()
+    }
+    missing = [
+        (cache_keys[key], template["paths"], template["stylesheets"]) for key, template in templates.items()
+        if not (CACHE_DIR / f"{cache_keys[key]}.css").exists()
+    ]
+    if missing:
+        process_pages(missing, compute_critical, _init_worker, (site_dir, local, remote), jobs)
+
+    critical = {key: (CACHE_DIR / f"{cache_keys[key]}.css").read_text(encoding="utf-8") for key in templates}
+    inline_jobs = [(Path(path), page_rel, key) for path, page_rel, key, _, _ in keyed]
+    changed = sum(process_pages(inline_jobs, inline_pages, _init_worker,
+                                (site_dir, local, remote, critical), jobs))
+    sizes = sorted(len(css.encode("utf-8")) for css in critical.values())
+    return (f"{len(templates)} templates ({len(missing)} computed, {len(templates) - len(missing)} cached) "
+            f"for {len(keyed)} pages; inlined {sizes[0] / 1024:.1f}-{sizes[-1] / 1024:.1f} KB; {changed} pages rewritten")
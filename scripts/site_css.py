@@ -0,0 +1,561 @@
+#!/usr/bin/env python3
+"""
+CSS Optimization Stage
+Tokenizes the site's own stylesheets, drops rules no page or script can match, merges media blocks and minifies
+"""
+
+import os
+import re
+from pathlib import Path
+
+from mkdocs_config import load_mkdocs_config
+from site_assets import hashed_name, process_pages, rewrite_asset_references, site_pages
+
+TOKEN_RE = re.compile(r'''
+    (?P<comment>/\*.*?\*/)
+  | (?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')
+  | (?P<url>url\(\s*[^"')\s]*\s*\))
+  | (?P<punct>[{};])
+  | (?P<text>(?:[^{};/"'u]|u(?!rl\()|/(?!\*))+)
+  | (?P<other>.)
+''', re.VERBOSE | re.DOTALL | re.IGNORECASE)
+PROTECTED_RE = re.compile(r'''"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|url\([^)]*\)''', re.IGNORECASE)
+PLACEHOLDER_RE = re.compile(r'\x00(\d+)\x00')
+
+# At-rules whose blocks contain rules that match elements
+CONDITIONAL_AT_RULES = {"media", "supports", "layer", "container", "document"}
+KEYFRAMES_AT_RULES = {"keyframes", "-webkit-keyframes", "-moz-keyframes"}
+
+IDENT = r'(?:[\w-]|\\.)+'
+FUNCTIONAL_PSEUDO_RE = re.compile(r'::?[\w-]+\(')
+PSEUDO_RE = re.compile(r'::?[\w-]+')
+CLASS_RE = re.compile(r'\.(' + IDENT + ')')
+ID_RE = re.compile(r'#(' + IDENT + ')')
+TYPE_RE = re.compile(r'(?:^|(?<=[\s>+~]))(' + IDENT + ')')
+SELECTOR_CHARS_RE = re.compile(r'^[\w\s\-.#*>+~\\:]*$')
+ALWAYS_PRESENT_TYPES = {"html", "body", "head"}
+
+HTML_TAG_RE = re.compile(r'<([a-zA-Z][\w-]*)')
+HTML_CLASS_RE = re.compile(r'''\sclass\s*=\s*(?:"([^"]*)"|'([^']*)')''', re.IGNORECASE)
+HTML_ID_RE = re.compile(r'''\sid\s*=\s*(?:"([^"]*)"|'([^']*)')''', re.IGNORECASE)
+JS_STRING_RE = re.compile(r'''"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`''')
+JS_TOKEN_RE = re.compile(r'[\w-]+')
+ANIMATION_PROPERTIES = {"animation", "animation-name", "-webkit-animation", "-webkit-animation-name"}
+
+
+class Rule:
+    """A style rule: selector list and raw declaration block"""
+
+    def __init__(self, selector, body):
+        self.selector = selector
+        self.body = body
+
+
+class AtRule:
+    """An at-rule; rules is set for block at-rules holding rules, body for declaration blocks"""
+
+    def __init__(self, name, prelude, rules=None, body=None):
+        self.name = name
+        self.prelude = prelude
+        self.rules = rules
+        self.body = body
+
+
+class Comment:
+    """A /*! ... */ comment that must survive minification (licences)"""
+
+    def __init__(self, text):
+        self.text = text
+
+
+# --- Tokenizer and parser -------------------------------------------------
+
+def tokenize(css):
+    """Yield (kind, text) tokens; strings, comments and url() are single tokens"""
+    for match in TOKEN_RE.finditer(css):
+        yield match.lastgroup, match.group()
+
+
+def _read_block(tokens):
+    """Raw text of a {...} block whose '{' was just consumed, comments removed"""
+    depth = 1
+    parts = []
+    for kind, value in tokens:
+        if kind == "comment":
+            continue
+        if value == "{":
+            depth += 1
+        elif value == "}":
+            depth -= 1
+            if depth == 0:
+                break
+        parts.append(value)
+    return "".join(parts)
+
+
+def _parse(tokens):
+    nodes = []
+    prelude = []
+    for kind, value in tokens:
+        if kind == "comment":
+            if value.startswith("/*!"):
+                nodes.append(Comment(value))
+            continue
+        if value == "}":
+            break
+        if value == ";":
+            text = "".join(prelude).strip()
+            if text.startswith("@"):
+                name, _, rest = text[1:].partition(" ")
+                nodes.append(AtRule(name.lower(), rest.strip()))
+            prelude = []
+            continue
+        if value == "{":
+            text = "".join(prelude).strip()
+            prelude = []
+            if text.startswith("@"):
+                name, rest = re.match(r'@([\w-]+)\s*(.*)', text, re.DOTALL).groups()
+                name = name.lower()
+                if name in CONDITIONAL_AT_RULES or name in KEYFRAMES_AT_RULES:
+                    nodes.append(AtRule(name, rest.strip(), rules=_parse(tokens)))
+                else:
+                    nodes.append(AtRule(name, rest.strip(), body=_read_block(tokens)))
+            else:
+                nodes.append(Rule(text, _read_block(tokens)))
+            continue
+        prelude.append(value)
+    return nodes
+
+
+def parse(css):
+    """Parse a stylesheet into Rule/AtRule/Comment nodes"""
+    return _parse(tokenize(css))
+
+
+# --- Selector usage ----------------------------------------------------------
+
+def _strip_functional_pseudos(selector):
+    """Drop :not()/:is()/:has()/:nth-child() etc. with their arguments: they never require a name to exist"""
+    while True:
+        match = FUNCTIONAL_PSEUDO_RE.search(selector)
+        if not match:
+            return selector
+        depth, end = 1, match.end()
+        while end < len(selector) and depth:
+            depth += {"(": 1, ")": -1}.get(selector[end], 0)
+            end += 1
+        selector = selector[:match.start()] + selector[end:]
+
+
+def _strip_attribute_selectors(selector):
+    out, depth = [], 0
+    for char in selector:
+        if char == "[":
+            depth += 1
+        elif char == "]" and depth:
+            depth -= 1
+        elif not depth:
+            out.append(char)
+    return "".join(out)
+
+
+def _unescape(name):
+    return re.sub(r'\\(.)', r'\1', name)
+
+
+def split_selector_list(selector):
+    """Split on top-level commas, ignoring commas inside (), [] and strings"""
+    parts, depth, start = [], 0, 0
+    protected = {m.start(): m.end() for m in PROTECTED_RE.finditer(selector)}
+    index = 0
+    while index < len(selector):
+        if index in protected:
+            index = protected[index]
+            continue
+        char = selector[index]
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(selector[start:index])
+            start = index + 1
+        index += 1
+    parts.append(selector[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def selector_requirements(selector):
+    """(classes, ids, types) an element tree must contain for the selector to match; None if unanalysable"""
+    text = _strip_attribute_selectors(_strip_functional_pseudos(PROTECTED_RE.sub('', selector)))
+    text = PSEUDO_RE.sub('', text)
+    if not SELECTOR_CHARS_RE.match(text):
+        return None
+    classes = {_unescape(name) for name in CLASS_RE.findall(text)}
+    ids = {_unescape(name) for name in ID_RE.findall(text)}
+    bare = CLASS_RE.sub(' ', ID_RE.sub(' ', text))
+    types = {name.lower() for name in TYPE_RE.findall(bare) if not name[0].isdigit()}
+    return classes, ids, types
+
+
+class UsedNames:
+    """Class names, ids and element names that occur in the built pages or site scripts"""
+
+    def __init__(self):
+        self.classes = set()
+        self.ids = set()
+        self.types = set(ALWAYS_PRESENT_TYPES)
+        self.script_tokens = set()
+        self.class_sets = set()
+
+    def add_html(self, html):
+        self.types.update(tag.lower() for tag in HTML_TAG_RE.findall(html))
+        for double, single in HTML_CLASS_RE.findall(html):
+            names = frozenset((double or single).split())
+            self.classes |= names
+            self.class_sets.add(names)
+        for double, single in HTML_ID_RE.findall(html):
+            self.ids.add((double or single).strip())
+
+    def add_script(self, js):
+        # Any identifier-like word in a string literal may become a class, id or tag at runtime
+        for literal in JS_STRING_RE.findall(js):
+            self.script_tokens.update(JS_TOKEN_RE.findall(literal))
+
+    def update(self, other):
+        self.classes |= other.classes
+        self.ids |= other.ids
+        self.types |= other.types
+        self.script_tokens |= other.script_tokens
+        self.class_sets |= other.class_sets
+
+    def selector_used(self, selector):
+        requirements = selector_requirements(selector)
+        if requirements is None:
+            return True
+        classes, ids, types = requirements
+        tokens = self.script_tokens
+        return (all(name in self.classes or name in tokens for name in classes)
+                and all(name in self.ids or name in tokens for name in ids)
+                and all(name in self.types or name in tokens for name in types))
+
+
+# --- Tree transforms -------------------------------------------------------
+
+def _declarations(body):
+    """(property, value) pairs of a declaration block"""
+    protected = []
+    text = PROTECTED_RE.sub(lambda m: protected.append(m.group()) or f"\x00{len(protected) - 1}\x00", body)
+    pairs = []
+    for declaration in text.split(";"):
+        prop, sep, value = declaration.partition(":")
+        if sep and prop.strip():
+            value = PLACEHOLDER_RE.sub(lambda m: protected[int(m.group(1))], value)
+            pairs.append((prop.strip().lower(), value.strip()))
+    return pairs
+
+
+def prune(nodes, used):
+    """Drop selectors nothing can match, then rules and conditional blocks left empty"""
+    kept = []
+    removed = 0
+    for node in nodes:
+        if isinstance(node, Rule):
+            if "{" in node.body:
+                kept.append(node)  # Nested or malformed block: leave it exactly as written
+                continue
+            selectors = split_selector_list(node.selector)
+            live = [s for s in selectors if used.selector_used(s)]
+            removed += len(selectors) - len(live)
+            if live:
+                if len(live) != len(selectors):
+                    node.selector = ",".join(live)
+                kept.append(node)
+        elif isinstance(node, AtRule) and node.rules is not None and node.name in CONDITIONAL_AT_RULES:
+            node.rules, count = prune(node.rules, used)
+            removed += count
+            if node.rules:
+                kept.append(node)
+        else:
+            kept.append(node)
+    return kept, removed
+
+
+def animation_names(nodes):
+    """Names used by animation/animation-name declarations in the nodes"""
+    names = set()
+    for node in nodes:
+        if isinstance(node, Rule):
+            for prop, value in _declarations(node.body):
+                if prop in ANIMATION_PROPERTIES:
+                    names.update(JS_TOKEN_RE.findall(value))
+        elif isinstance(node, AtRule) and node.rules is not None and node.name not in KEYFRAMES_AT_RULES:
+            names |= animation_names(node.rules)
+    return names
+
+
+def prune_keyframes(nodes, used):
+    """Drop @keyframes no kept rule or script refers to, and all but the last of duplicate definitions"""
+    referenced = animation_names(nodes) | used.script_tokens
+    last_definition = {}
+    for index, node in enumerate(nodes):
+        if isinstance(node, AtRule) and node.name in KEYFRAMES_AT_RULES:
+            last_definition[(node.name, node.prelude)] = index
+    kept = [
+        node for index, node in enumerate(nodes)
+        if not (isinstance(node, AtRule) and node.name in KEYFRAMES_AT_RULES)
+        or (node.prelude in referenced and last_definition[(node.name, node.prelude)] == index)
+    ]
+    return kept, len(nodes) - len(kept)
+
+
+LEGACY_PSEUDO_ELEMENTS = {"before", "after", "first-line", "first-letter"}
+PSEUDO_TOKEN_RE = re.compile(r'(::?)([\w-]+)(\()?')
+
+
+def specificity(selector):
+    """(ids, classes, types) specificity of one complex selector"""
+    selector = PROTECTED_RE.sub('', selector)
+    ids = classes = types = 0
+    # Functional pseudo-classes: :where() adds nothing, :not/:is/:has add their most specific argument
+    while True:
+        match = FUNCTIONAL_PSEUDO_RE.search(selector)
+        if not match:
+            break
+        depth, end = 1, match.end()
+        while end < len(selector) and depth:
+            depth += {"(": 1, ")": -1}.get(selector[end], 0)
+            end += 1
+        name = match.group().strip(":(").lower()
+        argument = selector[match.end():end - 1]
+        if name in ("not", "is", "has", "matches", "-webkit-any"):
+            best = max((specificity(part) for part in split_selector_list(argument)), default=(0, 0, 0))
+            ids, classes, types = ids + best[0], classes + best[1], types + best[2]
+        elif name == "where":
+            pass
+        elif match.group().startswith("::"):
+            types += 1
+        else:
+            classes += 1
+        selector = selector[:match.start()] + " " + selector[end:]
+
+    attributes = selector.count("[")
+    selector = _strip_attribute_selectors(selector)
+    for colons, name, _ in PSEUDO_TOKEN_RE.findall(selector):
+        if colons == "::" or name.lower() in LEGACY_PSEUDO_ELEMENTS:
+            types += 1
+        else:
+            classes += 1
+    selector = PSEUDO_RE.sub(' ', selector)
+    ids += len(ID_RE.findall(selector))
+    classes += len(CLASS_RE.findall(selector)) + attributes
+    bare = CLASS_RE.sub(' ', ID_RE.sub(' ', selector))
+    types += len([name for name in TYPE_RE.findall(bare) if not name[0].isdigit()])
+    return ids, classes, types
+
+
+def _property_family(prop):
+    if prop.startswith("--"):
+        return prop
+    prop = re.sub(r'^-[a-z]+-', '', prop)
+    return "*" if prop == "all" else prop.split("-")[0]
+
+
+def subject(selector):
+    """(classes, ids, type) required of the element the selector's last compound matches"""
+    text = _strip_attribute_selectors(_strip_functional_pseudos(PROTECTED_RE.sub('', selector)))
+    compound = re.split(r'[\s>+~]+', PSEUDO_RE.sub('', text).strip())[-1]
+    classes = frozenset(_unescape(name) for name in CLASS_RE.findall(compound))
+    ids = frozenset(_unescape(name) for name in ID_RE.findall(compound))
+    types = TYPE_RE.findall(CLASS_RE.sub(' ', ID_RE.sub(' ', compound)))
+    return classes, ids, types[0].lower() if types else None
+
+
+def _may_share_element(first, second, used):
+    """False only when no element can match both subjects"""
+    classes_a, ids_a, type_a = first
+    classes_b, ids_b, type_b = second
+    if type_a and type_b and type_a != type_b:
+        return False
+    if ids_a and ids_b and ids_a != ids_b:
+        return False
+    if used is None:
+        return True
+    # Classes a script may toggle can land on any element; the rest must co-occur in the built HTML
+    static = (classes_a | classes_b) - used.script_tokens
+    return not static or any(static <= names for names in used.class_sets)
+
+
+def _cascade_profile(node):
+    """(property families, [(specificity, subject)]) for every rule a node contains; '*' when unknown"""
+    if isinstance(node, Rule):
+        if "{" in node.body:
+            return [({"*"}, [])]
+        families = {_property_family(prop) for prop, _ in _declarations(node.body)}
+        selectors = [(specificity(sel), subject(sel)) for sel in split_selector_list(node.selector)]
+        return [(families, selectors)]
+    if isinstance(node, AtRule) and node.rules is not None and node.name in CONDITIONAL_AT_RULES:
+        return [profile for child in node.rules for profile in _cascade_profile(child)]
+    return []
+
+
+def _may_compete(first, second, used):
+    """True if two rules could set the same property on the same element with equal specificity"""
+    families_a, selectors_a = first
+    families_b, selectors_b = second
+    if "*" in families_a or "*" in families_b:
+        return True
+    if not families_a & families_b:
+        return False
+    return any(spec_a == spec_b and _may_share_element(subject_a, subject_b, used)
+               for spec_a, subject_a in selectors_a for spec_b, subject_b in selectors_b)
+
+
+def _competes(moving, between, used):
+    return any(_may_compete(a, b, used) for a in moving for b in between)
+
+
+def merge_media(nodes, used=None):
+    """Fold @media blocks with the same query together when no rule in between could compete with
+    the moved rules (same property, same element, equal specificity), so the cascade is unchanged"""
+    merged = []
+    count = 0
+    for node in nodes:
+        if isinstance(node, AtRule) and node.name == "media" and node.rules is not None:
+            query = minify_text(node.prelude)
+            target = next((i for i in range(len(merged) - 1, -1, -1)
+                           if isinstance(merged[i], AtRule) and merged[i].name == "media"
+                           and merged[i].rules is not None and minify_text(merged[i].prelude) == query), None)
+            if target is not None:
+                between = [profile for n in merged[target + 1:] for profile in _cascade_profile(n)]
+                if not _competes(_cascade_profile(node), between, used):
+                    # Move this block's rules up to the end of the earlier block
+                    merged[target].rules.extend(node.rules)
+                    count += 1
+                    continue
+                if not _competes(_cascade_profile(merged[target]), between, used):
+                    # Move the earlier block's rules down to the start of this one
+                    node.rules = merged.pop(target).rules + node.rules
+                    count += 1
+        merged.append(node)
+    return merged, count
+
+
+# --- Serialization ------------------------------------------------------------
+
+def minify_text(text, selector=False):
+    """Collapse whitespace outside strings and url(); tighten punctuation"""
+    protected = []
+    text = PROTECTED_RE.sub(lambda m: protected.append(m.group()) or f"\x00{len(protected) - 1}\x00", text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    text = re.sub(r'\s*([,;{}])\s*', r'\1', text)
+    text = re.sub(r'\s*!\s*important', '!important', text, flags=re.IGNORECASE)
+    text = re.sub(r'\(\s+', '(', text)
+    text = re.sub(r'\s+\)', ')', text)
+    if selector:
+        text = re.sub(r'\s*([>+~])\s*', r'\1', text)
+    else:
+        text = re.sub(r'\s*:\s*', ':', text)
+    return PLACEHOLDER_RE.sub(lambda m: protected[int(m.group(1))], text)
+
+
+def _minify_declarations(body):
+    if "{" in body:
+        return minify_text(body)
+    return ";".join(f"{prop}:{minify_text(value)}" for prop, value in _declarations(body))
+
+
+def serialize(nodes):
+    """Minified CSS text for a node list"""
+    out = []
+    for node in nodes:
+        if isinstance(node, Comment):
+            out.append(node.text)
+        elif isinstance(node, Rule):
+            out.append(f"{minify_text(node.selector, selector=True)}{{{_minify_declarations(node.body)}}}")
+        elif node.rules is not None:
+            prelude = minify_text(node.prelude, selector=node.name in KEYFRAMES_AT_RULES)
+            out.append(f"@{node.name} {prelude}{{{serialize(node.rules)}}}")
+        elif node.body is not None:
+            prelude = f" {minify_text(node.prelude)}" if node.prelude else ""
+            out.append(f"@{node.name}{prelude}{{{_minify_declarations(node.body)}}}")
+        else:
+            out.append(f"@{node.name} {minify_text(node.prelude)};")
+    return "".join(out)
+
+
+def minify(css):
+    """Minify without removing any rules"""
+    return serialize(parse(css))
+
+
+def optimize(css, used):
+    """Prune, merge and minify; returns (css, stats)"""
+    nodes = parse(css)
+    nodes, selectors_removed = prune(nodes, used)
+    nodes, keyframes_removed = prune_keyframes(nodes, used)
+    nodes, media_merged = merge_media(nodes, used)
+    stats = {
+        "selectors_removed": selectors_removed,
+        "keyframes_removed": keyframes_removed,
+        "media_merged": media_merged,
+    }
+    return serialize(nodes), stats
+
+
+# --- Post-build stage ---------------------------------------------------------
+
+def _no_setup():
+    pass
+
+
+def _collect_html(pages):
+    used = UsedNames()
+    for path, _ in pages:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            used.add_html(f.read())
+    return used
+
+
+def collect_used_names(site_dir, jobs=None):
+    """Scan every built page (in parallel) and every script in the site"""
+    used = UsedNames()
+    for partial in process_pages(site_pages(site_dir), _collect_html, _no_setup, (), jobs):
+        used.update(partial)
+    for js_file in Path(site_dir).rglob("*.js"):
+        with open(js_file, "r", encoding="utf-8", errors="replace") as f:
+            used.add_script(f.read())
+    return used
+
+
+def local_stylesheets(config_file="mkdocs.yml"):
+    """Site-relative paths of the extra_css entries that are served from the site itself"""
+    config = load_mkdocs_config(config_file)
+    return [href.lstrip("/") for href in config.get("extra_css", []) or [] if "://" not in href]
+
+
+def run(site_dir, jobs=None):
+    """Post-build stage: replace each local extra_css file with a pruned, minified, content-hashed copy"""
+    site_dir = Path(site_dir)
+    stylesheets = [rel for rel in local_stylesheets() if (site_dir / rel).exists()]
+    if not stylesheets:
+        return "no unprocessed stylesheets"
+
+    used = collect_used_names(site_dir, jobs)
+    renames = {}
+    lines = []
+    for rel_path in stylesheets:
+        source = site_dir / rel_path
+        css = source.read_text(encoding="utf-8")
+        optimized, stats = optimize(css, used)
+        new_rel = hashed_name(rel_path, optimized)
+        (site_dir / new_rel).write_text(optimized, encoding="utf-8")
+        os.remove(source)
+        renames[rel_path] = new_rel
+        before, after = len(css.encode("utf-8")), len(optimized.encode("utf-8"))
+        lines.append(f"{rel_path} -> {new_rel}: {before / 1024:.1f} KB -> {after / 1024:.1f} KB "
+                     f"({100 - after * 100 / before:.0f}% smaller; {stats['selectors_removed']} selectors, "
+                     f"{stats['keyframes_removed']} keyframes removed, {stats['media_merged']} media blocks merged)")
+
+    pages = rewrite_asset_references(site_dir, renames, jobs)
+    return "; ".join(lines) + f"; {pages} pages updated"
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Asset Fingerprinting Stage
+Renames static assets to content-hashed names and emits long-lived cache headers for them
+"""
+
+import json
+import os
+import posixpath
+import re
+import shutil
+from pathlib import Path
+
+from html_rewriter import write_atomic
+from link_index import LinkIndex
+from mkdocs_config import load_mkdocs_config
+from site_assets import HASH_LENGTH, hashed_name, rewrite_asset_references
+
+MANIFEST_NAME = "asset-manifest.json"
+HEADERS_NAME = "_headers"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+FINGERPRINT_EXTENSIONS = {
+    ".css", ".js", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg", ".ico",
+    ".woff", ".woff2", ".ttf", ".otf", ".mp4", ".webm",
+}
+# Theme assets are already hashed by mkdocs-material; the search worker fetches search/ by fixed URLs
+EXCLUDED_PREFIXES = ("assets/javascripts/", "assets/stylesheets/", "search/")
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{8}(?:\.min)?\.[A-Za-z0-9]+$')
+# Files whose text may still mention an asset after the page rewrite (JSON-LD, feeds, data files)
+TEXT_EXTENSIONS = {".html", ".css", ".js", ".json", ".xml", ".txt", ".webmanifest"}
+# Build bookkeeping that lists assets by their pre-hash names, e.g. the image pipeline's variants/manifest.json
+BOOKKEEPING_FILES = {MANIFEST_NAME, "manifest.json"}
+CSS_URL_RE = re.compile(r'''url\(\s*(['"]?)([^'")]+)\1\s*\)''')
+
+
+def is_hashed(rel_path):
+    return bool(HASHED_NAME_RE.search(rel_path))
+
+
+def fingerprint_candidates(site_dir):
+    """Site-relative paths of static assets that should get hashed names"""
+    site_dir = Path(site_dir)
+    return [
+        rel for rel in (path.relative_to(site_dir).as_posix() for path in sorted(site_dir.rglob("*")) if path.is_file())
+        if posixpath.splitext(rel)[1].lower() in FINGERPRINT_EXTENSIONS
+        and not rel.startswith(EXCLUDED_PREFIXES) and not is_hashed(rel)
+    ]
+
+
+def rewrite_css_urls(css, css_rel, renames):
+    """css with url() references to renamed assets pointed at their hashed names"""
+    def replace(match):
+        quote, url = match.group(1), match.group(2)
+        if "://" in url or url.startswith(("data:", "//", "#")):
+            return match.group()
+        path, _ = LinkIndex.split_url(url)
+        target = LinkIndex.join(css_rel, path)
+        new_target = renames.get(target)
+        if new_target is None:
+            return match.group()
+        old_name, new_name = posixpath.basename(target), posixpath.basename(new_target)
+        index = url.rfind(old_name)
+        return f"url({quote}{url[:index]}{new_name}{url[index + len(old_name):]}{quote})"
+    return CSS_URL_RE.sub(replace, css)
+
+
+def _unhashed(rel_path):
+    """stylesheets/custom.1a2b3c4d.css -> stylesheets/custom.css"""
+    match = HASHED_NAME_RE.search(rel_path)
+    if not match:
+        return rel_path
+    return rel_path[:match.start()] + match.group()[1 + HASH_LENGTH:]
+
+
+def _still_referenced(site_dir, renames):
+    """Old paths whose file name still appears in site text the page rewrite cannot reach"""
+    names = {posixpath.basename(old): old for old in renames}
+    if not names:
+        return set()
+    pattern = re.compile("|".join(re.escape(name) for name in sorted(names, key=len, reverse=True)))
+    found = set()
+    for path in Path(site_dir).rglob("*"):
+        if path.suffix.lower() in TEXT_EXTENSIONS and path.is_file() and path.name not in BOOKKEEPING_FILES:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                found.update(names[name] for name in pattern.findall(f.read()))
+    return found
+
+
+def write_headers(site_dir):
+    """_headers file (Netlify/Cloudflare Pages syntax) marking every hashed asset immutable"""
+    site_dir = Path(site_dir)
+    hashed = sorted(
+        path.relative_to(site_dir).as_posix() for path in site_dir.rglob("*")
+        if path.is_file() and is_hashed(path.name) and path.suffix.lower() in FINGERPRINT_EXTENSIONS
+    )
+    blocks = [f"/{rel}\n  Cache-Control: {IMMUTABLE_CACHE_CONTROL}\n" for rel in hashed]
+    write_atomic(site_dir / HEADERS_NAME, "\n".join(blocks))
+    return len(hashed)
+
+
+def load_manifest(site_dir):
+    path = Path(site_dir) / MANIFEST_NAME
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def run(site_dir, jobs=None):
+    """Post-build stage: hash asset names, rewrite references, write the manifest and _headers"""
+    site_dir = Path(site_dir)
+    site_url = load_mkdocs_config().get("site_url") or None
+    manifest = load_manifest(site_dir)
+
+    # Everything but CSS first, so stylesheets can point at the hashed names before being hashed themselves
+    renames = {}
+    for rel in fingerprint_candidates(site_dir):
+        if rel.endswith(".css"):
+            continue
+        new = hashed_name(rel, (site_dir / rel).read_bytes())
+        if manifest.get(rel) == new and (site_dir / new).exists():
+            # A copy kept by an earlier run for unrewritten references
+            continue
+        renames[rel] = new
+    for path in sorted(site_dir.rglob("*.css")):
+        rel = path.relative_to(site_dir).as_posix()
+        if rel.startswith(EXCLUDED_PREFIXES):
+            continue
+        css = path.read_text(encoding="utf-8")
+        rewritten = rewrite_css_urls(css, rel, renames)
+        new = hashed_name(_unhashed(rel), rewritten)
+        if rewritten == css and (is_hashed(rel) or (manifest.get(rel) == new and (site_dir / new).exists())):
+            continue
+        write_atomic(path, rewritten)
+        renames[rel] = new
+
+    for old, new in renames.items():
+        if old != new:
+            os.replace(site_dir / old, site_dir / new)
+    pages = rewrite_asset_references(site_dir, renames, jobs, site_url)
+
+    # Keep a copy under the old name wherever it is still mentioned, e.g. JSON-LD images and data files
+    kept = _still_referenced(site_dir, renames)
+    for old in kept:
+        shutil.copyfile(site_dir / renames[old], site_dir / old)
+
+    manifest.update(renames)
+    write_atomic(site_dir / MANIFEST_NAME, json.dumps(manifest, indent=2, sort_keys=True))
+    immutable = write_headers(site_dir)
+    return (f"{len(renames)} assets fingerprinted, {pages} pages updated, {len(kept)} originals kept for "
+            f"unrewritten references; {immutable} immutable entries in {HEADERS_NAME}")
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Font Awesome Subset Stage
+Replaces the Font Awesome CDN stylesheet with a self-hosted subset of the icons the site actually uses
+"""
+
+import importlib.util
+import re
+from pathlib import Path
+from urllib.parse import quote
+
+from mkdocs_config import load_mkdocs_config
+from site_assets import hashed_name, rewrite_asset_references
+
+DOCS_DIR = Path("docs")
+SOURCE_PATTERNS = ("**/*.md", "overrides/**/*.html", "**/*.css", "**/*.js")
+SUBSET_CSS = "assets/fontawesome/icons.css"
+FONT_AWESOME_CDN_RE = re.compile(r'font-?awesome[^/]*/[\d.]+/css/(?:all|fontawesome|solid|regular|brands)(?:\.min)?\.css$')
+
+CLASS_ATTR_RE = re.compile(r'''\bclass\s*=\s*(?:"([^"]*)"|'([^']*)')''', re.IGNORECASE)
+CSS_ICON_RE = re.compile(r'\.(fa-[a-z0-9-]+)')
+SVG_COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+VIEWBOX_RE = re.compile(r'viewBox="[\d.-]+ [\d.-]+ ([\d.]+) ([\d.]+)"')
+
+# Style classes -> icon set directory, in lookup order when a class names no style
+STYLE_CLASSES = {
+    "fas": "solid", "fa-solid": "solid", "fa": "solid",
+    "far": "regular", "fa-regular": "regular",
+    "fab": "brands", "fa-brands": "brands",
+}
+ICON_SETS = ("solid", "regular", "brands")
+# Font Awesome 5 names still used in content -> their Font Awesome 6 icon files
+ALIASES = {
+    "search": "magnifying-glass", "shield-alt": "shield-halved", "map-marker-alt": "location-dot",
+    "map-marker": "location-pin", "external-link-alt": "up-right-from-square", "external-link": "arrow-up-right-from-square",
+    "times": "xmark", "close": "xmark", "cog": "gear", "cogs": "gears", "home": "house", "edit": "pen-to-square",
+    "sign-out-alt": "right-from-bracket", "sign-in-alt": "right-to-bracket",
+    "tachometer-alt": "gauge-high", "file-alt": "file-lines", "chart-bar": "chart-column", "check-circle": "circle-check",
+    "exclamation-triangle": "triangle-exclamation", "info-circle": "circle-info", "question-circle": "circle-question",
+    "calendar-alt": "calendar-days", "sync": "rotate", "redo": "arrow-rotate-right",
+    "trash-alt": "trash-can", "cloud-upload-alt": "cloud-arrow-up", "users-cog": "users-gear",
+}
+# Utility classes that are not icons, with the rules the full stylesheet gives them
+MODIFIERS = {
+    "fa-fw": "text-align:center;width:1.25em",
+    "fa-xs": "font-size:.75em;line-height:.0833333337em;vertical-align:.125em",
+    "fa-sm": "font-size:.875em;line-height:.0714285718em;vertical-align:.0535714295em",
+    "fa-lg": "font-size:1.25em;line-height:.05em;vertical-align:-.075em",
+    "fa-xl": "font-size:1.5em;line-height:.0416666682em;vertical-align:-.125em",
+    "fa-2xl": "font-size:2em;line-height:.03125em;vertical-align:-.1875em",
+    "fa-1x": "font-size:1em", "fa-2x": "font-size:2em", "fa-3x": "font-size:3em",
+    "fa-4x": "font-size:4em", "fa-5x": "font-size:5em",
+    "fa-spin": "animation:fa-spin 2s linear infinite",
+}
+STYLE_RULE = ("display:inline-block;height:1em;width:var(--fa-width,1em);vertical-align:-.125em;"
+              "background-color:currentColor;-webkit-mask:var(--fa-icon) no-repeat center/contain;"
+              "mask:var(--fa-icon) no-repeat center/contain")
+SPIN_KEYFRAMES = "@keyframes fa-spin{0%{transform:rotate(0)}to{transform:rotate(1turn)}}"
+
+
+def icons_dir():
+    """The Font Awesome SVGs bundled with mkdocs-material, or None if the theme is not installed"""
+    spec = importlib.util.find_spec("material")
+    if spec is None or not spec.origin:
+        return None
+    path = Path(spec.origin).parent / "templates" / ".icons" / "fontawesome"
+    return path if path.is_dir() else None
+
+
+def used_icons(docs_dir=DOCS_DIR):
+    """{(icon set or None, fa-name)} referenced by class attributes and selectors in the sources"""
+    used = set()
+    for pattern in SOURCE_PATTERNS:
+        for path in sorted(Path(docs_dir).glob(pattern)):
+            text = path.read_text(encoding="utf-8", errors="replace")
+            for match in CLASS_ATTR_RE.finditer(text):
+                classes = (match.group(1) or match.group(2) or "").split()
+                icon_set = next((STYLE_CLASSES[c] for c in classes if c in STYLE_CLASSES), None)
+                used.update((icon_set, c) for c in classes if c.startswith("fa-") and c not in STYLE_CLASSES)
+            if path.suffix == ".css":
+                used.update((None, name) for name in CSS_ICON_RE.findall(text) if name not in STYLE_CLASSES)
+    return used
+
+
+def resolve_icon(root, icon_set, name):
+    """Path of the SVG for fa-<name>, preferring the requested icon set"""
+    base = name[len("fa-"):]
+    candidates = [base, ALIASES.get(base)]
+    sets = ([icon_set] if icon_set else []) + [s for s in ICON_SETS if s != icon_set]
+    for directory in sets:
+        for candidate in filter(None, candidates):
+            path = root / directory / f"{candidate}.svg"
+            if path.exists():
+                return path
+    return None
+
+
+def svg_data_uri(svg):
+    """Compact percent-encoded data URI for an SVG document"""
+    svg = SVG_COMMENT_RE.sub("", svg).strip().replace('"', "'")
+    return "data:image/svg+xml," + quote(svg, safe=" '/:=.,-")
+
+
+def subset_css(root, used):
+    """(css, unresolved fa- names, icon count) for the used icons and modifiers"""
+    icons, modifiers, unresolved = {}, set(), set()
+    for icon_set, name in sorted(used, key=lambda item: (item[1], item[0] or "")):
+        if name in MODIFIERS:
+            modifiers.add(name)
+            continue
+        path = resolve_icon(root, icon_set, name)
+        if path is None:
+            unresolved.add(name)
+        elif name not in icons or icon_set:
+            icons[name] = path
+
+    style_selectors = ",".join(f".{c}::before" for c in STYLE_CLASSES)
+    parts = [
+        "/*! Font Awesome Free subset - https://fontawesome.com/license/free (Icons: CC BY 4.0, Code: MIT) */",
+        f'{",".join("." + c for c in STYLE_CLASSES)}{{display:inline-block;font-style:normal;line-height:1}}',
+        f'{style_selectors}{{content:"";{STYLE_RULE}}}',
+    ]
+    for name, path in sorted(icons.items()):
+        svg = path.read_text(encoding="utf-8")
+        match = VIEWBOX_RE.search(svg)
+        width = float(match.group(1)) / float(match.group(2)) if match else 1
+        parts.append(f'.{name}{{--fa-icon:url("{svg_data_uri(svg)}");--fa-width:{width:.4g}em}}')
+    parts.extend(f".{name}{{{MODIFIERS[name]}}}" for name in sorted(modifiers))
+    if "fa-spin" in modifiers:
+        parts.append(SPIN_KEYFRAMES)
+    return "\n".join(parts) + "\n", unresolved, len(icons)
+
+
+def font_awesome_stylesheets(config_file="mkdocs.yml"):
+    """The Font Awesome CDN entries of extra_css"""
+    config = load_mkdocs_config(config_file)
+    return [href for href in config.get("extra_css", []) or [] if FONT_AWESOME_CDN_RE.search(href)]
+
+
+def run(site_dir, jobs=None):
+    """Post-build stage: write the icon subset and point the Font Awesome CDN links at it"""
+    site_dir = Path(site_dir)
+    cdn_urls = font_awesome_stylesheets()
+    if not cdn_urls:
+        return "no Font Awesome stylesheet in extra_css"
+    root = icons_dir()
+    if root is None:
+        return "skipped: mkdocs-material icons not found, keeping the CDN stylesheet"
+
+    css, unresolved, icon_count = subset_css(root, used_icons())
+    if unresolved:
+        raise RuntimeError(f"no SVG for {', '.join(sorted(unresolved))}; add an alias or keep the CDN stylesheet")
+    rel_path = hashed_name(SUBSET_CSS, css)
+    output = site_dir / rel_path
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(css, encoding="utf-8")
+
+    pages = rewrite_asset_references(site_dir, {url: rel_path for url in cdn_urls}, jobs)
+    return (f"{icon_count} icons -> {rel_path} ({len(css.encode('utf-8')) / 1024:.1f} KB), "
+            f"replacing {len(cdn_urls)} CDN stylesheet(s); {pages} pages updated")
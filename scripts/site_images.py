@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Responsive Image Stage
+Rewrites built pages to serve the generated image variants through <picture>/srcset
+"""
+
+from pathlib import Path
+
+from html_rewriter import HTMLRewriter, RewriteRule
+from image_pipeline import ImagePipeline, source_size
+from link_index import LinkIndex
+from site_assets import process_pages, site_pages
+from site_fingerprint import MANIFEST_NAME
+
+IMAGES_PREFIX = "assets/images/"
+SOCIAL_IMAGE_PROPERTIES = ("og:image", "twitter:image")
+MIME_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+FALLBACK_FORMATS = ("jpeg", "png")
+
+# Set in each worker by _init_worker
+_worker = {}
+
+
+def _source_key(url):
+    """(prefix ending in assets/images/, manifest key) for an image URL, or (None, None)"""
+    path, _ = LinkIndex.split_url(url)
+    index = path.rfind(IMAGES_PREFIX)
+    if index == -1:
+        return None, None
+    split = index + len(IMAGES_PREFIX)
+    return path[:split], path[split:]
+
+
+def _srcset(prefix, variants):
+    return ", ".join(f"{prefix}variants/{v['path']} {v['width']}w" for v in variants)
+
+
+def _intrinsic_size(page_rel, src, entry):
+    """Size from the manifest, else from the referenced file itself (e.g. SVGs without raster fallbacks)"""
+    if entry and entry.get("width"):
+        return entry["width"], entry["height"]
+    path, _ = LinkIndex.split_url(src)
+    if not path or "://" in src or src.startswith(("data:", "//")):
+        return None
+    rel_path = LinkIndex.join(page_rel, path)
+    if rel_path is None:
+        return None
+    sizes = _worker["sizes"]
+    if rel_path not in sizes:
+        sizes[rel_path] = source_size(Path(_worker["site_dir"]) / rel_path)
+    return sizes[rel_path]
+
+
+def picture_variants(tag, state):
+    """Wrap images that have generated variants in <picture> with AVIF/WebP sources and a srcset fallback"""
+    if state.pop("in_picture", False) or tag.has("srcset"):
+        return False
+    prefix, key = _source_key(tag.get("src", ""))
+    entry = _worker["manifest"].get(key)
+    if not entry:
+        return False
+
+    by_format = {}
+    for variant in sorted(entry["variants"], key=lambda v: v["width"]):
+        by_format.setdefault(variant["format"], []).append(variant)
+    fallback = next((by_format[fmt] for fmt in FALLBACK_FORMATS if fmt in by_format), None)
+    if not fallback:
+        return False
+
+    sizes = tag.get("sizes")
+    if not sizes and entry.get("width"):
+        sizes = f"(max-width: {entry['width']}px) 100vw, {entry['width']}px"
+    sizes_attr = f' sizes="{sizes}"' if sizes else ""
+
+    sources = "".join(
+        f'<source type="{mime}" srcset="{_srcset(prefix, by_format[fmt])}"{sizes_attr}>'
+        for fmt, mime in MIME_TYPES.items() if fmt in by_format
+    )
+    tag.set("srcset", _srcset(prefix, fallback))
+    if sizes and not tag.has("sizes"):
+        tag.set("sizes", sizes)
+    tag.wrap(f"<picture>{sources}", "</picture>")
+    return True
+
+
+def intrinsic_dimensions(tag, state):
+    """width/height attributes so the browser reserves space before the image loads"""
+    if tag.has("width") and tag.has("height"):
+        return False
+    src = tag.get("src", "")
+    _, key = _source_key(src)
+    size = _intrinsic_size(state["page"], src, _worker["manifest"].get(key))
+    if not size or not all(size):
+        return False
+    width, height = size
+    if tag.has("width"):
+        # Keep the author's width and scale the height to match
+        try:
+            height = round(height * float(tag.get("width")) / width)
+        except ValueError:
+            return False
+    elif tag.has("height"):
+        return False
+    else:
+        tag.set("width", width)
+    tag.set("height", height)
+    return True
+
+
+def loading_priority(tag, state):
+    """The first image on a page loads eagerly at high priority; the rest load lazily"""
+    state["images"] = state.get("images", 0) + 1
+    if state["images"] == 1:
+        changed = False
+        if tag.get("loading") != "eager":
+            tag.set("loading", "eager")
+            changed = True
+        if not tag.has("fetchpriority"):
+            tag.set("fetchpriority", "high")
+            changed = True
+        return changed
+    if tag.has("loading"):
+        return False
+    tag.set("loading", "lazy")
+    return True
+
+
+def mark_picture(tag, state):
+    """Remember that the next <img> already sits inside an author-written <picture>"""
+    state["in_picture"] = True
+    return False
+
+
+def social_image(tag, state):
+    """Point og:image/twitter:image at the largest stripped JPEG variant"""
+    if tag.get("property", tag.get("name", "")).lower() not in SOCIAL_IMAGE_PROPERTIES:
+        return False
+    content = tag.get("content", "")
+    prefix, key = _source_key(content)
+    entry = _worker["manifest"].get(key)
+    if not entry:
+        return False
+    jpegs = [v for v in entry["variants"] if v["format"] == "jpeg"]
+    if not jpegs:
+        return False
+    largest = max(jpegs, key=lambda v: v["width"])
+    tag.set("content", content[:content.find(prefix) + len(prefix)] + f"variants/{largest['path']}")
+    return True
+
+
+RULES = (
+    RewriteRule("picture", ("picture",), mark_picture),
+    RewriteRule("picture", ("img",), picture_variants),
+    RewriteRule("dimensions", ("img",), intrinsic_dimensions),
+    RewriteRule("priority", ("img",), loading_priority),
+    RewriteRule("social", ("meta",), social_image),
+)
+
+
+def _init_worker(site_dir, manifest):
+    _worker.update(site_dir=str(site_dir), manifest=manifest, sizes={},
+                   rewriter=HTMLRewriter(RULES, markdown=False))
+
+
+def rewrite_pages(pages):
+    """Worker: rewrite a batch of (path, site-relative path) pages; returns merged rule counts"""
+    totals = {}
+    changed = 0
+    for path, page_rel in pages:
+        _, counts = _worker["rewriter"].rewrite_file(path, state={"page": page_rel})
+        if counts:
+            changed += 1
+        for rule, count in counts.items():
+            totals[rule] = totals.get(rule, 0) + count
+    return changed, totals
+
+
+def run(site_dir, jobs=None):
+    """Post-build stage: build variants into site/assets/images/variants and rewrite every page"""
+    site_dir = Path(site_dir)
+    if (site_dir / MANIFEST_NAME).exists():
+        # Variants were renamed to hashed names; regenerating them would orphan the pages' references
+        return "skipped: site assets are already fingerprinted"
+    image_dir = site_dir / "assets" / "images"
+    manifest = ImagePipeline(image_dir, image_dir / "variants", jobs=jobs).run() if image_dir.exists() else {}
+
+    pages = site_pages(site_dir)
+    results = process_pages(pages, rewrite_pages, _init_worker, (site_dir, manifest), jobs)
+
+    changed = 0
+    totals = {}
+    for batch_changed, counts in results:
+        changed += batch_changed
+        for rule, count in counts.items():
+            totals[rule] = totals.get(rule, 0) + count
+
+    details = ", ".join(f"{rule}: {count}" for rule, count in sorted(totals.items())) or "no changes"
+    return f"{len(manifest)} source images, {changed}/{len(pages)} pages rewritten ({details})"
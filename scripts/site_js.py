@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+JavaScript Bundle Stage
+Concatenates and minifies extra_javascript into one content-hashed, deferred bundle
+"""
+
+import gzip
+import os
+import posixpath
+import re
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from html_rewriter import HTMLRewriter, RewriteRule
+from link_index import LinkIndex
+from mkdocs_config import load_mkdocs_config
+from site_assets import hashed_name, process_pages, site_pages
+
+BUNDLE_NAME = "assets/js/bundle.js"
+BUNDLE_GLOB = "assets/js/bundle.*.js"
+# Globals that only exist for debugging in the browser console
+DEBUG_HOOKS = ("testCardClicks",)
+
+TOKEN_RE = re.compile(r'''
+    (?P<ws>\s+)
+  | (?P<line_comment>//[^\n]*)
+  | (?P<block_comment>/\*.*?\*/)
+  | (?P<string>"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+  | (?P<word>[\w$\u0080-\uffff]+)
+  | (?P<punct>.)
+''', re.VERBOSE | re.DOTALL)
+REGEX_RE = re.compile(r'/(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/[a-z]*')
+# A '/' after these starts a regex literal rather than a division
+REGEX_PRECEDING_WORDS = {
+    "return", "typeof", "instanceof", "case", "do", "else", "in", "of", "new", "delete", "void",
+    "throw", "yield", "await",
+}
+WORD_CHAR_RE = re.compile(r'[\w$\u0080-\uffff]')
+# Line breaks between these stay, since automatic semicolon insertion may depend on them
+NEWLINE_AFTER = set(")]}'\"`+-")
+NEWLINE_BEFORE = set("([{'\"`+-!~/")
+
+# Set in each worker by _init_worker
+_worker = {}
+
+
+def _template_end(js, position):
+    """Index just past the template literal starting at position, including any templates nested in ${}"""
+    index = position + 1
+    while index < len(js):
+        char = js[index]
+        if char == "\\":
+            index += 2
+            continue
+        if char == "`":
+            return index + 1
+        if js.startswith("${", index):
+            index = _substitution_end(js, index + 2)
+            continue
+        index += 1
+    return len(js)
+
+
+def _substitution_end(js, position):
+    """Index just past the '}' closing a ${ substitution whose body starts at position"""
+    depth = 0
+    while position < len(js):
+        if js[position] == "`":
+            position = _template_end(js, position)
+            continue
+        match = TOKEN_RE.match(js, position)
+        text = match.group()
+        if text == "{":
+            depth += 1
+        elif text == "}":
+            if depth == 0:
+                return match.end()
+            depth -= 1
+        position = match.end()
+    return len(js)
+
+
+def tokenize(js):
+    """[(kind, text)] with regex literals told apart from division by the preceding token"""
+    tokens = []
+    last = None
+    position = 0
+    while position < len(js):
+        if js[position] == "/" and not js.startswith(("//", "/*"), position) and (
+            last is None
+            or (last[0] == "punct" and last[1] not in ")]}")
+            or (last[0] == "word" and last[1] in REGEX_PRECEDING_WORDS)
+        ):
+            match = REGEX_RE.match(js, position)
+            if match:
+                last = ("regex", match.group())
+                tokens.append(last)
+                position = match.end()
+                continue
+        if js[position] == "`":
+            end = _template_end(js, position)
+            last = ("template", js[position:end])
+            tokens.append(last)
+            position = end
+            continue
+        match = TOKEN_RE.match(js, position)
+        kind = match.lastgroup
+        token = (kind, match.group())
+        tokens.append(token)
+        if kind not in ("ws", "line_comment", "block_comment"):
+            last = token
+        position = match.end()
+    return tokens
+
+
+def strip_debug_hooks(tokens, names=DEBUG_HOOKS):
+    """Drop `window.<name> = ...;` statements for the given debug globals"""
+    significant = [i for i, (kind, _) in enumerate(tokens) if kind not in ("ws", "line_comment", "block_comment")]
+    drop = set()
+    index = 0
+    while index + 4 < len(significant):
+        i, dot, name, eq = (significant[index + k] for k in range(4))
+        at_statement_start = index == 0 or tokens[significant[index - 1]][1] in (";", "}") or any(
+            "\n" in text for _, text in tokens[significant[index - 1] + 1:i])
+        if (at_statement_start and tokens[i] == ("word", "window") and tokens[dot] == ("punct", ".")
+                and tokens[name][0] == "word" and tokens[name][1] in names and tokens[eq] == ("punct", "=")
+                and tokens[significant[index + 4]] != ("punct", "=")):
+            depth = 0
+            end = index + 4
+            while end < len(significant):
+                kind, text = tokens[significant[end]]
+                if kind == "punct" and text in "([{":
+                    depth += 1
+                elif kind == "punct" and text in ")]}":
+                    depth -= 1
+                elif kind == "punct" and text == ";" and depth == 0:
+                    break
+                end += 1
+            last = significant[min(end, len(significant) - 1)]
+            drop.update(range(i, last + 1))
+            index = end + 1
+            continue
+        index += 1
+    return [token for i, token in enumerate(tokens) if i not in drop]
+
+
+def _is_word_char(char):
+    return bool(WORD_CHAR_RE.match(char))
+
+
+def minify_tokens(tokens):
+    """Drop comments and collapse whitespace, keeping the line breaks that may end a statement"""
+    out = []
+    pending = None
+    for kind, text in tokens:
+        if kind in ("ws", "line_comment", "block_comment"):
+            if kind == "line_comment" or "\n" in text:
+                pending = "\n"
+            elif pending is None:
+                pending = " "
+            continue
+        if out and pending:
+            previous, current = out[-1][-1], text[0]
+            both_words = _is_word_char(previous) and _is_word_char(current)
+            if pending == "\n" and (_is_word_char(previous) or previous in NEWLINE_AFTER) and (
+                    _is_word_char(current) or current in NEWLINE_BEFORE):
+                out.append("\n")
+            elif both_words or (previous in "+-" and current == previous) or (previous == "/" and kind == "regex"):
+                out.append(" ")
+        pending = None
+        out.append(text)
+    return "".join(out)
+
+
+def minify(js, strip_debug=True):
+    """Minified JavaScript, optionally without the DEBUG_HOOKS globals"""
+    tokens = tokenize(js)
+    if strip_debug:
+        tokens = strip_debug_hooks(tokens)
+    return minify_tokens(tokens).strip()
+
+
+def compressed_sizes(data):
+    """(gzip bytes, brotli bytes or None) for the given text or bytes"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    gzip_size = len(gzip.compress(data, compresslevel=9, mtime=0))
+    brotli_size = len(brotli.compress(data, quality=11)) if brotli else None
+    return gzip_size, brotli_size
+
+
+def local_scripts(config_file="mkdocs.yml"):
+    """Site-relative paths of the extra_javascript entries served from the site itself"""
+    config = load_mkdocs_config(config_file)
+    scripts = []
+    for entry in config.get("extra_javascript", []) or []:
+        # mkdocs 1.5+ also accepts {path: ..., defer: ..., type: ...}
+        path = entry.get("path", "") if isinstance(entry, dict) else entry
+        if path and "://" not in path and not path.startswith("//"):
+            scripts.append(path.lstrip("/"))
+    return scripts
+
+
+def bundle_script(tag, state):
+    """Point the first extra_javascript <script> at the deferred bundle and drop the rest"""
+    path, _ = LinkIndex.split_url(tag.get("src", ""))
+    if not path or LinkIndex.join(state["page"], path) not in _worker["scripts"]:
+        return False
+    if state.get("bundled"):
+        tag.remove()
+        return True
+    state["bundled"] = True
+    tag.set("src", posixpath.relpath(_worker["bundle"], posixpath.dirname(state["page"]) or "."))
+    if not tag.has("defer"):
+        tag.set("defer", "defer")
+    return True
+
+
+RULES = (RewriteRule("bundle", ("script",), bundle_script),)
+
+
+def _init_worker(scripts, bundle):
+    _worker.update(scripts=set(scripts), bundle=bundle, rewriter=HTMLRewriter(RULES, markdown=False))
+
+
+def _bundle_pages(pages):
+    changed = 0
+    for path, page_rel in pages:
+        _, counts = _worker["rewriter"].rewrite_file(path, state={"page": page_rel})
+        changed += bool(counts)
+    return changed
+
+
+def _size_text(raw, gzip_size, brotli_size):
+    brotli_text = f"{brotli_size / 1024:.1f} KB br" if brotli_size is not None else "br n/a"
+    return f"{raw / 1024:.1f} KB ({gzip_size / 1024:.1f} KB gzip, {brotli_text})"
+
+
+def run(site_dir, jobs=None):
+    """Post-build stage: replace the extra_javascript files with one minified, deferred bundle"""
+    site_dir = Path(site_dir)
+    scripts = [rel for rel in local_scripts() if (site_dir / rel).exists()]
+    if not scripts:
+        return "no unbundled scripts"
+
+    sources = [(site_dir / rel).read_text(encoding="utf-8") for rel in scripts]
+    # Each file was a separate classic script; ';' keeps one file's last statement from running into the next
+    bundle = ";\n".join(minify(source) for source in sources) + "\n"
+    bundle_rel = hashed_name(BUNDLE_NAME, bundle)
+    (site_dir / bundle_rel).parent.mkdir(parents=True, exist_ok=True)
+    (site_dir / bundle_rel).write_text(bundle, encoding="utf-8")
+
+    pages = sum(process_pages(site_pages(site_dir), _bundle_pages, _init_worker, (scripts, bundle_rel), jobs))
+    for rel in scripts:
+        os.remove(site_dir / rel)
+
+    before = [len(source.encode("utf-8")) for source in sources]
+    before_gzip, before_brotli = zip(*(compressed_sizes(source) for source in sources))
+    after_gzip, after_brotli = compressed_sizes(bundle)
+    before_brotli = None if None in before_brotli else sum(before_brotli)
+    return (f"{len(scripts)} scripts -> {bundle_rel}: "
+            f"{_size_text(sum(before), sum(before_gzip), before_brotli)} -> "
+            f"{_size_text(len(bundle.encode('utf-8')), after_gzip, after_brotli)}; "
+            f"{pages} pages updated")
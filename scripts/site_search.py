@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Search Index Stage
+Prunes the mkdocs-material search index, optionally shards it, and benchmarks query latency
+"""
+
+import bisect
+import gzip
+import json
+import math
+import re
+import statistics
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from html_rewriter import write_atomic
+from link_index import LinkIndex
+from mkdocs_config import load_mkdocs_config, plugin_configs
+from site_assets import content_hash
+
+INDEX_PATH = "search/search_index.json"
+SHARD_DIR = "search/shards"
+SHARD_MANIFEST = "search/search_manifest.json"
+MAX_SECTION_CHARS = 2000
+# Shorter texts are too generic to count as duplicates
+MIN_DUPLICATE_CHARS = 200
+DEFAULT_SEPARATOR = r'[\s\-]+'
+TAG_RE = re.compile(r'<[^>]*>')
+CATEGORY_LINK_RE = re.compile(r'''href=["']([^"'#?]*category/[^"'#?]+)["']''')
+YEAR_RE = re.compile(r'/(\d{4})/')
+
+# Field boosts used by mkdocs-material's search worker
+FIELD_BOOSTS = {"title": 1000, "text": 1, "tags": 1000000}
+BM25_K1 = 1.2
+BM25_B = 0.75
+# lunr's English stop word list, abridged to the words that actually occur in prose
+STOP_WORDS = set("""
+a able about across after all almost also am among an and any are as at be because been but by can cannot
+could dear did do does either else ever every for from get got had has have he her hers him his how however
+i if in into is it its just least let like likely may me might most must my neither no nor not of off often
+on only or other our own rather said say says she should since so some than that the their them then there
+these they this tis to too twas us wants was we were what when where which while who whom why will with
+would yet you your
+""".split())
+
+
+# --- Pruning and sharding -----------------------------------------------------------
+
+def load_index(site_dir):
+    with open(Path(site_dir) / INDEX_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def dump_index(index):
+    """Compact JSON, as served"""
+    return json.dumps(index, ensure_ascii=False, separators=(",", ":"))
+
+
+def _truncate(text, limit):
+    """text cut at a word boundary before limit, never inside a tag"""
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, limit)
+    cut = cut if cut > 0 else limit
+    open_tag = text.rfind("<", 0, cut)
+    if open_tag > text.rfind(">", 0, cut):
+        cut = open_tag
+    return text[:cut].rstrip() + "…"
+
+
+def listing_locations(config):
+    """Location prefixes of blog index, archive, category and pagination pages, which only repeat post excerpts"""
+    prefixes = []
+    for name, options in plugin_configs(config).items():
+        if name.split("/")[-1] == "blog":
+            blog_dir = (options.get("blog_dir") or "blog").strip("/")
+            prefixes.append(blog_dir + "/")
+    return prefixes
+
+
+def _is_listing(location, prefixes):
+    for prefix in prefixes:
+        if location == prefix or location.startswith(prefix + "#"):
+            return True
+        rest = location[len(prefix):] if location.startswith(prefix) else None
+        if rest is not None and rest.startswith(("page/", "archive/", "category/")):
+            return True
+    return False
+
+
+def prune_index(index, listing_prefixes=(), max_section_chars=MAX_SECTION_CHARS):
+    """(pruned index, stats): drop duplicate entries and texts, cap section length"""
+    stats = Counter()
+    seen_locations = set()
+    seen_texts = set()
+    docs = []
+    for doc in index.get("docs", []):
+        location = doc.get("location", "")
+        if location in seen_locations:
+            stats["duplicate_entries"] += 1
+            continue
+        seen_locations.add(location)
+        doc = dict(doc)
+        text = doc.get("text", "")
+        if text and _is_listing(location, listing_prefixes):
+            # Blog listings repeat the excerpts of posts that are indexed in full
+            doc["text"] = ""
+            stats["listing_texts"] += 1
+        elif len(text) >= MIN_DUPLICATE_CHARS:
+            key = content_hash(" ".join(TAG_RE.sub(" ", text).split()))
+            if key in seen_texts:
+                doc["text"] = ""
+                stats["duplicate_texts"] += 1
+            else:
+                seen_texts.add(key)
+                truncated = _truncate(text, max_section_chars)
+                if truncated != text:
+                    doc["text"] = truncated
+                    stats["truncated_sections"] += 1
+        if not doc.get("tags"):
+            doc.pop("tags", None)
+        docs.append(doc)
+    pruned = dict(index)
+    pruned["docs"] = docs
+    return pruned, stats
+
+
+def _post_category(site_dir, page_location):
+    """Slug of the first category a built blog post links to, or None"""
+    page_rel = page_location.split("#", 1)[0]
+    page_rel = page_rel + "index.html" if page_rel.endswith("/") or not page_rel else page_rel
+    path = Path(site_dir) / page_rel
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for href in CATEGORY_LINK_RE.findall(f.read()):
+            target = LinkIndex.join(page_rel, LinkIndex.split_url(href)[0])
+            if target and "/category/" in f"/{target}":
+                return target.rstrip("/").rsplit("/", 1)[-1]
+    return None
+
+
+def shard_key(location, by, site_dir, listing_prefixes, categories):
+    """Shard for one index entry: 'pages' for non-post pages, else the post's year or category"""
+    page = location.split("#", 1)[0]
+    in_blog = any(page.startswith(prefix) for prefix in listing_prefixes) and not _is_listing(page, listing_prefixes)
+    if not in_blog:
+        return "pages"
+    if by == "year":
+        match = YEAR_RE.search("/" + page)
+        return match.group(1) if match else "pages"
+    if page not in categories:
+        categories[page] = _post_category(site_dir, page)
+    return categories[page] or "uncategorized"
+
+
+def shard_index(index, by, site_dir, listing_prefixes):
+    """({shard: index}, manifest) with the shared config repeated in each shard"""
+    shards = defaultdict(list)
+    categories = {}
+    for doc in index["docs"]:
+        shards[shard_key(doc["location"], by, site_dir, listing_prefixes, categories)].append(doc)
+    indexes = {key: {"config": index.get("config", {}), "docs": docs} for key, docs in sorted(shards.items())}
+    manifest = {"config": index.get("config", {}), "shard_by": by, "shards": []}
+    for key, shard in indexes.items():
+        data = dump_index(shard)
+        manifest["shards"].append({
+            "key": key,
+            "path": f"shards/{key}.{content_hash(data)}.json",
+            "docs": len(shard["docs"]),
+            "bytes": len(data.encode("utf-8")),
+            "titles": sorted({doc["title"] for doc in shard["docs"] if "#" not in doc["location"]}),
+        })
+    return indexes, manifest
+
+
+def write_shards(site_dir, indexes, manifest):
+    site_dir = Path(site_dir)
+    shard_dir = site_dir / SHARD_DIR
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    for stale in shard_dir.glob("*.json"):
+        stale.unlink()
+    for entry in manifest["shards"]:
+        write_atomic(site_dir / "search" / entry["path"], dump_index(indexes[entry["key"]]))
+    write_atomic(site_dir / SHARD_MANIFEST, json.dumps(manifest, ensure_ascii=False, separators=(",", ":")))
+
+
+# --- Query benchmark -------------------------------------------------------------
+
+class SearchEngine:
+    """BM25 over title/text/tags with lunr's field boosts and trailing-wildcard prefix matching"""
+
+    def __init__(self, index):
+        config = index.get("config", {})
+        self.separator = re.compile(config.get("separator") or DEFAULT_SEPARATOR)
+        self.docs = index.get("docs", [])
+        self.postings = defaultdict(lambda: defaultdict(dict))
+        self.lengths = {field: [] for field in FIELD_BOOSTS}
+        for doc_id, doc in enumerate(self.docs):
+            for field in FIELD_BOOSTS:
+                value = doc.get(field, "")
+                terms = self.tokenize(" ".join(value) if isinstance(value, list) else value)
+                self.lengths[field].append(len(terms))
+                for term, count in Counter(terms).items():
+                    self.postings[term][field][doc_id] = count
+        self.average = {field: (sum(lengths) / len(lengths) if lengths else 0) or 1
+                        for field, lengths in self.lengths.items()}
+        self.terms = sorted(self.postings)
+
+    def tokenize(self, text):
+        return [
+            token for token in self.separator.split(TAG_RE.sub(" ", text).lower())
+            if token and token not in STOP_WORDS
+        ]
+
+    def _expand(self, term):
+        start = bisect.bisect_left(self.terms, term)
+        end = bisect.bisect_left(self.terms, term + "\uffff")
+        return self.terms[start:end]
+
+    def search(self, query, limit=10):
+        scores = defaultdict(float)
+        total = len(self.docs)
+        for query_term in self.tokenize(query):
+            for term in self._expand(query_term):
+                # Exact matches outrank the prefix matches of search-as-you-type
+                weight = 1.0 if term == query_term else 0.1
+                for field, postings in self.postings[term].items():
+                    idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                    average = self.average[field]
+                    for doc_id, count in postings.items():
+                        norm = 1 - BM25_B + BM25_B * self.lengths[field][doc_id] / average
+                        tf = count * (BM25_K1 + 1) / (count + BM25_K1 * norm)
+                        scores[doc_id] += weight * FIELD_BOOSTS[field] * idf * tf
+        ranked = sorted(scores.items(), key=lambda item: -item[1])[:limit]
+        return [self.docs[doc_id]["location"] for doc_id, _ in ranked]
+
+
+def sample_queries(index, count=40):
+    """Deterministic queries from page titles, plus prefixes as typed in the search box"""
+    titles = [doc["title"] for doc in index.get("docs", []) if doc.get("title")]
+    words = [word for title in titles for word in re.findall(r'[A-Za-z]{4,}', title)]
+    queries = []
+    for word in sorted(set(words), key=words.index)[:count // 2]:
+        queries.extend([word.lower(), word.lower()[:3]])
+    return queries or ["search"]
+
+
+def benchmark(index, queries, repeat=5):
+    """{build_ms, p50_ms, p95_ms, bytes, gzip_bytes} for building the engine and running the queries"""
+    start = time.perf_counter()
+    engine = SearchEngine(index)
+    build_ms = (time.perf_counter() - start) * 1000
+    timings = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            engine.search(query)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    data = dump_index(index).encode("utf-8")
+    return {
+        "build_ms": build_ms,
+        "p50_ms": statistics.median(timings),
+        "p95_ms": timings[int(len(timings) * 0.95) - 1] if len(timings) > 1 else timings[0],
+        "bytes": len(data),
+        "gzip_bytes": len(gzip.compress(data, compresslevel=9, mtime=0)),
+        "docs": len(index.get("docs", [])),
+    }
+
+
+def benchmark_text(result):
+    return (f"{result['docs']} entries, {result['bytes'] / 1024:.1f} KB ({result['gzip_bytes'] / 1024:.1f} KB gzip), "
+            f"index build {result['build_ms']:.1f} ms, query p50 {result['p50_ms']:.3f} ms / "
+            f"p95 {result['p95_ms']:.3f} ms")
+
+
+# --- Post-build stage -------------------------------------------------------------
+
+def optimize(site_dir, max_section_chars=MAX_SECTION_CHARS, shard_by=None, repeat=5, config_file="mkdocs.yml"):
+    """Prune (and optionally shard) the site's search index; returns (stats, before, after benchmarks)"""
+    site_dir = Path(site_dir)
+    listing_prefixes = listing_locations(load_mkdocs_config(config_file))
+    index = load_index(site_dir)
+    pruned, stats = prune_index(index, listing_prefixes, max_section_chars)
+    queries = sample_queries(index)
+    before, after = benchmark(index, queries, repeat), benchmark(pruned, queries, repeat)
+    write_atomic(site_dir / INDEX_PATH, dump_index(pruned))
+    if shard_by:
+        indexes, manifest = shard_index(pruned, shard_by, site_dir, listing_prefixes)
+        write_shards(site_dir, indexes, manifest)
+        stats["shards"] = len(manifest["shards"])
+    return stats, before, after
+
+
+def run(site_dir, jobs=None):
+    """Post-build stage: prune search/search_index.json and report size and query latency"""
+    if not (Path(site_dir) / INDEX_PATH).exists():
+        return "no search index"
+    stats, before, after = optimize(site_dir)
+    changes = ", ".join(f"{name.replace('_', ' ')}: {count}" for name, count in sorted(stats.items())) or "no changes"
+    return f"{changes}; before {benchmark_text(before)}; after {benchmark_text(after)}"
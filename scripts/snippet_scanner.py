@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Snippet Include Scanner
+Finds the files a page pulls in through pymdownx.snippets, without needing Markdown installed
+"""
+
+import os
+import re
+from pathlib import Path
+
+SNIPPET_LINE_RE = re.compile(r'^\s*;?-{1,}8<-{1,}\s+(["\']?)([^"\'\s]+)\1\s*$', re.MULTILINE)
+SNIPPET_BLOCK_RE = re.compile(r'^\s*-{1,}8<-{1,}\s*$\n(.*?)^\s*-{1,}8<-{1,}\s*$', re.MULTILINE | re.DOTALL)
+MAX_SNIPPET_DEPTH = 4
+
+
+def snippet_paths(markdown):
+    """Every include named by a --8<-- line or block, in order"""
+    for match in SNIPPET_LINE_RE.finditer(markdown):
+        yield match.group(2)
+    for match in SNIPPET_BLOCK_RE.finditer(markdown):
+        for line in match.group(1).splitlines():
+            line = line.strip()
+            if line and not line.startswith(";"):
+                yield line
+
+
+def _resolve_snippets(markdown, base_paths, depth=0):
+    if depth > MAX_SNIPPET_DEPTH:
+        return
+    for name in snippet_paths(markdown):
+        if "://" in name:
+            # Remote snippets are only fetched when url_download is on; the URL stands in for the content
+            yield name, None
+            continue
+        # "file.md:3:10" selects lines; the whole file counts either way
+        path = name if os.path.exists(name) else name.split(":", 1)[0]
+        for base in base_paths:
+            candidate = Path(base) / path
+            if candidate.is_file():
+                yield name, candidate
+                yield from _resolve_snippets(candidate.read_text(encoding="utf-8", errors="replace"),
+                                             base_paths, depth + 1)
+                break
+        else:
+            yield name, None
+
+
+def resolve_snippets(markdown, options):
+    """(name, resolved path or None) for every include of markdown, recursively, given the extension's options"""
+    base_paths = options.get("base_path", ["."])
+    base_paths = [base_paths] if isinstance(base_paths, str) else base_paths
+    appended = "".join(f'\n--8<-- "{name}"' for name in options.get("auto_append", []))
+    return list(_resolve_snippets(markdown + appended, base_paths))
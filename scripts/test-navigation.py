@@ -4,62 +4,71 @@ Navigation and Cross-Page Functionality Test Script
 Tests all internal links, navigation flow, and responsive design elements
 """
 
-import os
+import argparse
 import re
 import sys
-import yaml
 from pathlib import Path
-from urllib.parse import urljoin, urlparse
+
+import dep_graph
+import instrumentation
+from doc_corpus import get_corpus
+from heading_index import HeadingIndex
+from link_index import LinkIndex
+from mkdocs_config import load_mkdocs_config
+from validation_cache import ValidationCache
 
 class NavigationTester:
-    def __init__(self, docs_dir="docs"):
+    def __init__(self, docs_dir="docs", use_cache=True, scope=None):
         self.docs_dir = Path(docs_dir)
+        self.scope = scope
+        self.corpus = get_corpus(docs_dir)
+        self.link_index = LinkIndex.from_corpus(self.corpus)
+        self.cache = None
+        if use_cache:
+            self.cache = ValidationCache("navigation")
+            self.cache.attach(self.corpus)
         self.errors = []
         self.warnings = []
         self.tested_links = set()
+        self._config = None
+        self._heading_index = None
         
     def load_mkdocs_config(self):
         """Load MkDocs configuration"""
-        try:
-            with open("mkdocs.yml", "r", encoding="utf-8") as f:
-                content = f.read()
-                # Replace environment variables that cause YAML parsing issues
-                content = re.sub(r'!ENV\s+\w+', '"ENV_PLACEHOLDER"', content)
-                return yaml.safe_load(content)
-        except Exception as e:
-            self.warnings.append(f"Could not fully parse mkdocs.yml: {e}")
-            return {}
+        if self._config is None:
+            try:
+                self._config = load_mkdocs_config("mkdocs.yml")
+            except Exception as e:
+                self.warnings.append(f"Could not fully parse mkdocs.yml: {e}")
+                self._config = {}
+        return self._config
+    
+    def get_heading_index(self):
+        """Build the per-page anchor index once, on first use"""
+        if self._heading_index is None:
+            self._heading_index = HeadingIndex(self.corpus, self.load_mkdocs_config())
+        return self._heading_index
     
     def get_all_markdown_files(self):
-        """Get all markdown files in the docs directory"""
-        md_files = []
-        for file_path in self.docs_dir.rglob("*.md"):
-            if file_path.is_file():
-                md_files.append(file_path)
-        return md_files
+        """Get all markdown documents in the docs directory, limited to the affected ones with --changed"""
+        if self.scope is None:
+            return list(self.corpus)
+        return [doc for doc in self.corpus if self.scope.covers_page(doc.rel_path)]
     
-    def extract_links_from_file(self, file_path):
-        """Extract all internal links from a markdown file"""
+    def skipped(self, check):
+        """True (after saying so) when --changed leaves a whole-site check unaffected"""
+        if self.scope is None or self.scope.needs(check):
+            return False
+        print(f"⏭️  Skipped: no changed file affects {check}")
+        return True
+    
+    def extract_links_from_file(self, doc):
+        """Extract all internal links from a markdown document"""
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                content = f.read()
-            
-            # Extract markdown links [text](url) - but exclude code blocks and template syntax
-            # First, remove code blocks and template syntax to avoid false positives
-            content_no_code = re.sub(r'```.*?```', '', content, flags=re.DOTALL)
-            content_no_code = re.sub(r'`[^`]*`', '', content_no_code)
-            content_no_code = re.sub(r'\{\{[^}]*\}\}', '', content_no_code)  # Remove Jinja2 template syntax
-            
-            # Extract markdown links [text](url)
-            markdown_links = re.findall(r'\[([^\]]*)\]\(([^)]+)\)', content_no_code)
-            
-            # Extract HTML links href="url"
-            html_links = re.findall(r'href=["\']([^"\']+)["\']', content_no_code)
-            
             links = []
             
-            # Process markdown links
-            for text, url in markdown_links:
+            # Extract markdown links [text](url) from the code-stripped view
+            for text, url in doc.markdown_links:
                 # Skip if it looks like a Python function call or variable
                 if not (url.isalpha() and len(url) < 20 and not '/' in url and not '.' in url):
                     if self.is_internal_link(url):
@@ -67,23 +76,23 @@ class NavigationTester:
                             'text': text,
                             'url': url,
                             'type': 'markdown',
-                            'file': file_path
+                            'file': doc.path
                         })
             
-            # Process HTML links
-            for url in html_links:
+            # Process HTML links href="url"
+            for url in doc.html_links:
                 if self.is_internal_link(url):
                     links.append({
                         'text': '',
                         'url': url,
                         'type': 'html',
-                        'file': file_path
+                        'file': doc.path
                     })
             
             return links
             
         except Exception as e:
-            self.errors.append(f"Failed to read {file_path}: {e}")
+            self.errors.append(f"Failed to read {doc.path}: {e}")
             return []
     
     def is_internal_link(self, url):
@@ -98,65 +107,28 @@ class NavigationTester:
         return True
     
     def normalize_link(self, url, source_file):
-        """Normalize a link to check if the target file exists"""
-        # Remove anchors
-        url = url.split('#')[0]
-        
-        # Handle relative paths
-        if url.startswith('./'):
-            url = url[2:]
-        elif url.startswith('../'):
-            # Handle parent directory references
-            source_dir = source_file.parent
-            while url.startswith('../'):
-                url = url[3:]
-                source_dir = source_dir.parent
-            url = source_dir / url
-        else:
-            # Relative to source file directory
-            if not url.startswith('/'):
-                url = source_file.parent / url
-            else:
-                # Absolute path from docs root
-                url = self.docs_dir / url.lstrip('/')
-        
-        return Path(url)
+        """Normalize a link to a docs-relative path (None if it leaves docs/)"""
+        source_rel = Path(source_file).relative_to(self.docs_dir).as_posix()
+        url_path, _ = LinkIndex.split_url(url)
+        return self.link_index.join(source_rel, url_path)
     
     def check_link_target(self, link):
-        """Check if a link target exists"""
-        url = link['url']
-        source_file = link['file']
+        """Check if a link target exists using the in-memory link index"""
+        target_rel = self.normalize_link(link['url'], link['file'])
+        if target_rel is None:
+            return False, link['url']
         
-        # Normalize the target path
-        target_path = self.normalize_link(url, source_file)
+        resolved = self.link_index.resolve(target_rel)
+        if resolved is not None:
+            return True, str(self.docs_dir / resolved)
         
-        # Check if it's a markdown file without extension
-        if not target_path.suffix and not target_path.exists():
-            md_target = target_path.with_suffix('.md')
-            if md_target.exists():
-                target_path = md_target
-        
-        # Check if target exists
-        if target_path.exists():
-            return True, str(target_path)
-        
-        # Check if it's a directory with index.md
-        if target_path.is_dir():
-            index_file = target_path / 'index.md'
-            if index_file.exists():
-                return True, str(index_file)
-        
-        # Check if it's referencing a built HTML file
-        if url.endswith('.html'):
-            md_file = self.docs_dir / url.replace('.html', '.md')
-            if md_file.exists():
-                return True, str(md_file)
-        
-        return False, str(target_path)
+        return False, str(self.docs_dir / target_rel)
     
     def test_navigation_structure(self):
         """Test the navigation structure defined in mkdocs.yml"""
         print("Testing navigation structure...")
+        if self.skipped("nav"):
+            return
         
         config = self.load_mkdocs_config()
         nav = config.get('nav', [])
@@ -170,8 +142,7 @@ class NavigationTester:
                 for title, path in item.items():
                     if isinstance(path, str):
                         # Check if the file exists
-                        file_path = self.docs_dir / path
-                        if not file_path.exists():
+                        if not self.link_index.exists(path):
                             self.errors.append(f"Navigation item '{title}' points to non-existent file: {path}")
                         else:
                             print(f"{'  ' * level}✓ {title} -> {path}")
@@ -180,8 +151,7 @@ class NavigationTester:
                         for sub_item in path:
                             check_nav_item(sub_item, level + 1)
             elif isinstance(item, str):
-                file_path = self.docs_dir / item
-                if not file_path.exists():
+                if not self.link_index.exists(item):
                     self.errors.append(f"Navigation item points to non-existent file: {item}")
                 else:
                     print(f"{'  ' * level}✓ {item}")
@@ -194,42 +164,71 @@ class NavigationTester:
         print("\nTesting internal links...")
         
         md_files = self.get_all_markdown_files()
+        heading_index = self.get_heading_index()
         total_links = 0
         broken_links = 0
+        broken_anchors = 0
         
-        for md_file in md_files:
-            links = self.extract_links_from_file(md_file)
+        for doc in md_files:
+            # Resolved targets only change when this file or the set of existing files changes
+            resolved = None
+            if self.cache:
+                resolved = self.cache.get_result(doc, 'links', self.corpus.fingerprint)
+            if resolved is None:
+                resolved = [
+                    [link['url'], *self.check_link_target(link)]
+                    for link in self.extract_links_from_file(doc)
+                ]
+                if self.cache:
+                    self.cache.set_result(doc, 'links', resolved, self.corpus.fingerprint)
             
-            for link in links:
+            for url, exists, target in resolved:
                 total_links += 1
-                link_key = f"{link['file']}:{link['url']}"
+                link_key = f"{doc.path}:{url}"
                 
                 if link_key in self.tested_links:
                     continue
                 
                 self.tested_links.add(link_key)
                 
-                exists, target = self.check_link_target(link)
-                
                 if exists:
-                    print(f"✓ {link['url']} -> {target}")
+                    print(f"✓ {url} -> {target}")
+                    _, fragment = LinkIndex.split_url(url)
+                    target_rel = Path(target).relative_to(self.docs_dir).as_posix()
+                    if fragment and not heading_index.has_anchor(target_rel, fragment):
+                        broken_anchors += 1
+                        self.errors.append(
+                            f"Broken anchor in {doc.path}: '{url}' -> no '#{fragment}' in {target}"
+                        )
                 else:
                     broken_links += 1
                     self.errors.append(
-                        f"Broken link in {link['file']}: '{link['url']}' -> {target}"
+                        f"Broken link in {doc.path}: '{url}' -> {target}"
                     )
+            
+            # In-page anchors are skipped by is_internal_link, so check them here
+            for url in [url for _, url in doc.markdown_links] + doc.html_links:
+                fragment = url[1:]
+                if not url.startswith('#') or not fragment:
+                    continue
+                total_links += 1
+                if not heading_index.has_anchor(doc.rel_path, fragment):
+                    broken_anchors += 1
+                    self.errors.append(f"Broken anchor in {doc.path}: '{url}'")
         
-        print(f"\nLink Summary: {total_links} total, {broken_links} broken")
+        print(f"\nLink Summary: {total_links} total, {broken_links} broken, {broken_anchors} broken anchors")
     
     def test_cross_page_references(self):
         """Test specific cross-page references mentioned in requirements"""
         print("\nTesting cross-page references...")
+        if self.scope is not None and not self.scope.covers_page("index.md"):
+            print("⏭️  Skipped: home page not affected")
+            return
         
         # Test home page links to other sections
-        home_file = self.docs_dir / "index.md"
-        if home_file.exists():
-            with open(home_file, "r", encoding="utf-8") as f:
-                content = f.read()
+        home_doc = self.corpus.get("index.md")
+        if home_doc is not None:
+            content = home_doc.content
             
             # Check for portfolio links
             if "portfolio/" in content:
@@ -252,6 +251,8 @@ class NavigationTester:
     def test_responsive_design_elements(self):
         """Test for responsive design CSS classes and elements"""
         print("\nTesting responsive design elements...")
+        if self.skipped("assets"):
+            return
         
         css_file = Path("docs/stylesheets/custom.css")
         if css_file.exists():
@@ -286,26 +287,24 @@ class NavigationTester:
         
         md_files = self.get_all_markdown_files()
         
-        for md_file in md_files:
-            with open(md_file, "r", encoding="utf-8") as f:
-                content = f.read()
-            
+        for doc in md_files:
             # Check for alt text in images
-            images = re.findall(r'!\[([^\]]*)\]\([^)]+\)', content)
-            for alt_text in images:
+            for alt_text, _ in doc.images:
                 if alt_text.strip():
-                    print(f"✓ Image with alt text in {md_file.name}: '{alt_text}'")
+                    print(f"✓ Image with alt text in {doc.name}: '{alt_text}'")
                 else:
-                    self.warnings.append(f"Image without alt text in {md_file}")
+                    self.warnings.append(f"Image without alt text in {doc.path}")
             
             # Check for ARIA labels
-            aria_labels = re.findall(r'aria-label=["\']([^"\']+)["\']', content)
+            aria_labels = doc.aria_labels
             if aria_labels:
-                print(f"✓ Found {len(aria_labels)} ARIA labels in {md_file.name}")
+                print(f"✓ Found {len(aria_labels)} ARIA labels in {doc.name}")
     
     def test_javascript_functionality(self):
         """Test for JavaScript files and functionality"""
         print("\nTesting JavaScript functionality...")
+        if self.skipped("assets"):
+            return
         
         js_dir = Path("docs/assets/js")
         if js_dir.exists():
@@ -339,6 +338,9 @@ class NavigationTester:
         self.test_accessibility_elements()
         self.test_javascript_functionality()
         
+        if self.cache:
+            self.cache.save()
+        
         print("\n" + "=" * 60)
         print("📊 Test Results Summary")
         print("=" * 60)
@@ -364,8 +366,17 @@ class NavigationTester:
 
 def main():
     """Main function to run the navigation tests"""
-    tester = NavigationTester()
+    parser = argparse.ArgumentParser(description="Navigation and cross-page functionality tests")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Reprocess every file instead of using .cache/validation")
+    dep_graph.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    
+    tester = NavigationTester(use_cache=not args.no_cache, scope=dep_graph.from_arguments(args))
+    timings = instrumentation.from_arguments(tester, args)
     success = tester.run_all_tests()
+    instrumentation.finish(timings, args)
     
     # Exit with appropriate code
     sys.exit(0 if success else 1)
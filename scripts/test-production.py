@@ -7,52 +7,139 @@ Comprehensive testing for production deployment readiness
 import os
 import re
 import sys
-import json
 import time
-import subprocess
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from pathlib import Path
-from urllib.parse import urljoin, urlparse
+
+import dep_graph
+import instrumentation
+import site_compress
+import site_fingerprint
+import site_js
+from build_cache import ensure_build
+from html_scanner import scan_html, scan_many
+from link_index import LinkIndex
+
+# Below this many pages a worker pool costs more than it saves
+PARALLEL_THRESHOLD = 200
+BATCH_SIZE = 64
 
 class ProductionTester:
-    def __init__(self, site_dir="site"):
+    def __init__(self, site_dir="site", time_budget=300, jobs=None, verbose=None, scope=None):
         self.site_dir = Path(site_dir)
+        self.scope = scope
+        self.time_budget = time_budget
+        self.jobs = jobs or os.cpu_count() or 1
+        self.verbose = verbose
         self.errors = []
         self.warnings = []
         self.performance_issues = []
+        self.page_facts = {}
+        self.post_processed = None
+        self._audited = False
+        
+    def get_html_pages(self):
+        """All generated pages, excluding template files, limited to the affected ones with --changed"""
+        return [
+            html_file for html_file in sorted(self.site_dir.glob("**/*.html"))
+            if not (html_file.name == "main.html" or "overrides" in str(html_file))
+            and (self.scope is None or self.scope.covers_output(html_file.relative_to(self.site_dir).as_posix()))
+        ]
+    
+    def page_name(self, html_file):
+        """Page path relative to the site root, for messages"""
+        return html_file.relative_to(self.site_dir).as_posix()
+    
+    def is_post_processed(self):
+        """True when the site went through scripts/post-build.py (the build here always does)"""
+        if self.post_processed is None:
+            self.post_processed = (self.site_dir / site_fingerprint.MANIFEST_NAME).exists()
+        return self.post_processed
+    
+    def skipped(self, check):
+        """True (after saying so) when --changed leaves a whole-site check unaffected"""
+        if self.scope is None or self.scope.needs(check):
+            return False
+        print(f"⏭️  Skipped: no changed file affects {check}")
+        return True
+    
+    def audit_pages(self):
+        """Scan every generated page once, in a worker pool, within the time budget"""
+        print("\nAuditing generated pages...")
+        self._audited = True
+        
+        pages = [page for page in self.get_html_pages() if page not in self.page_facts]
+        if self.verbose is None:
+            self.verbose = len(pages) <= 25
+        
+        start = time.perf_counter()
+        if self.jobs == 1 or len(pages) < PARALLEL_THRESHOLD:
+            for page in pages:
+                if time.perf_counter() - start > self.time_budget:
+                    break
+                self.page_facts[page] = scan_html(page)
+        else:
+            batches = [pages[i:i + BATCH_SIZE] for i in range(0, len(pages), BATCH_SIZE)]
+            pool = ProcessPoolExecutor(max_workers=self.jobs)
+            futures = [pool.submit(scan_many, batch) for batch in batches]
+            try:
+                for future in as_completed(futures, timeout=self.time_budget):
+                    for facts in future.result():
+                        self.page_facts[facts.path] = facts
+            except FuturesTimeoutError:
+                pass
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+        elapsed = time.perf_counter() - start
+        
+        scanned = sum(1 for page in pages if page in self.page_facts)
+        rate = scanned / elapsed if elapsed > 0 else float(scanned)
+        print(f"✓ Audited {scanned}/{len(pages)} pages in {elapsed:.2f}s ({rate:.0f} pages/s)")
+        
+        if scanned < len(pages):
+            self.warnings.append(
+                f"{len(pages) - scanned} pages not audited within the {self.time_budget}s time budget"
+            )
+    
+    def audited_pages(self):
+        """(page, facts) for every page scanned by audit_pages, in a stable order"""
+        if not self._audited:
+            self.audit_pages()
+        return [(page, self.page_facts[page]) for page in self.get_html_pages() if page in self.page_facts]
+    
+    def report_ok(self, message):
+        """Print a per-page success line only when verbose; failures are always recorded"""
+        if self.verbose:
+            print(message)
         
     def test_build_process(self):
-        """Test the MkDocs build process"""
+        """Test the MkDocs build process plus post-build stages, reusing a cached build of the same inputs"""
         print("Testing build process...")
         
-        try:
-            # Clean build
-            result = subprocess.run(
-                ["mkdocs", "build", "--strict", "--clean"],
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-            
-            if result.returncode == 0:
-                print("✓ Build process completed successfully")
-                if result.stderr:
-                    print(f"  Build warnings: {result.stderr}")
-            else:
-                self.errors.append(f"Build failed: {result.stderr}")
-                return False
-                
-        except subprocess.TimeoutExpired:
-            self.errors.append("Build process timed out after 60 seconds")
-            return False
-        except Exception as e:
-            self.errors.append(f"Build process error: {e}")
+        build = ensure_build(strict=True, timeout=60, post_process=True)
+        
+        if not build.success:
+            self.errors.append(f"Build failed: {build.stderr}")
             return False
-            
+        
+        if build.reused:
+            print(f"✓ Reusing existing build {build.key} (inputs unchanged)")
+        else:
+            print("✓ Build process completed successfully")
+        if build.stderr:
+            print(f"  Build warnings: {build.stderr}")
+        
+        self.site_dir = build.site_dir
+        self.post_processed = build.post_processed
         return True
     
     def test_generated_files(self):
         """Test that all expected files are generated"""
         print("\nTesting generated files...")
+        if self.skipped("sitemap"):
+            return
         
         if not self.site_dir.exists():
             self.errors.append(f"Site directory {self.site_dir} does not exist")
@@ -101,109 +188,86 @@ class ProductionTester:
         """Test HTML validity and structure"""
         print("\nTesting HTML validity...")
         
-        html_files = list(self.site_dir.glob("**/*.html"))
+        pages = self.audited_pages()
         
-        for html_file in html_files[:10]:  # Test first 10 files to avoid overwhelming output
-            # Skip template files
-            if html_file.name == "main.html" or "overrides" in str(html_file):
+        for html_file, facts in pages:
+            if facts.error:
+                self.errors.append(f"Error reading {html_file}: {facts.error}")
                 continue
-                
-            try:
-                with open(html_file, "r", encoding="utf-8") as f:
-                    content = f.read()
-                
-                # Basic HTML structure checks
-                if not re.search(r'<!doctype html>|<!DOCTYPE html>', content, re.IGNORECASE):
-                    self.warnings.append(f"Missing DOCTYPE in {html_file.name}")
-                
-                if not re.search(r'<html[^>]*>', content, re.IGNORECASE):
-                    self.errors.append(f"Missing HTML tag in {html_file.name}")
-                
-                if not re.search(r'<head[^>]*>', content, re.IGNORECASE):
-                    self.errors.append(f"Missing HEAD tag in {html_file.name}")
-                
-                if not re.search(r'<body[^>]*>', content, re.IGNORECASE):
-                    self.errors.append(f"Missing BODY tag in {html_file.name}")
-                
-                # Check for meta viewport
-                if not re.search(r'<meta[^>]*viewport[^>]*>', content, re.IGNORECASE):
-                    self.warnings.append(f"Missing viewport meta tag in {html_file.name}")
-                
-                # Check for title tag
-                if not re.search(r'<title>[^<]+</title>', content, re.IGNORECASE):
-                    self.warnings.append(f"Missing or empty title tag in {html_file.name}")
-                
-                print(f"✓ Basic HTML structure valid for {html_file.name}")
-                
-            except Exception as e:
-                self.errors.append(f"Error reading {html_file}: {e}")
+            
+            # Basic HTML structure checks
+            if not facts.has_doctype:
+                self.warnings.append(f"Missing DOCTYPE in {self.page_name(html_file)}")
+            
+            if not facts.has_html:
+                self.errors.append(f"Missing HTML tag in {self.page_name(html_file)}")
+            
+            if not facts.has_head:
+                self.errors.append(f"Missing HEAD tag in {self.page_name(html_file)}")
+            
+            if not facts.has_body:
+                self.errors.append(f"Missing BODY tag in {self.page_name(html_file)}")
+            
+            # Check for meta viewport
+            if not facts.has_viewport:
+                self.warnings.append(f"Missing viewport meta tag in {self.page_name(html_file)}")
+            
+            # Check for title tag
+            if not facts.title:
+                self.warnings.append(f"Missing or empty title tag in {self.page_name(html_file)}")
+            
+            self.report_ok(f"✓ Basic HTML structure valid for {self.page_name(html_file)}")
+        
+        print(f"✓ Checked HTML structure of {len(pages)} pages")
     
     def test_internal_links(self):
         """Test internal links in generated HTML"""
         print("\nTesting internal links in generated HTML...")
         
-        html_files = list(self.site_dir.glob("**/*.html"))
         broken_links = 0
+        broken_anchors = 0
         total_links = 0
+        link_index = LinkIndex(self.site_dir)
         
-        for html_file in html_files:
-            # Skip template files
-            if html_file.name == "main.html" or "overrides" in str(html_file):
-                continue
-                
+        for html_file, facts in self.audited_pages():
             try:
-                with open(html_file, "r", encoding="utf-8") as f:
-                    content = f.read()
-                
-                # Find all href attributes
-                links = re.findall(r'href=["\']([^"\']+)["\']', content)
+                if facts.error:
+                    raise ValueError(facts.error)
+                source_rel = html_file.relative_to(self.site_dir).as_posix()
                 
-                for link in links:
-                    # Skip external links and anchors
-                    if (link.startswith('http') or 
-                        link.startswith('mailto:') or 
-                        link.startswith('#') or
-                        link.startswith('javascript:')):
-                        continue
-                    
+                # External links were left out by the scanner
+                for link in sorted(facts.hrefs):
                     total_links += 1
                     
-                    # Resolve relative links
-                    if link.startswith('/'):
-                        target_path = self.site_dir / link.lstrip('/')
-                    else:
-                        target_path = html_file.parent / link
-                    
-                    # Handle different URL structures
-                    if target_path.is_dir():
-                        target_path = target_path / "index.html"
-                    elif not target_path.suffix:
-                        # Try both directory/index.html and file.html patterns
-                        dir_path = target_path / "index.html"
-                        html_path = target_path.with_suffix('.html')
-                        
-                        if dir_path.exists():
-                            target_path = dir_path
-                        elif html_path.exists():
-                            target_path = html_path
-                        else:
-                            target_path = target_path / "index.html"  # Default for error reporting
-                    
-                    if not target_path.exists():
+                    # Resolve against the index: no filesystem calls per link
+                    target, _, fragment = link_index.resolve_link(source_rel, link)
+                    if target is None:
                         broken_links += 1
-                        self.errors.append(f"Broken link in {html_file.name}: {link}")
+                        self.errors.append(f"Broken link in {self.page_name(html_file)}: {link}")
+                        continue
+                    
+                    # Check the fragment against the ids collected when the target was scanned
+                    target_facts = self.page_facts.get(self.site_dir / target)
+                    if fragment and target_facts is not None and fragment not in target_facts.ids:
+                        broken_anchors += 1
+                        self.warnings.append(f"Broken anchor in {self.page_name(html_file)}: {link}")
                         
             except Exception as e:
                 self.warnings.append(f"Error checking links in {html_file}: {e}")
         
         if broken_links == 0:
-            print(f"✓ All {total_links} internal links are valid")
+            print(f"✓ All {total_links} distinct internal links are valid")
         else:
-            print(f"❌ Found {broken_links} broken links out of {total_links} total")
+            print(f"❌ Found {broken_links} broken links out of {total_links} distinct internal links")
+        
+        if broken_anchors:
+            print(f"⚠️  Found {broken_anchors} links to missing anchors")
     
     def test_performance_metrics(self):
         """Test performance-related metrics"""
         print("\nTesting performance metrics...")
+        if self.skipped("assets"):
+            return
         
         # Check file sizes
         large_files = []
@@ -257,135 +321,176 @@ class ProductionTester:
         
         if unminified_js > 0:
             self.performance_issues.append(f"{unminified_js} JavaScript files appear unminified")
+        
+        self.check_script_bundle()
+    
+    def check_script_bundle(self):
+        """Verify extra_javascript ships as one deferred bundle without debug hooks"""
+        if not self.is_post_processed():
+            print("⏭️  Skipped script bundle check: site was not post-processed (scripts/post-build.py)")
+            return
+        unbundled = [rel for rel in site_js.local_scripts() if (self.site_dir / rel).exists()]
+        bundles = sorted(self.site_dir.glob(site_js.BUNDLE_GLOB))
+        if unbundled:
+            self.performance_issues.append(f"{len(unbundled)} extra_javascript files are not bundled")
+            return
+        if not bundles:
+            return
+        
+        blocking_pages = 0
+        bundle_names = {bundle.name for bundle in bundles}
+        for _, facts in self.audited_pages():
+            for src, deferred in facts.scripts:
+                if os.path.basename(LinkIndex.split_url(src)[0]) in bundle_names and not deferred:
+                    blocking_pages += 1
+        if blocking_pages:
+            self.performance_issues.append(f"Script bundle loads without defer on {blocking_pages} pages")
+        
+        for bundle in bundles:
+            with open(bundle, "r", encoding="utf-8") as f:
+                content = f.read()
+            for hook in site_js.DEBUG_HOOKS:
+                if hook in content:
+                    self.warnings.append(f"Script bundle {bundle.name} still defines debug hook {hook}")
+            gzip_size, brotli_size = site_js.compressed_sizes(content)
+            brotli_text = f", {brotli_size / 1024:.1f} KB brotli" if brotli_size is not None else ""
+            print(f"✓ Script bundle {bundle.name}: {len(content.encode('utf-8')) / 1024:.1f} KB "
+                  f"({gzip_size / 1024:.1f} KB gzip{brotli_text})")
+    
+    def test_compression(self):
+        """Report how much the precompressed .gz/.br siblings save, per file type"""
+        print("\nTesting precompressed assets...")
+        if self.skipped("assets"):
+            return
+        if not self.is_post_processed():
+            print("⏭️  Skipped: site was not post-processed (scripts/post-build.py)")
+            return
+        
+        by_type = {}
+        for path, _ in site_compress.compressible_files(self.site_dir):
+            totals = by_type.setdefault(path.suffix.lower(), {"files": 0, "bytes": 0, "precompressed": 0,
+                                                               "gz": 0, "br": 0})
+            size = path.stat().st_size
+            totals["files"] += 1
+            totals["bytes"] += size
+            sidecars = {encoding: Path(f"{path}.{encoding}") for encoding in site_compress.ENCODINGS}
+            if any(sidecar.exists() for sidecar in sidecars.values()):
+                totals["precompressed"] += 1
+            for encoding, sidecar in sidecars.items():
+                # Files without a sibling did not shrink and are served as they are
+                totals[encoding] += sidecar.stat().st_size if sidecar.exists() else size
+        
+        if not any(totals["precompressed"] for totals in by_type.values()):
+            self.performance_issues.append("No precompressed .gz/.br files")
+            return
+        
+        for suffix, totals in sorted(by_type.items(), key=lambda item: -item[1]["bytes"]):
+            print(f"✓ {suffix}: {totals['precompressed']}/{totals['files']} files, "
+                  f"{totals['bytes'] / 1024:.1f} KB -> gzip {site_compress.ratio_text(totals['bytes'], totals['gz'])}, "
+                  f"brotli {site_compress.ratio_text(totals['bytes'], totals['br'])}")
+        original = sum(totals["bytes"] for totals in by_type.values())
+        for encoding, label in (("gz", "gzip"), ("br", "brotli")):
+            served = sum(totals[encoding] for totals in by_type.values())
+            print(f"✓ Total {label}: {original / 1024:.1f} KB -> {site_compress.ratio_text(original, served)}")
     
     def test_seo_optimization(self):
         """Test SEO optimization elements"""
         print("\nTesting SEO optimization...")
         
-        html_files = list(self.site_dir.glob("**/*.html"))
+        pages = self.audited_pages()
         
-        for html_file in html_files[:5]:  # Test first 5 files
-            # Skip template files
-            if html_file.name == "main.html" or "overrides" in str(html_file):
+        for html_file, facts in pages:
+            if facts.error:
+                self.warnings.append(f"Error checking SEO in {html_file}: {facts.error}")
                 continue
-                
-            try:
-                with open(html_file, "r", encoding="utf-8") as f:
-                    content = f.read()
-                
-                # Check for meta description
-                if re.search(r'<meta[^>]*name=["\']description["\'][^>]*>', content, re.IGNORECASE):
-                    print(f"✓ Meta description found in {html_file.name}")
-                else:
-                    self.warnings.append(f"Missing meta description in {html_file.name}")
-                
-                # Check for Open Graph tags
-                og_tags = re.findall(r'<meta[^>]*property=["\']og:[^"\']+["\'][^>]*>', content, re.IGNORECASE)
-                if og_tags:
-                    print(f"✓ Found {len(og_tags)} Open Graph tags in {html_file.name}")
-                else:
-                    self.warnings.append(f"No Open Graph tags in {html_file.name}")
-                
-                # Check for structured data
-                if re.search(r'application/ld\+json', content, re.IGNORECASE):
-                    print(f"✓ Structured data found in {html_file.name}")
-                
-                # Check for proper heading hierarchy
-                headings = re.findall(r'<h([1-6])[^>]*>', content, re.IGNORECASE)
-                if headings:
-                    h1_count = headings.count('1')
-                    if h1_count == 1:
-                        print(f"✓ Proper H1 usage in {html_file.name}")
-                    elif h1_count > 1:
-                        self.warnings.append(f"Multiple H1 tags in {html_file.name}")
-                    elif h1_count == 0:
-                        self.warnings.append(f"No H1 tag in {html_file.name}")
-                        
-            except Exception as e:
-                self.warnings.append(f"Error checking SEO in {html_file}: {e}")
+            
+            # Check for meta description
+            if facts.has_meta_description:
+                self.report_ok(f"✓ Meta description found in {self.page_name(html_file)}")
+            else:
+                self.warnings.append(f"Missing meta description in {self.page_name(html_file)}")
+            
+            # Check for Open Graph tags
+            if facts.og_tags:
+                self.report_ok(f"✓ Found {facts.og_tags} Open Graph tags in {self.page_name(html_file)}")
+            else:
+                self.warnings.append(f"No Open Graph tags in {self.page_name(html_file)}")
+            
+            # Check for structured data
+            if facts.has_structured_data:
+                self.report_ok(f"✓ Structured data found in {self.page_name(html_file)}")
+            
+            # Check for proper heading hierarchy
+            if facts.heading_levels:
+                h1_count = facts.heading_levels.count(1)
+                if h1_count == 1:
+                    self.report_ok(f"✓ Proper H1 usage in {self.page_name(html_file)}")
+                elif h1_count > 1:
+                    self.warnings.append(f"Multiple H1 tags in {self.page_name(html_file)}")
+                elif h1_count == 0:
+                    self.warnings.append(f"No H1 tag in {self.page_name(html_file)}")
+        
+        print(f"✓ Checked SEO elements of {len(pages)} pages")
     
     def test_accessibility(self):
         """Test accessibility features"""
         print("\nTesting accessibility features...")
         
-        html_files = list(self.site_dir.glob("**/*.html"))
+        pages = self.audited_pages()
         
-        for html_file in html_files[:5]:  # Test first 5 files
-            # Skip template files
-            if html_file.name == "main.html" or "overrides" in str(html_file):
+        for html_file, facts in pages:
+            if facts.error:
+                self.warnings.append(f"Error checking accessibility in {html_file}: {facts.error}")
                 continue
-                
-            try:
-                with open(html_file, "r", encoding="utf-8") as f:
-                    content = f.read()
-                
-                # Check for alt attributes on images
-                images = re.findall(r'<img[^>]*>', content, re.IGNORECASE)
-                images_without_alt = 0
-                
-                for img in images:
-                    if not re.search(r'alt=["\'][^"\']*["\']', img, re.IGNORECASE):
-                        images_without_alt += 1
-                
-                if images_without_alt > 0:
-                    self.warnings.append(f"{images_without_alt} images without alt text in {html_file.name}")
-                elif images:
-                    print(f"✓ All {len(images)} images have alt text in {html_file.name}")
-                
-                # Check for ARIA labels
-                aria_labels = re.findall(r'aria-label=["\'][^"\']+["\']', content, re.IGNORECASE)
-                if aria_labels:
-                    print(f"✓ Found {len(aria_labels)} ARIA labels in {html_file.name}")
-                
-                # Check for skip links
-                if re.search(r'skip.*content|skip.*main', content, re.IGNORECASE):
-                    print(f"✓ Skip links found in {html_file.name}")
-                
-            except Exception as e:
-                self.warnings.append(f"Error checking accessibility in {html_file}: {e}")
+            
+            # Check for alt attributes on images
+            if facts.images_without_alt > 0:
+                self.warnings.append(f"{facts.images_without_alt} images without alt text in {self.page_name(html_file)}")
+            elif facts.images:
+                self.report_ok(f"✓ All {facts.images} images have alt text in {self.page_name(html_file)}")
+            
+            # Check for ARIA labels
+            if facts.aria_labels:
+                self.report_ok(f"✓ Found {facts.aria_labels} ARIA labels in {self.page_name(html_file)}")
+            
+            # Check for skip links
+            if facts.has_skip_link:
+                self.report_ok(f"✓ Skip links found in {self.page_name(html_file)}")
+        
+        print(f"✓ Checked accessibility of {len(pages)} pages")
     
     def test_security_headers(self):
         """Test for security-related meta tags and headers"""
         print("\nTesting security features...")
         
-        html_files = list(self.site_dir.glob("**/*.html"))
+        pages = self.audited_pages()
         
-        for html_file in html_files[:3]:  # Test first 3 files
-            # Skip template files
-            if html_file.name == "main.html" or "overrides" in str(html_file):
+        for html_file, facts in pages:
+            if facts.error:
+                self.warnings.append(f"Error checking security in {html_file}: {facts.error}")
                 continue
-                
-            try:
-                with open(html_file, "r", encoding="utf-8") as f:
-                    content = f.read()
-                
-                # Check for CSP meta tag
-                if re.search(r'<meta[^>]*http-equiv=["\']Content-Security-Policy["\']', content, re.IGNORECASE):
-                    print(f"✓ CSP meta tag found in {html_file.name}")
-                
-                # Check for X-Frame-Options
-                if re.search(r'<meta[^>]*http-equiv=["\']X-Frame-Options["\']', content, re.IGNORECASE):
-                    print(f"✓ X-Frame-Options found in {html_file.name}")
-                
-                # Check for external links with proper rel attributes
-                external_links = re.findall(r'<a[^>]*href=["\']https?://[^"\']*["\'][^>]*>', content, re.IGNORECASE)
-                unsafe_external_links = 0
-                
-                for link in external_links:
-                    if not re.search(r'rel=["\'][^"\']*noopener[^"\']*["\']', link, re.IGNORECASE):
-                        unsafe_external_links += 1
-                
-                if unsafe_external_links > 0:
-                    self.warnings.append(f"{unsafe_external_links} external links without noopener in {html_file.name}")
-                elif external_links:
-                    print(f"✓ All {len(external_links)} external links have proper rel attributes in {html_file.name}")
-                    
-            except Exception as e:
-                self.warnings.append(f"Error checking security in {html_file}: {e}")
+            
+            # Check for CSP meta tag
+            if facts.has_csp:
+                self.report_ok(f"✓ CSP meta tag found in {self.page_name(html_file)}")
+            
+            # Check for X-Frame-Options
+            if facts.has_x_frame_options:
+                self.report_ok(f"✓ X-Frame-Options found in {self.page_name(html_file)}")
+            
+            # Check for external links with proper rel attributes
+            if facts.unsafe_external_links > 0:
+                self.warnings.append(f"{facts.unsafe_external_links} external links without noopener in {self.page_name(html_file)}")
+            elif facts.external_links:
+                self.report_ok(f"✓ All {facts.external_links} external links have proper rel attributes in {self.page_name(html_file)}")
+        
+        print(f"✓ Checked security features of {len(pages)} pages")
     
     def test_robots_and_sitemap(self):
         """Test robots.txt and sitemap.xml"""
         print("\nTesting robots.txt and sitemap...")
+        if self.skipped("sitemap"):
+            return
         
         # Check robots.txt
         robots_file = self.site_dir / "robots.txt"
@@ -427,20 +532,22 @@ class ProductionTester:
         else:
             self.warnings.append("sitemap.xml not found")
     
-    def run_all_tests(self):
+    def run_all_tests(self, skip_build=False):
         """Run all production readiness tests"""
         print("🧪 Starting Production Readiness Tests\n")
         print("=" * 60)
         
-        # Build the site first
-        if not self.test_build_process():
+        # Build the site first, unless testing an existing site directory
+        if not skip_build and not self.test_build_process():
             print("❌ Build failed - cannot continue with other tests")
             return False
         
         self.test_generated_files()
+        self.audit_pages()
         self.test_html_validity()
         self.test_internal_links()
         self.test_performance_metrics()
+        self.test_compression()
         self.test_seo_optimization()
         self.test_accessibility()
         self.test_security_headers()
@@ -477,8 +584,26 @@ class ProductionTester:
 
 def main():
     """Main function to run production tests"""
-    tester = ProductionTester()
-    success = tester.run_all_tests()
+    parser = argparse.ArgumentParser(description="Production readiness tests for the built site")
+    parser.add_argument("--time-budget", type=float, default=300,
+                        help="Seconds allowed for auditing every generated page")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Worker processes for the page audit (default: CPU count)")
+    parser.add_argument("--verbose", action="store_true", default=None,
+                        help="Print per-page results even on large sites")
+    parser.add_argument("--site-dir", default="site",
+                        help="Built site to test when --skip-build is given")
+    parser.add_argument("--skip-build", action="store_true",
+                        help="Test an existing site directory instead of building")
+    dep_graph.add_arguments(parser)
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    
+    tester = ProductionTester(args.site_dir, time_budget=args.time_budget, jobs=args.jobs, verbose=args.verbose,
+                              scope=dep_graph.from_arguments(args))
+    timings = instrumentation.from_arguments(tester, args, prefixes=("test_", "audit_"))
+    success = tester.run_all_tests(skip_build=args.skip_build)
+    instrumentation.finish(timings, args)
     
     sys.exit(0 if success else 1)
 
@@ -4,11 +4,13 @@ Responsive Design Test Script
 Tests responsive design elements and mobile optimization
 """
 
-import os
+import argparse
 import re
 import sys
 from pathlib import Path
 
+import instrumentation
+
 class ResponsiveDesignTester:
     def __init__(self, css_file="docs/stylesheets/custom.css"):
         self.css_file = Path(css_file)
@@ -244,8 +246,14 @@ class ResponsiveDesignTester:
 
 def main():
     """Main function to run responsive design tests"""
+    parser = argparse.ArgumentParser(description="Responsive design tests")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    
     tester = ResponsiveDesignTester()
+    timings = instrumentation.from_arguments(tester, args)
     success = tester.run_all_tests()
+    instrumentation.finish(timings, args)
     
     sys.exit(0 if success else 1)
 
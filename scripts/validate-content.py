@@ -4,12 +4,14 @@ Content validation script for the portfolio website.
 Validates navigation structure, page structure, and content integrity.
 """
 
+import argparse
 import os
 import sys
-import yaml
-import re
 from pathlib import Path
-from typing import Dict, List, Set
+
+import dep_graph
+from doc_corpus import get_corpus
+from validation_cache import ValidationCache
 
 # Set UTF-8 encoding for Windows compatibility
 if sys.platform.startswith('win'):
@@ -17,9 +19,18 @@ if sys.platform.startswith('win'):
     sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
     sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
 
-def validate_mkdocs_config() -> bool:
+def skipped(scope, check) -> bool:
+    """True (after saying so) when --changed leaves a whole-site check unaffected."""
+    if scope is None or scope.needs(check):
+        return False
+    print(f"⏭️  Skipped: no changed file affects {check}")
+    return True
+
+def validate_mkdocs_config(scope=None) -> bool:
     """Validate MkDocs configuration file."""
     print("🔍 Validating MkDocs configuration...")
+    if skipped(scope, "nav"):
+        return True
     
     try:
         # Try to validate using MkDocs directly instead of YAML parsing
@@ -63,7 +74,7 @@ def validate_mkdocs_config() -> bool:
             return True
         return False
 
-def validate_page_structure() -> bool:
+def validate_page_structure(scope=None) -> bool:
     """Validate that all required pages exist and have proper structure."""
     print("🔍 Validating page structure...")
     
@@ -75,26 +86,27 @@ def validate_page_structure() -> bool:
         'docs/blog/index.md': 'Blog index'
     }
     
+    corpus = get_corpus('docs')
     all_valid = True
     
     for page_path, description in required_pages.items():
-        if not os.path.exists(page_path):
+        if scope is not None and not scope.covers_page(Path(page_path).relative_to('docs').as_posix()):
+            continue
+        doc = corpus.get(Path(page_path).relative_to('docs'))
+        if doc is None:
             print(f"❌ Missing required page: {page_path} ({description})")
             all_valid = False
             continue
             
         # Check if page has frontmatter
-        with open(page_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-        if content.startswith('---'):
+        if doc.has_frontmatter:
             print(f"✅ {description} exists with frontmatter")
         else:
             print(f"⚠️  {description} exists but missing frontmatter")
     
     return all_valid
 
-def validate_blog_posts() -> bool:
+def validate_blog_posts(scope=None) -> bool:
     """Validate blog post structure and metadata."""
     print("🔍 Validating blog posts...")
     
@@ -103,29 +115,29 @@ def validate_blog_posts() -> bool:
         print("⚠️  Blog posts directory not found")
         return True
     
-    post_files = list(blog_dir.glob('*.md'))
+    post_files = get_corpus('docs').under('blog/posts', recursive=False)
     if not post_files:
         print("⚠️  No blog posts found")
         return True
+    if scope is not None:
+        post_files = [post for post in post_files if scope.covers_page(post.rel_path)]
     
     valid_posts = 0
     for post_file in post_files:
-        with open(post_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
         # Check for frontmatter
-        if not content.startswith('---'):
+        if not post_file.has_frontmatter:
             print(f"❌ Blog post missing frontmatter: {post_file.name}")
             continue
             
         # Extract frontmatter
         try:
-            frontmatter_end = content.find('---', 3)
-            if frontmatter_end == -1:
+            if post_file.frontmatter_text is None:
                 print(f"❌ Invalid frontmatter in: {post_file.name}")
                 continue
-                
-            frontmatter = yaml.safe_load(content[3:frontmatter_end])
+            
+            if post_file.frontmatter_error:
+                raise ValueError(post_file.frontmatter_error)
+            frontmatter = post_file.frontmatter
             
             # Check required fields
             required_fields = ['title', 'date']
@@ -143,7 +155,7 @@ def validate_blog_posts() -> bool:
     print(f"📊 Validated {valid_posts}/{len(post_files)} blog posts")
     return True
 
-def validate_portfolio_projects() -> bool:
+def validate_portfolio_projects(scope=None) -> bool:
     """Validate portfolio project pages."""
     print("🔍 Validating portfolio projects...")
     
@@ -152,20 +164,20 @@ def validate_portfolio_projects() -> bool:
         print("⚠️  Portfolio directory not found")
         return True
     
-    project_files = list(portfolio_dir.glob('*.md'))
+    project_files = get_corpus('docs').under('portfolio', recursive=False)
     if not project_files:
         print("⚠️  No portfolio projects found")
         return True
+    if scope is not None:
+        project_files = [project for project in project_files if scope.covers_page(project.rel_path)]
     
     valid_projects = 0
     for project_file in project_files:
-        with open(project_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        if content.startswith('---'):
+        if project_file.has_frontmatter:
             try:
-                frontmatter_end = content.find('---', 3)
-                frontmatter = yaml.safe_load(content[3:frontmatter_end])
+                if project_file.frontmatter_error:
+                    raise ValueError(project_file.frontmatter_error)
+                frontmatter = project_file.frontmatter
                 
                 if 'title' in frontmatter:
                     valid_projects += 1
@@ -180,9 +192,11 @@ def validate_portfolio_projects() -> bool:
     print(f"📊 Validated {valid_projects}/{len(project_files)} portfolio projects")
     return True
 
-def validate_assets() -> bool:
+def validate_assets(scope=None) -> bool:
     """Validate that referenced assets exist."""
     print("🔍 Validating assets...")
+    if skipped(scope, "assets"):
+        return True
     
     assets_dir = Path('docs/assets')
     if not assets_dir.exists():
@@ -203,8 +217,21 @@ def validate_assets() -> bool:
 
 def main():
     """Run all validation checks."""
+    parser = argparse.ArgumentParser(description="Validate portfolio website content")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Reprocess every file instead of using .cache/validation")
+    dep_graph.add_arguments(parser)
+    args = parser.parse_args()
+    
+    cache = None
+    if not args.no_cache:
+        # Prime the shared corpus so unchanged files are not re-read or re-parsed
+        cache = ValidationCache("content")
+        cache.attach(get_corpus('docs'))
+    
     print("🚀 Starting content validation...")
     print("=" * 50)
+    scope = dep_graph.from_arguments(args)
     
     checks = [
         validate_mkdocs_config,
@@ -219,13 +246,17 @@ def main():
     
     for check in checks:
         try:
-            if check():
+            if check(scope):
                 passed += 1
             print("-" * 30)
         except Exception as e:
             print(f"❌ Check failed with error: {e}")
             print("-" * 30)
     
+    if cache:
+        cache.save()
+        print(f"💾 Cache: {cache.hits} unchanged, {cache.misses} reprocessed")
+    
     print("=" * 50)
     print(f"📊 Validation Summary: {passed}/{total} checks passed")
     
@@ -6,8 +6,6 @@ Windows-compatible version without Unicode emojis.
 
 import os
 import sys
-import yaml
-from pathlib import Path
 
 def validate_mkdocs_config():
     """Validate MkDocs configuration file."""
@@ -62,19 +60,21 @@ def validate_page_structure():
     return all_valid
 
 def validate_build():
-    """Test if MkDocs can build the site."""
+    """Test if MkDocs can build the site, reusing a cached build of the same inputs."""
     print("Testing MkDocs build...")
     
     try:
-        import subprocess
-        result = subprocess.run(['mkdocs', 'build', '--clean'], 
-                              capture_output=True, text=True, timeout=60)
+        from build_cache import ensure_build
+        build = ensure_build(strict=False, timeout=60)
         
-        if result.returncode == 0:
-            print("SUCCESS: MkDocs build completed")
+        if build.success:
+            if build.reused:
+                print(f"SUCCESS: Reused MkDocs build {build.key}")
+            else:
+                print("SUCCESS: MkDocs build completed")
             return True
         else:
-            print(f"ERROR: MkDocs build failed: {result.stderr}")
+            print(f"ERROR: MkDocs build failed: {build.stderr}")
             return False
             
     except Exception as e:
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Incremental Validation Cache
+Persists per-file parse results keyed by content hash so unchanged files are not reprocessed
+"""
+
+import json
+import os
+from pathlib import Path
+
+CACHE_DIR = Path(".cache/validation")
+CACHE_VERSION = 2
+
+
+class ValidationCache:
+    """On-disk cache of Document views and per-file checker results"""
+
+    def __init__(self, name, cache_dir=CACHE_DIR):
+        self.path = Path(cache_dir) / f"{name}.json"
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        """Load the cache file, discarding it if it was written by another version"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == CACHE_VERSION:
+            self.entries = data.get("entries", {})
+
+    def attach(self, corpus):
+        """Prime every document in the corpus from the cache where it is still valid"""
+        for doc in corpus:
+            entry = self.entries.get(doc.rel_path)
+            stat = os.stat(doc.path)
+            signature = [stat.st_size, stat.st_mtime_ns]
+
+            if entry and entry.get("stat") == signature:
+                # Size and mtime unchanged: trust the stored hash without reading the file
+                doc.prime(entry["sha"], entry["views"])
+                self.hits += 1
+                continue
+
+            if entry and entry.get("sha") == doc.sha:
+                # Touched but identical content: refresh the stat signature only
+                doc.prime(entry["sha"], entry["views"])
+                entry["stat"] = signature
+                self._dirty = True
+                self.hits += 1
+                continue
+
+            self.entries[doc.rel_path] = {
+                "sha": doc.sha,
+                "stat": signature,
+                "views": doc.cached_views(),
+                "results": {},
+            }
+            self._dirty = True
+            self.misses += 1
+
+        # Forget files that no longer exist
+        for rel_path in set(self.entries) - set(corpus.documents):
+            del self.entries[rel_path]
+            self._dirty = True
+
+    def get_result(self, doc, key, fingerprint=None):
+        """Return a stored per-file result, or None if the file or dependency set changed"""
+        entry = self.entries.get(doc.rel_path)
+        if not entry or entry["sha"] != doc.sha:
+            return None
+        result = entry["results"].get(key)
+        if result is None or result.get("fingerprint") != fingerprint:
+            return None
+        return result["value"]
+
+    def set_result(self, doc, key, value, fingerprint=None):
+        """Store a per-file result, optionally tied to a dependency fingerprint"""
+        entry = self.entries.get(doc.rel_path)
+        if not entry:
+            return
+        entry["results"][key] = {"fingerprint": fingerprint, "value": value}
+        self._dirty = True
+
+    def save(self):
+        """Write the cache back to disk if anything changed"""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "entries": self.entries}, f, default=str)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
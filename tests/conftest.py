@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The helper modules live next to the hyphenated CLI scripts, which import them from scripts/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
@@ -0,0 +1,66 @@
+import dep_graph
+
+CONFIG = """site_name: Test
+nav:
+  - Home: index.md
+  - Guide: guide.md
+markdown_extensions:
+  - toc
+  - pymdownx.snippets:
+      base_path: [includes]
+"""
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def graph(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write(tmp_path / "mkdocs.yml", CONFIG)
+    write(tmp_path / "includes" / "shared.md", 'Shared text\n\n--8<-- "nested.md"\n')
+    write(tmp_path / "includes" / "nested.md", "Nested text\n")
+    write(tmp_path / "docs" / "index.md", "# Home\n\nSee the [guide](guide.md).\n")
+    write(tmp_path / "docs" / "guide.md", '# Guide\n\n--8<-- "shared.md"\n')
+    write(tmp_path / "docs" / "notes" / "extra.md", "# Extra\n\n--8<-- \"nested.md\"\n")
+    write(tmp_path / "docs" / "notes" / "other.md", "# Other\n")
+    return dep_graph.DependencyGraph(path=tmp_path / "graph.json").update()
+
+
+def test_snippet_includes_affect_the_pages_that_include_them(tmp_path, monkeypatch):
+    impact = graph(tmp_path, monkeypatch).affected(["includes/shared.md"])
+    assert not impact.whole_site
+    assert impact.pages == {"guide.md"}
+    assert impact.outputs == {"guide/index.html"}
+
+
+def test_nested_snippet_includes(tmp_path, monkeypatch):
+    impact = graph(tmp_path, monkeypatch).affected(["includes/nested.md"])
+    assert impact.pages == {"guide.md", "notes/extra.md"}
+    assert impact.outputs == {"guide/index.html", "notes/extra/index.html"}
+    assert not impact.site_checks
+
+
+def test_mkdocs_yml_changes_affect_the_whole_site(tmp_path, monkeypatch):
+    impact = graph(tmp_path, monkeypatch).affected(["mkdocs.yml"])
+    assert impact.whole_site
+    assert impact.covers_page("notes/other.md")
+    assert impact.covers_output("anything/index.html")
+    assert impact.needs("sitemap")
+
+
+def test_linked_pages_are_retested_with_their_target(tmp_path, monkeypatch):
+    impact = graph(tmp_path, monkeypatch).affected(["docs/guide.md"])
+    assert impact.pages == {"guide.md", "index.md"}
+    assert impact.site_checks == {"nav"}
+
+
+def test_only_added_or_deleted_pages_change_the_page_list(tmp_path, monkeypatch):
+    graph_ = graph(tmp_path, monkeypatch)
+    assert graph_.affected(["docs/notes/other.md"]).site_checks == set()
+    added = graph_.affected(["docs/notes/other.md"], added=["docs/notes/other.md"])
+    assert added.site_checks == {"nav", "sitemap"}
+    deleted = graph_.affected(["docs/notes/gone.md"])
+    assert deleted.site_checks == {"nav", "sitemap"}
+    assert deleted.pages == {"notes/gone.md"}
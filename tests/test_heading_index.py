@@ -0,0 +1,56 @@
+import re
+
+import pytest
+
+from doc_corpus import Document
+from heading_index import heading_text, page_anchor_ids, toc_slugify
+
+HEADINGS = [
+    "Getting Started",
+    "What's new in v2.0?",
+    "Kubernetes & GitOps: lessons learned",
+    "Café déjà vu",
+    "`kubectl` *basics* and [links](https://example.com)",
+    "Getting Started",
+    "Getting Started",
+    "Custom anchor {#my-anchor}",
+    "  Spaces   and --- dashes  ",
+]
+MARKDOWN = "".join(f"## {heading}\n\ntext\n\n" for heading in HEADINGS)
+
+
+def document(tmp_path, text):
+    path = tmp_path / "page.md"
+    path.write_text(text, encoding="utf-8")
+    return Document(path, tmp_path)
+
+
+def test_known_slugs(tmp_path):
+    ids = page_anchor_ids(document(tmp_path, MARKDOWN + '<div id="hero"></div>\n'), toc_slugify)
+    assert {"getting-started", "getting-started_1", "getting-started_2", "whats-new-in-v20",
+            "kubernetes-gitops-lessons-learned", "cafe-deja-vu", "kubectl-basics-and-links",
+            "my-anchor", "spaces-and-dashes", "hero"} == ids
+
+
+def test_headings_inside_fenced_code_are_not_anchors(tmp_path):
+    ids = page_anchor_ids(document(tmp_path, "## Real\n\n```\n## Not a heading\n```\n"), toc_slugify)
+    assert ids == {"real"}
+
+
+def test_explicit_ids_from_attribute_lists():
+    assert heading_text("Title {: #custom .class }") == ("Title", "custom")
+    assert heading_text("Title {.class}") == ("Title", None)
+
+
+def test_matches_the_toc_extension_slugify():
+    toc = pytest.importorskip("markdown.extensions.toc")
+    for heading in HEADINGS[:5] + HEADINGS[-1:]:
+        text, _ = heading_text(heading)
+        assert toc_slugify(text) == toc.slugify(text, "-"), heading
+
+
+def test_matches_ids_rendered_by_the_toc_extension(tmp_path):
+    markdown = pytest.importorskip("markdown")
+    rendered = markdown.markdown(MARKDOWN, extensions=["toc", "attr_list"])
+    expected = set(re.findall(r'<h2 id="([^"]+)"', rendered))
+    assert page_anchor_ids(document(tmp_path, MARKDOWN), toc_slugify) == expected
@@ -0,0 +1,52 @@
+from html_rewriter import HTMLRewriter
+
+
+def rewrite(text, markdown=True):
+    return HTMLRewriter(markdown=markdown).rewrite(text)
+
+
+def test_first_image_is_not_lazy():
+    text, counts = rewrite('<img src="a.png">\n<img src="b.png">\n<img src="c.png" loading="eager">')
+    assert text == ('<img src="a.png" decoding="async">\n<img src="b.png" loading="lazy" decoding="async">\n'
+                    '<img src="c.png" loading="eager" decoding="async">')
+    assert counts == {"loading": 1, "decoding": 3}
+
+
+def test_high_priority_image_stays_eager():
+    text, _ = rewrite('<img src="a.png"><img src="hero.png" fetchpriority="high">')
+    assert 'hero.png" fetchpriority="high" decoding="async">' in text
+
+
+def test_external_links_get_rel_and_keep_existing_tokens():
+    text, counts = rewrite('<a href="https://example.com" rel="me">x</a> <a href="/about/">y</a> '
+                           '<a href="http://example.org" rel="noopener">z</a>')
+    assert text == ('<a href="https://example.com" rel="me noopener noreferrer">x</a> <a href="/about/">y</a> '
+                    '<a href="http://example.org" rel="noopener">z</a>')
+    assert counts == {"rel": 1}
+
+
+def test_inline_code_spans_are_skipped():
+    source = 'Use `<a href="https://example.com">` or ``<img src="x.png">`` in text.'
+    assert rewrite(source) == (source, {})
+
+
+def test_fenced_code_is_skipped():
+    source = ('```html\n<a href="https://example.com">x</a>\n<img src="a.png">\n```\n\n'
+              '~~~\n<img src="b.png">\n~~~\n'
+              '<a href="https://example.com">real</a>\n')
+    text, counts = rewrite(source)
+    assert counts == {"rel": 1}
+    assert text == source.replace('">real', '" rel="noopener noreferrer">real')
+
+
+def test_images_in_code_do_not_count_as_the_first_image():
+    text, _ = rewrite('```\n<img src="code.png">\n```\n<img src="a.png">\n<img src="b.png">\n')
+    assert '<img src="a.png" decoding="async">' in text
+    assert '<img src="b.png" loading="lazy" decoding="async">' in text
+
+
+def test_html_mode_rewrites_backticks_but_not_comments_or_pre():
+    source = '`<img src="a.png">` <!-- <img src="b.png"> --> <pre><img src="c.png"></pre>'
+    text, counts = rewrite(source, markdown=False)
+    assert text == source.replace('a.png">', 'a.png" decoding="async">')
+    assert counts == {"decoding": 1}
@@ -0,0 +1,38 @@
+from link_index import LinkIndex
+
+DOCS = ["index.md", "about.md", "blog/index.md", "blog/posts/first.md", "portfolio/app.html",
+        "assets/images/photo.jpeg", "assets/resume file.pdf"]
+
+
+def test_directory_links_resolve_to_their_index():
+    index = LinkIndex("docs", DOCS)
+    assert index.resolve_link("about.md", "blog/") == ("blog/index.md", "blog", "")
+    assert index.resolve_link("blog/posts/first.md", "../") == ("blog/index.md", "blog", "")
+    assert index.resolve_link("blog/index.md", "/")[0] == "index.md"
+    assert index.resolve_link("about.md", "assets/")[0] is None
+
+
+def test_directories_without_an_index_need_allow_directories():
+    assert LinkIndex("docs", DOCS, allow_directories=True).resolve_link("about.md", "assets/")[0] == "assets"
+
+
+def test_md_and_html_aliases():
+    index = LinkIndex("docs", DOCS)
+    assert index.resolve_link("index.md", "about.html")[0] == "about.md"
+    assert index.resolve_link("index.md", "about")[0] == "about.md"
+    assert index.resolve_link("index.md", "portfolio/app.md")[0] == "portfolio/app.html"
+    assert index.resolve_link("index.md", "portfolio/app")[0] == "portfolio/app.html"
+    assert index.resolve_link("index.md", "missing.html")[0] is None
+
+
+def test_fragments_queries_and_escapes():
+    index = LinkIndex("docs", DOCS)
+    assert index.resolve_link("blog/index.md", "posts/first.md?x=1#intro") == (
+        "blog/posts/first.md", "blog/posts/first.md", "intro")
+    assert index.resolve_link("about.md", "#team") == ("about.md", "about.md", "team")
+    assert index.resolve_link("about.md", "assets/resume%20file.pdf")[0] == "assets/resume file.pdf"
+
+
+def test_links_above_the_root_are_broken():
+    index = LinkIndex("docs", DOCS)
+    assert index.resolve_link("about.md", "../about.md") == (None, None, "")
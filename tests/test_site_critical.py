@@ -0,0 +1,51 @@
+import site_critical
+
+CSS = """
+.md-header { color: red }
+.md-content__inner > h1 + * { margin-top: 0 }
+[data-md-color-scheme="slate"] .md-typeset { color: white }
+#hero { height: 10rem }
+"""
+
+LAYOUT = """<html><body data-md-color-scheme="{scheme}">
+<header class="md-header"><nav class="md-header__inner">{nav}</nav></header>
+<main class="md-main"><article class="md-content__inner md-typeset">{article}</article></main>
+</body></html>"""
+
+
+def page(article, nav="<a href='/'>Home</a>", scheme="default"):
+    return site_critical.above_fold_elements(LAYOUT.format(article=article, nav=nav, scheme=scheme))
+
+
+def signature(elements):
+    return site_critical.template_signature(elements, site_critical.SelectorReferences(CSS))
+
+
+def test_same_layout_with_different_headings_is_one_template():
+    first = page('<h1 id="kubernetes-platform">Kubernetes Platform</h1><p>One</p>'
+                 '<pre><span><a id="__codelineno-0-1" name="__codelineno-0-1"></a>x</span></pre>')
+    second = page('<h1 id="aws-migration">AWS Migration</h1><p>Two</p><ul><li>item</li></ul>'
+                  '<a name="top"></a><h2 id="overview">Overview</h2>')
+    assert signature(first) == signature(second)
+
+
+def test_content_still_distinguishes_pages():
+    references = site_critical.SelectorReferences(CSS)
+    first = page('<h1 id="one">One</h1><p>x</p>')
+    second = page('<h1 id="two">Two</h1><ul><li>x</li></ul>')
+    assert site_critical.content_signature(first, references) != site_critical.content_signature(second, references)
+
+
+def test_different_layout_is_another_template():
+    assert signature(page("<h1>Title</h1>")) != signature(page("<h1>Title</h1>", nav="<div id='hero'></div>"))
+
+
+def test_selector_references():
+    references = site_critical.SelectorReferences(CSS)
+    assert references.ids == {"hero"}
+    assert {"md-header", "md-content__inner", "md-typeset"} <= references.classes
+    assert "+" in references.siblings
+
+
+def test_referenced_attribute_values_are_part_of_the_layout():
+    assert signature(page("<h1>Title</h1>")) != signature(page("<h1>Title</h1>", scheme="slate"))
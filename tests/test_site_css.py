@@ -0,0 +1,93 @@
+import site_css
+
+
+def used(html):
+    names = site_css.UsedNames()
+    names.add_html(html)
+    return names
+
+
+def optimize(css, html="<div class='a b'><p>text</p></div>"):
+    return site_css.optimize(css, used(html))[0]
+
+
+def test_split_selector_list_keeps_strings():
+    assert site_css.split_selector_list('[data-md-color-scheme="slate"] .a, a[title="x,y"], .b:is(.c,.d)') == [
+        '[data-md-color-scheme="slate"] .a', 'a[title="x,y"]', '.b:is(.c,.d)',
+    ]
+
+
+def test_prune_keeps_attribute_values_of_live_selectors():
+    css = '[data-md-color-scheme="slate"] .a, .missing { color: red }'
+    assert optimize(css) == '[data-md-color-scheme="slate"] .a{color:red}'
+
+
+def test_strings_and_data_urls_are_preserved():
+    css = """
+    .a::before { content: "a  ,  b : c;" }
+    .b { background: url(data:image/svg+xml;charset=utf-8,%3Csvg xmlns='http://www.w3.org/2000/svg'%3E%3C/svg%3E) }
+    """
+    assert optimize(css) == (
+        '.a::before{content:"a  ,  b : c;"}'
+        ".b{background:url(data:image/svg+xml;charset=utf-8,%3Csvg xmlns='http://www.w3.org/2000/svg'%3E%3C/svg%3E)}"
+    )
+
+
+def test_calc_whitespace_is_kept():
+    css = ".a { width: calc(100% - 2rem); margin: calc( 1rem + var(--gap) * -1 ) }"
+    assert site_css.minify(css) == ".a{width:calc(100% - 2rem);margin:calc(1rem + var(--gap) * -1)}"
+
+
+def test_supports_blocks_are_pruned_like_media_blocks():
+    css = """
+    @supports (display: grid) { .a { display: grid } .missing { display: grid } }
+    @supports not (display: grid) { .missing { float: left } }
+    """
+    assert optimize(css) == "@supports (display:grid){.a{display:grid}}"
+
+
+def test_font_face_is_kept_and_minified():
+    css = """
+    @font-face {
+        font-family: "Inter";
+        src: url("fonts/inter.woff2") format("woff2"), url(fonts/inter.woff) format("woff");
+        font-display: swap;
+    }
+    """
+    assert optimize(css) == (
+        '@font-face{font-family:"Inter";src:url("fonts/inter.woff2") format("woff2"),'
+        'url(fonts/inter.woff) format("woff");font-display:swap}'
+    )
+
+
+def test_merge_media_folds_blocks_without_competing_rules():
+    css = """
+    @media (min-width: 768px) { .a { color: red } }
+    .b { margin: 0 }
+    @media (min-width: 768px) { .b { color: blue } }
+    """
+    assert optimize(css) == "@media (min-width:768px){.a{color:red}.b{color:blue}}.b{margin:0}"
+
+
+def test_merge_media_keeps_order_against_competing_rules():
+    css = """
+    @media (min-width: 768px) { .a { color: red } }
+    .b { color: green }
+    @media (min-width: 768px) { .b { color: blue } }
+    """
+    # Moving the second block's .b above the plain .b would let green win; moving the first block's .a down
+    # past it is safe because .a and .b never set color on the same element here
+    assert optimize(css, "<div class='a'></div><div class='b'></div>") == (
+        ".b{color:green}@media (min-width:768px){.a{color:red}.b{color:blue}}"
+    )
+
+
+def test_merge_media_leaves_blocks_when_both_moves_compete():
+    css = """
+    @media (min-width: 768px) { .a { color: red } }
+    .a, .b { color: green }
+    @media (min-width: 768px) { .b { color: blue } }
+    """
+    assert optimize(css, "<div class='a b'></div>") == (
+        "@media (min-width:768px){.a{color:red}}.a,.b{color:green}@media (min-width:768px){.b{color:blue}}"
+    )
@@ -0,0 +1,36 @@
+import site_js
+
+
+def test_regex_literals_are_kept():
+    js = "var re = /[/\\]]+\\/\\/ *x/g;\nreturn s.replace(/\\s+/g, ' ');"
+    assert site_js.minify(js) == "var re=/[/\\]]+\\/\\/ *x/g;return s.replace(/\\s+/g,' ');"
+
+
+def test_regex_after_keyword_and_division_after_value():
+    js = "if (typeof x === 'string') return /^a b$/.test(x);\nvar half = total / 2 / count;"
+    assert site_js.minify(js) == "if(typeof x==='string')return/^a b$/.test(x);var half=total/2/count;"
+
+
+def test_regex_containing_comment_markers():
+    js = "var url = /https?:\\/\\/[^ ]*/; // trailing comment\nvar c = /a\\/*b/;"
+    assert site_js.minify(js) == "var url=/https?:\\/\\/[^ ]*/;var c=/a\\/*b/;"
+
+
+def test_template_strings_are_kept_verbatim():
+    js = "const html = `<div class=\"card\">\n    ${ title }  // not a comment\n</div>`;"
+    assert site_js.minify(js) == "const html=`<div class=\"card\">\n    ${ title }  // not a comment\n</div>`;"
+
+
+def test_nested_template_strings():
+    js = "const s = `a ${ok ? `x  ${`//`}  y` : '/*'} b`;\nlet n = 1;"
+    assert site_js.minify(js) == "const s=`a ${ok ? `x  ${`//`}  y` : '/*'} b`;let n=1;"
+
+
+def test_line_breaks_needed_by_semicolon_insertion_are_kept():
+    js = "let a = b\n(c || d).run()\nx\n++y"
+    assert site_js.minify(js) == "let a=b\n(c||d).run()\nx\n++y"
+
+
+def test_debug_hooks_are_stripped():
+    js = "window.testCardClicks = function () { return 1; };\nwindow.keep = 1;"
+    assert site_js.minify(js) == "window.keep=1;"
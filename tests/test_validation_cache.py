@@ -0,0 +1,73 @@
+import os
+
+from doc_corpus import DocumentCorpus
+from validation_cache import ValidationCache
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def load(docs, cache_dir):
+    corpus = DocumentCorpus(docs)
+    cache = ValidationCache("test", cache_dir)
+    cache.attach(corpus)
+    return corpus, cache
+
+
+def test_unchanged_files_hit_and_keep_results(tmp_path):
+    docs, cache_dir = tmp_path / "docs", tmp_path / "cache"
+    write(docs / "index.md", "# Home\n\n[About](about.md)\n")
+    corpus, cache = load(docs, cache_dir)
+    assert (cache.hits, cache.misses) == (0, 1)
+    cache.set_result(corpus.documents["index.md"], "links", ["about.md"], "fp")
+    cache.save()
+
+    corpus, cache = load(docs, cache_dir)
+    assert (cache.hits, cache.misses) == (1, 0)
+    doc = corpus.documents["index.md"]
+    assert "content" not in doc.__dict__  # Primed from the cache without reading the file
+    assert doc.markdown_links == [("About", "about.md")]
+    assert cache.get_result(doc, "links", "fp") == ["about.md"]
+    assert cache.get_result(doc, "links", "other-fingerprint") is None
+
+
+def test_touched_file_with_same_content_still_hits(tmp_path):
+    docs, cache_dir = tmp_path / "docs", tmp_path / "cache"
+    write(docs / "index.md", "# Home\n")
+    _, cache = load(docs, cache_dir)
+    cache.save()
+    stat = os.stat(docs / "index.md")
+    os.utime(docs / "index.md", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    _, cache = load(docs, cache_dir)
+    assert (cache.hits, cache.misses) == (1, 0)
+
+
+def test_changed_content_misses_and_drops_results(tmp_path):
+    docs, cache_dir = tmp_path / "docs", tmp_path / "cache"
+    write(docs / "index.md", "# Home\n")
+    corpus, cache = load(docs, cache_dir)
+    cache.set_result(corpus.documents["index.md"], "links", [], None)
+    cache.save()
+    write(docs / "index.md", "# Home page, edited\n")
+
+    corpus, cache = load(docs, cache_dir)
+    assert (cache.hits, cache.misses) == (0, 1)
+    doc = corpus.documents["index.md"]
+    assert cache.entries["index.md"]["sha"] == doc.sha
+    assert cache.get_result(doc, "links") is None
+    assert doc.headings == [(1, "Home page, edited")]
+
+
+def test_deleted_files_are_forgotten(tmp_path):
+    docs, cache_dir = tmp_path / "docs", tmp_path / "cache"
+    write(docs / "index.md", "# Home\n")
+    write(docs / "old.md", "# Old\n")
+    _, cache = load(docs, cache_dir)
+    cache.save()
+    (docs / "old.md").unlink()
+
+    _, cache = load(docs, cache_dir)
+    assert set(cache.entries) == {"index.md"}